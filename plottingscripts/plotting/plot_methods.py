@@ -1,11 +1,12 @@
 import typing
 
-from matplotlib.pyplot import tight_layout, figure, subplots_adjust, subplot, \
-    savefig, show, tick_params
+from matplotlib.figure import Figure
 import matplotlib.gridspec
 import numpy as np
 
 import plottingscripts.utils.plot_util as plot_util
+import plottingscripts.utils.merge_test_performance_different_times as mdt
+from plottingscripts.utils import summary
 import plottingscripts.utils.macros
 
 
@@ -25,6 +26,7 @@ def plot_optimization_trace_mult_exp(time_list:typing.List,
                                      scale_std:float=1, 
                                      agglomeration:str="mean",
                                      step:bool=False,
+                                     ax=None,
                                      ):
     '''
         plot performance over time
@@ -35,6 +37,7 @@ def plot_optimization_trace_mult_exp(time_list:typing.List,
             for each system (in name_list) T time stamps (on x)
         performance_list: typing.List[np.ndarray TxN]
             for each system (in name_list) an array of size T x N where N is the number of repeated runs of the system
+            or a plottingscripts.utils.summary.Summary (then the time stamps of the Summary are used)
         name_list: typing.List[str]
              names of all systems -- order has to be the same as in performance_list and time_list
         title: str
@@ -46,7 +49,8 @@ def plot_optimization_trace_mult_exp(time_list:typing.List,
         properties: typing.Mapping
             possible fields: "linestyles", "colors", "markers", "markersize", "labelfontsize", "linewidth", "titlefontsize", 
                              "gridcolor", "gridalpha", "dpi", "legendsize", "legendlocation", "ticklabelsize", 
-                             "drawstyle", "incheswidth", "inchesheight", "loweryloglimit"
+                             "drawstyle", "incheswidth", "inchesheight", "loweryloglimit", "resample"
+            > To draw at most M points per line, set resample=M (log-spaced if logx)
             > To turn off the legend, set legendlocation='None'
         y_min:float   
             y min value
@@ -63,9 +67,17 @@ def plot_optimization_trace_mult_exp(time_list:typing.List,
         scale_std: float
             scale of std (only used with agglomeration=="mean")
         agglomeration: str
-            aggreation over repeated runs (either mean or median)
+            aggreation over repeated runs (either mean or median), see
+            summary.aggregate for the bands; bootstrapci and
+            bootstrapcimedian need the runs, not a Summary
         step: bool
             plot as step function (True) or with linear interpolation (False)
+        ax: matplotlib.axes.Axes
+            draw into this axes (then title is the title of the axes) instead
+            of into a new Figure; pyplot is never used, so several plots can
+            be drawn at the same time in different threads
+
+        Returns the matplotlib.figure.Figure drawn into
     '''
     
 
@@ -80,74 +92,85 @@ def plot_optimization_trace_mult_exp(time_list:typing.List,
     #print(properties)
 
     # Set up figure
-    ratio = 5
-    gs = matplotlib.gridspec.GridSpec(ratio, 1)
-    fig = figure(1, dpi=int(properties['dpi']))
-    fig.set_size_inches(properties["incheswidth"], properties["inchesheight"])
-
-    ax1 = subplot(gs[0:ratio, :])
+    if ax is None:
+        ratio = 5
+        fig = Figure(dpi=int(properties['dpi']))
+        fig.set_size_inches(properties["incheswidth"],
+                            properties["inchesheight"])
+        gs = matplotlib.gridspec.GridSpec(ratio, 1, figure=fig)
+        ax1 = fig.add_subplot(gs[0:ratio, :])
+        if title is not None:
+            fig.suptitle(title, fontsize=int(properties["titlefontsize"]))
+    else:
+        ax1 = ax
+        fig = ax.figure
+        if title is not None:
+            ax1.set_title(title, fontsize=int(properties["titlefontsize"]))
     ax1.grid(True, linestyle='-', which='major', color=properties["gridcolor"],
              alpha=float(properties["gridalpha"]))
 
-    if title is not None:
-        fig.suptitle(title, fontsize=int(properties["titlefontsize"]))
-
     auto_y_min = 2**64
     auto_y_max = -plottingscripts.utils.macros.MAXINT
     auto_x_min = 2**64
     auto_x_max = -2**64
 
     for idx, performance in enumerate(performance_list):
-        performance = np.array(performance)
         color = next(properties["colors"])
         marker = next(properties["markers"])
         linestyle = next(properties["linestyles"])
         name_list[idx] = name_list[idx].replace("_", " ")
 
-        if logx and time_list[idx][0] == 0:
-            time_list[idx][0] = 10**-1
-        #print("Plot %s" % agglomeration)
-        if agglomeration == "mean":
-            m = np.mean(performance, axis=0)
-            lower = m - np.std(performance, axis=0)*scale_std
-            upper = m + np.std(performance, axis=0)*scale_std
-        elif agglomeration == "meanstderr":
-            m = np.mean(performance, axis=0)
-            lower = m - (np.std(performance, axis=0) / np.sqrt(performance.shape[0]))
-            upper = m + (np.std(performance, axis=0) / np.sqrt(performance.shape[0]))
-        elif agglomeration == "median":
-            m = np.median(performance, axis=0)
-            lower = np.percentile(performance, axis=0, q=25)
-            upper = np.percentile(performance, axis=0, q=75)
+        if isinstance(performance, summary.Summary):
+            times = performance.times
+            num_runs = performance.num_runs
         else:
-            raise ValueError("Unknown agglomeration: %s" % agglomeration)
+            performance = np.asarray(performance)
+            times = np.asarray(time_list[idx])
+            num_runs = len(performance)
 
-        if logy:
-            lower[lower < properties["loweryloglimit"]] = properties["loweryloglimit"]
-            upper[upper < properties["loweryloglimit"]] = properties["loweryloglimit"]
-            m[m < properties["loweryloglimit"]] = properties["loweryloglimit"]
+        # Only keep as many points as can be seen (properties["resample"])
+        times, m, lower, upper = summary.compute_curve(
+            times, performance, agglomeration=agglomeration,
+            scale_std=scale_std, num_points=properties["resample"], log=logx)
 
+        if logx and times[0] == 0:
+            # Do not modify the (possibly shared) time array of the caller
+            times = np.array(times, dtype=np.float64)
+            times[0] = 10**-1
 
+        if logy:
+            lower = np.maximum(lower, properties["loweryloglimit"])
+            upper = np.maximum(upper, properties["loweryloglimit"])
+            m = np.maximum(m, properties["loweryloglimit"])
 
         # Plot m and fill between lower and upper
-        if scale_std >= 0 and len(performance) > 1:
-            ax1.fill_between(time_list[idx], lower, upper, facecolor=color,
-                             alpha=0.3, edgecolor=color, 
+        # Points in the middle of flat segments do not change the plot, so do
+        # not hand them to matplotlib (unless they have a marker)
+        if scale_std >= 0 and num_runs > 1:
+            fill_times, fill_lower, fill_upper = \
+                mdt.compress_flat_segments(times, lower, upper)
+            ax1.fill_between(fill_times, fill_lower, fill_upper,
+                             facecolor=color, alpha=0.3, edgecolor=color,
                              step="post" if step else None
                              )
+        line_times, line_m = times, m
+        if marker in (None, "", " ", "None", "none"):
+            line_times, line_m = mdt.compress_flat_segments(times, m)
         if step:
-            ax1.step(time_list[idx], m, color=color,
-                 linewidth=int(properties["linewidth"]), linestyle=linestyle,
-                 marker=marker, markersize=int(properties["markersize"]),
+            ax1.step(line_times, line_m, color=color,
+                 linewidth=float(properties["linewidth"]),
+                 linestyle=linestyle,
+                 marker=marker, markersize=float(properties["markersize"]),
                  label=name_list[idx],
                  where="post",
                  **properties.get("plot_args", {})
                  )
 
         else:    
-            ax1.plot(time_list[idx], m, color=color,
-                 linewidth=int(properties["linewidth"]), linestyle=linestyle,
-                 marker=marker, markersize=int(properties["markersize"]),
+            ax1.plot(line_times, line_m, color=color,
+                 linewidth=float(properties["linewidth"]),
+                 linestyle=linestyle,
+                 marker=marker, markersize=float(properties["markersize"]),
                  label=name_list[idx], drawstyle=properties["drawstyle"],
                  **properties.get("plot_args", {})
                  )
@@ -156,16 +179,14 @@ def plot_optimization_trace_mult_exp(time_list:typing.List,
         # find out show from for this time_list
         show_from = 0
         if x_min is not None:
-            for t_idx, t in enumerate(time_list[idx]):
-                if t > x_min:
-                    show_from = t_idx
-                    break
+            show_from = plot_util.index_after(times, x_min)
 
-        auto_y_min = min(min(lower[show_from:]), auto_y_min)
-        auto_y_max = max(max(upper[show_from:]), auto_y_max)
+        y_lo, y_hi = plot_util.value_range(lower, upper, start=show_from)
+        auto_y_min = min(y_lo, auto_y_min)
+        auto_y_max = max(y_hi, auto_y_max)
 
-        auto_x_min = min(time_list[idx][0], auto_x_min)
-        auto_x_max = max(time_list[idx][-1], auto_x_max)
+        auto_x_min = min(times[0], auto_x_min)
+        auto_x_max = max(times[-1], auto_x_max)
 
     # Describe axes
     if logy:
@@ -185,8 +206,8 @@ def plot_optimization_trace_mult_exp(time_list:typing.List,
                          )
         leg.get_frame().set_alpha(0.5)
 
-    tick_params(axis='both', which='major',
-                labelsize=properties["ticklabelsize"])
+    ax1.tick_params(axis='both', which='major',
+                    labelsize=properties["ticklabelsize"])
 
     # Set axes limits
     if y_max is None and y_min is not None:
@@ -210,3 +231,139 @@ def plot_optimization_trace_mult_exp(time_list:typing.List,
                       auto_x_max + 0.1*abs(auto_x_min - auto_x_max)])
 
     return fig
+
+
+def plot_small_multiples(time_lists:typing.List,
+                         performance_lists:typing.List,
+                         name_lists:typing.List,
+                         panel_titles:typing.List[str],
+                         title:str=None,
+                         ncols:int=None,
+                         sharex:bool=True,
+                         sharey:bool=False,
+                         properties:typing.Mapping=None,
+                         xlabel:str="time [sec]",
+                         ylabel:str="Performance",
+                         **kwargs):
+    '''
+        plot performance over time for several datasets, one panel per
+        dataset, into one figure
+
+        Arguments
+        ---------
+        time_lists, performance_lists, name_lists: typing.List
+            for each panel the time_list, performance_list and name_list as
+            passed to plot_optimization_trace_mult_exp
+        panel_titles: typing.List[str]
+            title of each panel, e.g. the dataset
+        title: str
+            title of the figure
+        ncols: int
+            number of panels per row (default: ceil(sqrt(#panels)))
+        sharex, sharey: bool
+            share the x-/y-axis between all panels
+        properties: typing.Mapping
+            see plot_optimization_trace_mult_exp; each panel is half
+            incheswidth x inchesheight, a system has the same color, marker
+            and linestyle in all panels and there is one legend below all
+            panels
+        kwargs:
+            passed to plot_optimization_trace_mult_exp
+
+        Returns the matplotlib.figure.Figure drawn into
+    '''
+    if properties is None:
+        properties = dict()
+    properties = plot_util.fill_with_defaults(dict(properties))
+
+    num_panels = len(performance_lists)
+    if ncols is None:
+        ncols = int(np.ceil(np.sqrt(num_panels)))
+    ncols = max(1, min(int(ncols), num_panels))
+    nrows = int(np.ceil(num_panels / float(ncols)))
+
+    fig = Figure(dpi=int(properties['dpi']))
+    fig.set_size_inches(properties["incheswidth"] * ncols / 2.,
+                        properties["inchesheight"] * nrows / 2.)
+    axes = fig.subplots(nrows, ncols, sharex=sharex, sharey=sharey,
+                        squeeze=False)
+
+    # Same style for a system in every panel
+    styles = dict()
+    for name_list in name_lists:
+        for name in name_list:
+            if name not in styles:
+                styles[name] = (next(properties["colors"]),
+                                next(properties["markers"]),
+                                next(properties["linestyles"]))
+
+    # Limits each panel would choose for itself, shared axes get the union
+    xlims = list()
+    ylims = list()
+    for idx in range(nrows * ncols):
+        row, col = divmod(idx, ncols)
+        ax = axes[row, col]
+        if idx >= num_panels:
+            fig.delaxes(ax)
+            # The panel above now is the lowest one in its column
+            if row > 0:
+                axes[row - 1, col].xaxis.set_tick_params(labelbottom=True)
+            continue
+        name_list = list(name_lists[idx])
+        panel_properties = dict(properties)
+        for key, pos in (("colors", 0), ("markers", 1), ("linestyles", 2)):
+            panel_properties[key] = iter([styles[n][pos] for n in name_list])
+        panel_properties["legendlocation"] = "None"
+        is_bottom = idx + ncols >= num_panels
+        plot_optimization_trace_mult_exp(
+            time_list=time_lists[idx], performance_list=performance_lists[idx],
+            name_list=name_list, title=panel_titles[idx],
+            properties=panel_properties,
+            xlabel=xlabel if is_bottom else "",
+            ylabel=ylabel if col == 0 else "", ax=ax, **kwargs)
+        xlims.append(ax.get_xlim())
+        ylims.append(ax.get_ylim())
+
+    # Every panel set the limits of the shared axes to its own, so the last
+    # panel would decide for all of them
+    if sharex:
+        axes[0, 0].set_xlim(min(lo for lo, _ in xlims),
+                            max(hi for _, hi in xlims))
+    if sharey:
+        axes[0, 0].set_ylim(min(lo for lo, _ in ylims),
+                            max(hi for _, hi in ylims))
+
+    if title is not None:
+        fig.suptitle(title, fontsize=int(properties["titlefontsize"]))
+
+    if properties["legendlocation"] != "None":
+        handles = dict()
+        for ax in fig.axes:
+            for handle, label in zip(*ax.get_legend_handles_labels()):
+                handles.setdefault(label, handle)
+        leg = fig.legend(list(handles.values()), list(handles.keys()),
+                         loc="upper center", bbox_to_anchor=(0.5, 0),
+                         ncol=min(len(handles), 4), fancybox=True,
+                         prop={'size': int(properties["legendsize"])},
+                         **properties.get("legend_args", {}))
+        leg.get_frame().set_alpha(0.5)
+    return fig
+
+
+def plot_run_sets(run_sets:typing.List, column:str="test", **kwargs):
+    '''
+        plot performance over time for experiments stored as RunSets
+
+        Arguments
+        ---------
+        run_sets: typing.List[plottingscripts.utils.experiment.RunSet]
+            one RunSet per system
+        column: str
+            which column of the RunSets to plot, e.g. "train" or "test"
+        kwargs:
+            passed to plot_optimization_trace_mult_exp
+    '''
+    return plot_optimization_trace_mult_exp(
+        time_list=[r.times for r in run_sets],
+        performance_list=[r.column(column) for r in run_sets],
+        name_list=[r.name for r in run_sets], **kwargs)
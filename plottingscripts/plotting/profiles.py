@@ -0,0 +1,97 @@
+import typing
+
+from matplotlib.figure import Figure
+import numpy as np
+
+import plottingscripts.utils.plot_util as plot_util
+
+
+def plot_cumulative_distributions(x:np.ndarray,
+                                  fractions:np.ndarray,
+                                  name_list:typing.List[str],
+                                  title:str=None,
+                                  logx:bool=False,
+                                  properties:typing.Mapping=None,
+                                  x_min:float=None,
+                                  x_max:float=None,
+                                  xlabel:str="performance ratio",
+                                  ylabel:str="fraction of instances",
+                                  ax=None,
+                                  ):
+    '''
+        plot cumulative distributions over instances, e.g. performance
+        profiles or runtime ECDFs (see utils.profile_util), as step functions
+
+        Arguments
+        ---------
+        x: np.ndarray K
+            thresholds (on x), sorted
+        fractions: np.ndarray S x K
+            for each system (in name_list) the fraction of instances at each
+            threshold
+        name_list: typing.List[str]
+            names of all systems -- order has to be the same as in fractions
+        title: str
+            title of the plot
+        logx: bool
+            x on log-scale
+        properties: typing.Mapping
+            see plot_methods.plot_optimization_trace_mult_exp
+        x_min:float
+            x min value
+        x_max:float
+            x max value
+        ax: matplotlib.axes.Axes
+            draw into this axes instead of into a new Figure
+
+        Returns the matplotlib.figure.Figure drawn into
+    '''
+    if properties is None:
+        properties = dict()
+    properties = plot_util.fill_with_defaults(properties)
+
+    if ax is None:
+        fig = Figure(dpi=int(properties['dpi']))
+        fig.set_size_inches(properties["incheswidth"],
+                            properties["inchesheight"])
+        ax1 = fig.add_subplot(1, 1, 1)
+        if title is not None:
+            fig.suptitle(title, fontsize=int(properties["titlefontsize"]))
+    else:
+        ax1 = ax
+        fig = ax.figure
+        if title is not None:
+            ax1.set_title(title, fontsize=int(properties["titlefontsize"]))
+    ax1.grid(True, linestyle='-', which='major', color=properties["gridcolor"],
+             alpha=float(properties["gridalpha"]))
+
+    x = np.asarray(x)
+    # Thresholds are dense, only mark a few of them
+    markevery = max(1, len(x) // 10)
+    for name, fraction in zip(name_list, fractions):
+        ax1.step(x, fraction, where="post", color=next(properties["colors"]),
+                 linewidth=float(properties["linewidth"]),
+                 linestyle=next(properties["linestyles"]),
+                 marker=next(properties["markers"]),
+                 markersize=float(properties["markersize"]),
+                 markevery=markevery, label=name.replace("_", " "),
+                 **properties.get("plot_args", {}))
+
+    if logx:
+        ax1.set_xscale("log")
+    ax1.set_xlabel(xlabel, fontsize=properties["labelfontsize"])
+    ax1.set_ylabel(ylabel, fontsize=properties["labelfontsize"])
+
+    if properties["legendlocation"] != "None":
+        leg = ax1.legend(loc=properties["legendlocation"], fancybox=True,
+                         prop={'size': int(properties["legendsize"])},
+                         **properties.get("legend_args", {}))
+        leg.get_frame().set_alpha(0.5)
+    ax1.tick_params(axis='both', which='major',
+                    labelsize=properties["ticklabelsize"])
+
+    ax1.set_ylim([0, 1.02])
+    if len(x) > 0:
+        ax1.set_xlim([x[0] if x_min is None else x_min,
+                      x[-1] if x_max is None else x_max])
+    return fig
@@ -0,0 +1,199 @@
+import os
+
+import numpy as np
+
+# read_util imports this module, so experiment (which imports read_util) is
+# only imported where needed
+
+# Parquet files and Arrow IPC (feather v2) files, needs pyarrow
+PARQUET_SUFFIXES = (".parquet", ".pq")
+IPC_SUFFIXES = (".arrow", ".feather", ".ipc")
+COLUMNAR_SUFFIXES = PARQUET_SUFFIXES + IPC_SUFFIXES
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Reading and writing Parquet/Arrow files needs the "
+                          "pyarrow package")
+    return pyarrow
+
+
+def is_columnar(fn):
+    return fn.endswith(COLUMNAR_SUFFIXES)
+
+
+def read_table(source, columns=None, filters=None):
+    """
+    Reads a Parquet file, a directory of (hive partitioned, e.g.
+    dataset=d1/strategy=smac/part-0.parquet) Parquet files or an Arrow IPC
+    file. Files are memory mapped and only columns are read.
+
+    filters: dict column -> value or list of values, only matching rows are
+             returned; partitions not matching are not read at all
+    """
+    pa = _import_pyarrow()
+    filters = filters or dict()
+    if os.path.isdir(source) or source.endswith(PARQUET_SUFFIXES):
+        pq_filters = [(key, "in", list(value)) if
+                      isinstance(value, (list, tuple)) else (key, "=", value)
+                      for key, value in filters.items()]
+        return pa.parquet.read_table(source, columns=columns,
+                                     filters=pq_filters or None,
+                                     memory_map=True)
+
+    with pa.memory_map(source) as fh:
+        table = pa.ipc.open_file(fh).read_all()
+    mask = None
+    for key, value in filters.items():
+        values = value if isinstance(value, (list, tuple)) else [value]
+        match = pa.compute.is_in(table.column(key),
+                                 value_set=pa.array(values))
+        mask = match if mask is None else pa.compute.and_(mask, match)
+    if mask is not None:
+        table = table.filter(mask)
+    if columns is not None:
+        table = table.select(columns)
+    return table
+
+
+def _column_to_numpy(column):
+    return column.to_numpy().astype(np.float64, copy=False)
+
+
+def read_array(fn, usecols=None):
+    """
+    Same as read_util.read_csv_array, but for a Parquet or Arrow IPC file
+    with one row per time step
+    """
+    pa = _import_pyarrow()
+    if fn.endswith(PARQUET_SUFFIXES):
+        header = pa.parquet.read_schema(fn, memory_map=True).names
+    else:
+        with pa.memory_map(fn) as fh:
+            header = pa.ipc.open_file(fh).schema.names
+    if usecols is None:
+        usecols = range(len(header))
+    header = [header[i] for i in usecols]
+    table = read_table(fn, columns=header)
+    if table.num_rows == 0:
+        return header, np.zeros((0, len(header)))
+    return header, np.column_stack([_column_to_numpy(table.column(name))
+                                    for name in header])
+
+
+def load_run_sets(source, dataset=None, strategy=None, by="strategy",
+                  columns=("train", "test"), **kwargs):
+    """
+    Same as experiment.load_run_sets, but for a table with one row per run
+    and time step and the columns dataset, strategy, seed, time and columns
+    (e.g. partitioned by dataset and strategy). Only rows matching dataset
+    and strategy (value or list of values) are read. Every combination of
+    dataset, strategy and seed is one run (named
+    "dataset=<d>/strategy=<s>/seed=<seed>"), runs are grouped into one
+    RunSet per value of by. kwargs are passed to
+    experiment.RunSet.from_arrays.
+    """
+    from plottingscripts.utils import experiment
+
+    filters = dict((key, value) for key, value in
+                   (("dataset", dataset), ("strategy", strategy))
+                   if value is not None)
+    keys = ("dataset", "strategy", "seed")
+    table = read_table(source, columns=list(keys) + ["time"] + list(columns),
+                       filters=filters)
+    # One run per dataset, strategy and seed, also if runs of different
+    # datasets or strategies share a seed
+    runs = np.array([list(map(str, table.column(key).to_pylist()))
+                     for key in keys], dtype=object).T.reshape(-1, 3)
+    names = runs[:, keys.index(by)]
+    run_ids = np.array(["dataset=%s/strategy=%s/seed=%s" % tuple(run)
+                        for run in runs], dtype=object)
+    data = np.column_stack([_column_to_numpy(table.column(c))
+                            for c in ["time"] + list(columns)])
+
+    run_sets = list()
+    for name in sorted(set(names)):
+        in_group = names == name
+        group_runs = sorted(set(run_ids[in_group]))
+        run_sets.append(experiment.RunSet.from_arrays(
+            name, group_runs, [data[run_ids == r] for r in group_runs],
+            columns=columns, **kwargs))
+    return run_sets
+
+
+def write_table(fn, batches):
+    """ Writes record batches to a Parquet or Arrow IPC file """
+    pa = _import_pyarrow()
+    # Batches are written one by one, they are never concatenated
+    if fn.endswith(PARQUET_SUFFIXES):
+        with pa.parquet.ParquetWriter(fn, batches[0].schema) as writer:
+            for batch in batches:
+                writer.write_table(pa.Table.from_batches([batch]))
+    elif fn.endswith(IPC_SUFFIXES):
+        with pa.OSFile(fn, "wb") as sink:
+            with pa.ipc.new_file(sink, batches[0].schema) as writer:
+                for batch in batches:
+                    writer.write_batch(batch)
+    else:
+        raise ValueError("Don't know how to write %s, use one of %s" %
+                         (fn, ", ".join(COLUMNAR_SUFFIXES)))
+
+
+def _batch(columns, dictionaries):
+    """
+    columns: list of (name, np.ndarray or str for a constant column)
+    dictionaries: name -> list of all values of a constant column, shared by
+                  all batches of a file
+    """
+    pa = _import_pyarrow()
+    length = max(len(value) for _, value in columns
+                 if not isinstance(value, str))
+    arrays = list()
+    for name, value in columns:
+        if isinstance(value, str):
+            # Dictionary encoded, so the string is only stored once
+            index = dictionaries[name].index(value)
+            value = pa.DictionaryArray.from_arrays(
+                pa.array(np.full(length, index, dtype=np.int32)),
+                pa.array(dictionaries[name], type=pa.string()))
+        else:
+            # Zero-copy for contiguous float arrays
+            value = pa.array(np.ascontiguousarray(value, dtype=np.float64))
+        arrays.append(value)
+    return pa.RecordBatch.from_arrays(arrays, [name for name, _ in columns])
+
+
+def write_curves(fn, curves):
+    """
+    Writes curves (see export_util.compute_curves), one batch per experiment
+    with the columns name, time, m, lower, upper
+    """
+    batches = list()
+    for name, (times, m, lower, upper) in curves.items():
+        batches.append(_batch([("name", name), ("time", times), ("m", m),
+                               ("lower", lower), ("upper", upper)],
+                              {"name": list(curves)}))
+    write_table(fn, batches)
+
+
+def write_ranking(fn, estimator_list, dataset_list, times, ranking_list):
+    """
+    Writes average ranks (one batch per estimator and dataset with the
+    columns estimator, dataset, time, rank)
+
+    ranking_list: for each estimator a list with one ranking per dataset
+    """
+    batches = list()
+    for estimator, rankings in zip(estimator_list, ranking_list):
+        for dataset, ranking in zip(dataset_list, rankings):
+            batches.append(_batch([("estimator", estimator),
+                                   ("dataset", dataset), ("time", times),
+                                   ("rank", ranking)],
+                                  {"estimator": list(estimator_list),
+                                   "dataset": list(dataset_list)}))
+    write_table(fn, batches)
@@ -0,0 +1,197 @@
+import numpy as np
+
+from plottingscripts.utils import read_util
+import plottingscripts.utils.merge_test_performance_different_times as mdt
+
+
+# Columns of a *ClassicValidationResults*.csv file
+CLASSIC_VALIDATION_COLUMNS = {"time": 0, "train": 1, "test": 2, "overhead": 3}
+
+
+class RunSet(object):
+    """
+    All repeated runs of one experiment on a shared time grid.
+
+    The values of all runs are stored in one contiguous array of shape
+    (num_columns, num_runs, num_times), so that e.g. run_set.test is a
+    num_runs x num_times view which can directly be passed to plot_methods.
+
+    name: str
+        name of the experiment
+    times: np.ndarray T
+        time stamps shared by all runs
+    values: np.ndarray C x N x T
+        for each column an array with one row per run
+    columns: typing.List[str]
+        names of the C columns
+    metadata: dict
+        anything else, e.g. the files the runs were read from
+    dtype: np.dtype
+        dtype of values, e.g. np.float32 to halve the memory; times are
+        always np.float64
+    """
+    __slots__ = ("name", "times", "values", "columns", "metadata")
+
+    def __init__(self, name, times, values, columns, metadata=None,
+                 dtype=np.float64):
+        self.name = name
+        self.times = np.ascontiguousarray(times, dtype=np.float64)
+        self.values = np.ascontiguousarray(values, dtype=dtype)
+        self.columns = list(columns)
+        self.metadata = dict() if metadata is None else metadata
+
+        if self.values.ndim != 3:
+            raise ValueError("values need to be of shape C x N x T, not %s" %
+                             str(self.values.shape))
+        if self.values.shape[0] != len(self.columns):
+            raise ValueError("Found %d columns, but %d names" %
+                             (self.values.shape[0], len(self.columns)))
+        if self.values.shape[2] != self.times.shape[0]:
+            raise ValueError("Found %d time stamps, but %d values per run" %
+                             (self.times.shape[0], self.values.shape[2]))
+
+    @property
+    def num_runs(self):
+        return self.values.shape[1]
+
+    def column(self, name):
+        """ Returns a N x T view on the values of column name """
+        return self.values[self.columns.index(name)]
+
+    @property
+    def train(self):
+        return self.column("train")
+
+    @property
+    def test(self):
+        return self.column("test")
+
+    @property
+    def overhead(self):
+        return self.column("overhead")
+
+    def reindex(self, grid, fill_value=np.NaN):
+        """
+        Returns a RunSet with the values forward-filled onto the time stamps
+        in grid; before the first time stamp values are fill_value
+        """
+        grid = np.asarray(grid, dtype=np.float64)
+        idx = mdt.ffill_index(self.times, grid)
+        values = self.values[:, :, idx]
+        values[:, :, idx < 0] = fill_value
+        return RunSet(name=self.name, times=grid, values=values,
+                      columns=self.columns, metadata=self.metadata,
+                      dtype=self.values.dtype)
+
+    @classmethod
+    def from_files(cls, name, files, columns=("train", "test"),
+                   column_idx=CLASSIC_VALIDATION_COLUMNS, maxvalue=None,
+                   align=False, num_points=None, log=True, num_workers=8,
+                   dtype=np.float64):
+        """
+        Reads one run per file.
+
+        name: str
+            name of the experiment
+        files: typing.List[str]
+            csv files, one per run
+        columns: typing.List[str]
+            columns to read
+        column_idx: typing.Mapping
+            column name -> position in the csv file, needs a "time" entry
+        maxvalue: float
+            replace all values higher than this
+        align: bool
+            if the runs do not use the same time stamps, forward-fill them
+            onto the union of all time stamps instead of raising an error;
+            before its first time stamp a run has value maxvalue
+        num_points: int
+            align all runs on this many time stamps instead of on the union
+            of all time stamps (implies align)
+        log: bool
+            whether the num_points time stamps are log- or linearly spaced
+        num_workers: int
+            number of files read in parallel, see read_util.prefetch
+        dtype: np.dtype
+            dtype of the values, see RunSet
+        """
+        usecols = [column_idx["time"]] + [column_idx[c] for c in columns]
+        data_list = [data for _header, data in read_util.prefetch(
+            files, num_workers=num_workers, usecols=usecols)]
+        return cls.from_arrays(name, files, data_list, columns=columns,
+                               maxvalue=maxvalue, align=align,
+                               num_points=num_points, log=log, dtype=dtype)
+
+    @classmethod
+    def from_arrays(cls, name, files, data_list, columns=("train", "test"),
+                    maxvalue=None, align=False, num_points=None, log=True,
+                    dtype=np.float64):
+        """
+        Same as from_files, but for already read data; data_list holds one
+        array per run with the time in the first column followed by columns
+        """
+        time_list = [data[:, 0] for data in data_list]
+
+        same_times = all(np.array_equal(time_list[0], t)
+                         for t in time_list[1:])
+        if same_times and num_points is None:
+            times = time_list[0]
+            values = np.empty((len(columns), len(files), len(times)),
+                              dtype=dtype)
+            for run, data in enumerate(data_list):
+                values[:, run, :] = data[:, 1:].T
+        elif align or num_points is not None:
+            times = mdt.get_time_grid(time_list, num_points=num_points,
+                                      log=log)
+            values = np.empty((len(columns), len(files), len(times)),
+                              dtype=dtype)
+            for run, data in enumerate(data_list):
+                if len(data) == 0:
+                    # Empty file, the run never started
+                    values[:, run, :] = np.NaN if maxvalue is None \
+                        else maxvalue
+                    continue
+                order = np.argsort(data[:, 0], kind="mergesort")
+                idx = mdt.ffill_index(data[order, 0], times)
+                values[:, run, :] = data[order][idx, 1:].T
+                values[:, run, idx < 0] = np.NaN if maxvalue is None \
+                    else maxvalue
+        else:
+            raise NotImplementedError("%s are not using the same times" %
+                                      ", ".join(files))
+
+        if maxvalue is not None:
+            np.minimum(values, maxvalue, out=values)
+        return cls(name=name, times=times, values=values, columns=columns,
+                   metadata={"files": list(files)}, dtype=dtype)
+
+
+def load_run_sets(file_list, name_list, **kwargs):
+    """
+    Reads one RunSet per experiment, file_list and name_list are the output
+    of read_util.get_file_and_name_list; kwargs are passed to
+    RunSet.from_files
+    """
+    num_workers = kwargs.pop("num_workers", 8)
+    columns = kwargs.get("columns", ("train", "test"))
+    column_idx = kwargs.pop("column_idx", CLASSIC_VALIDATION_COLUMNS)
+    usecols = [column_idx["time"]] + [column_idx[c] for c in columns]
+    # Files of later experiments are already read while the earlier ones are
+    # merged
+    data_lists = read_util.prefetch_file_list(file_list,
+                                              num_workers=num_workers,
+                                              usecols=usecols)
+    return [RunSet.from_arrays(name, files, [d for _h, d in data_list],
+                               **kwargs)
+            for name, files, data_list in zip(name_list, file_list,
+                                              data_lists)]
+
+
+def align_run_sets(run_sets, num_points=None, log=True, fill_value=np.NaN):
+    """
+    Forward-fills all RunSets onto one shared time grid, see
+    merge_test_performance_different_times.get_time_grid
+    """
+    grid = mdt.get_time_grid([r.times for r in run_sets],
+                             num_points=num_points, log=log)
+    return [r.reindex(grid, fill_value=fill_value) for r in run_sets]
@@ -0,0 +1,144 @@
+from collections import OrderedDict
+import csv
+import json
+
+import numpy as np
+
+from plottingscripts.utils import arrow_util, summary
+
+# Does not import matplotlib, so exporting never pays for setting up pyplot
+
+CURVE_FIELDS = ("time", "m", "lower", "upper")
+
+
+def add_export_arguments(parser, what="plotted curves"):
+    """ Adds --export and --data-only (writing what) to an ArgumentParser """
+    parser.add_argument("--export", dest="export", default=None,
+                        help="Also write the %s to this file (.csv, .npz, "
+                             ".json, .parquet or .arrow)" % what)
+    parser.add_argument("--data-only", dest="data_only", default=False,
+                        action="store_true",
+                        help="Only write them to --export, do not plot")
+
+
+def compute_curves(name_list, time_list, performance_list,
+                   agglomeration="mean", scale_std=1, num_points=None,
+                   log=False):
+    """
+    Computes the curves plot_methods.plot_optimization_trace_mult_exp draws,
+    arguments are the same
+
+    :returns: OrderedDict -- name -> (time, m, lower, upper)
+    """
+    curves = OrderedDict()
+    for name, times, performance in zip(name_list, time_list,
+                                        performance_list):
+        curves[name] = summary.compute_curve(
+            times, performance, agglomeration=agglomeration,
+            scale_std=scale_std, num_points=num_points, log=log)
+    return curves
+
+
+def compute_run_set_curves(run_sets, column="test", **kwargs):
+    """ Same as compute_curves, but for RunSets (see plot_run_sets) """
+    return compute_curves([r.name for r in run_sets],
+                          [r.times for r in run_sets],
+                          [r.column(column) for r in run_sets], **kwargs)
+
+
+def write_curves(fn, curves):
+    """
+    Writes curves (see compute_curves) to fn, the format is chosen by the
+    suffix:
+        .csv: one row per experiment and time step
+        .npz: arrays <name>/time, <name>/m, <name>/lower, <name>/upper
+        .json: {name: {"time": [...], "m": [...], ...}}
+        .parquet, .arrow, .feather: see arrow_util.write_curves
+    """
+    if arrow_util.is_columnar(fn):
+        arrow_util.write_curves(fn, curves)
+    elif fn.endswith(".csv"):
+        with open(fn, "w") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(("name", ) + CURVE_FIELDS)
+            for name, curve in curves.items():
+                for row in zip(*curve):
+                    writer.writerow((name, ) + tuple(repr(float(v))
+                                                     for v in row))
+    elif fn.endswith(".npz"):
+        np.savez(fn, **dict(("%s/%s" % (name, field), np.asarray(values))
+                            for name, curve in curves.items()
+                            for field, values in zip(CURVE_FIELDS, curve)))
+    elif fn.endswith(".json"):
+        with open(fn, "w") as fh:
+            json.dump(OrderedDict(
+                (name, OrderedDict(
+                    (field, np.asarray(values, dtype=np.float64).tolist())
+                    for field, values in zip(CURVE_FIELDS, curve)))
+                for name, curve in curves.items()), fh)
+    else:
+        raise ValueError("Don't know how to write %s, use .csv, .npz, .json "
+                         "or one of %s" %
+                         (fn, ", ".join(arrow_util.COLUMNAR_SUFFIXES)))
+
+
+def write_ranking(fn, estimator_list, dataset_list, times, ranking_list):
+    """
+    Writes the average rank of every estimator on every dataset to fn, the
+    format is chosen by the suffix (see write_curves); json files hold
+    {"time": [...], "rank": {estimator: {dataset: [...]}}}
+
+    ranking_list: for each estimator a list with one ranking per dataset
+    """
+    if arrow_util.is_columnar(fn):
+        arrow_util.write_ranking(fn, estimator_list, dataset_list, times,
+                                 ranking_list)
+    elif fn.endswith(".csv"):
+        with open(fn, "w") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(("estimator", "dataset", "time", "rank"))
+            for estimator, rankings in zip(estimator_list, ranking_list):
+                for dataset, ranking in zip(dataset_list, rankings):
+                    for t, r in zip(times, ranking):
+                        writer.writerow((estimator, dataset, repr(float(t)),
+                                         repr(float(r))))
+    elif fn.endswith(".npz"):
+        np.savez(fn, estimators=np.array(estimator_list),
+                 datasets=np.array(dataset_list), time=np.asarray(times),
+                 rank=np.asarray(ranking_list, dtype=np.float64))
+    elif fn.endswith(".json"):
+        ranks = OrderedDict(
+            (estimator, OrderedDict(
+                (dataset, np.asarray(ranking, dtype=np.float64).tolist())
+                for dataset, ranking in zip(dataset_list, rankings)))
+            for estimator, rankings in zip(estimator_list, ranking_list))
+        with open(fn, "w") as fh:
+            json.dump(OrderedDict(
+                (("time", np.asarray(times, dtype=np.float64).tolist()),
+                 ("rank", ranks))), fh)
+    else:
+        raise ValueError("Don't know how to write %s, use .csv, .npz, .json "
+                         "or one of %s" %
+                         (fn, ", ".join(arrow_util.COLUMNAR_SUFFIXES)))
+
+
+def write_correlations(fn, report):
+    """
+    Writes a correlation report (see rank_util.correlation_report) to fn,
+    the format is chosen by the suffix:
+        .csv: one row per group
+        .json: {name: {"n": ..., "spearman": ..., ...}}
+    """
+    if fn.endswith(".csv"):
+        fields = list(next(iter(report.values()), dict()))
+        with open(fn, "w") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(["name"] + fields)
+            for name, row in report.items():
+                writer.writerow([name] + [repr(row[f]) for f in fields])
+    elif fn.endswith(".json"):
+        with open(fn, "w") as fh:
+            # nan is written as NaN, which json.load reads back
+            json.dump(report, fh)
+    else:
+        raise ValueError("Don't know how to write %s, use .csv or .json" % fn)
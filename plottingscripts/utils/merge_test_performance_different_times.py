@@ -32,4 +32,117 @@ def fill_trajectory(performance_list, time_list, replace_nan=np.NaN):
                          "numbers in the list\n"
                          "\t(d) any other reason.")
 
-    return performance, time_
\ No newline at end of file
+    return performance, time_
+
+
+def get_time_grid(time_list, num_points=None, log=True):
+    """
+    Returns the time stamps to align trajectories on. If num_points is None
+    this is the union of all time stamps, otherwise num_points log- or
+    linearly spaced time stamps between the first and the last time stamp.
+    """
+    if num_points is None:
+        return np.unique(np.concatenate([np.asarray(t, dtype=np.float64)
+                                         for t in time_list]))
+    t_min = min(np.min(t) for t in time_list if len(t) > 0)
+    t_max = max(np.max(t) for t in time_list if len(t) > 0)
+    if not log:
+        return np.linspace(t_min, t_max, num_points)
+    if t_min > 0:
+        return np.geomspace(t_min, t_max, num_points)
+    # A log-spaced grid can not start at 0, so start at the first time > 0
+    positive = [np.min(t[t > 0]) for t in map(np.asarray, time_list)
+                if np.any(t > 0)]
+    if len(positive) == 0:
+        return np.array([t_min])
+    grid = np.geomspace(min(positive), t_max, num_points - 1)
+    return np.concatenate(([t_min], grid))
+
+
+def ffill_index(time_, grid):
+    """
+    For each time stamp in grid returns the index of the last entry in
+    time_ (sorted) which is at or before it, -1 if there is none
+    """
+    return np.searchsorted(time_, grid, side="right") - 1
+
+
+def align_trajectories(performance_list, time_list, grid=None,
+                       replace_nan=np.NaN, dtype=np.float64):
+    """
+    Same as fill_trajectory, but without building a DataFrame: every
+    trajectory is forward-filled onto grid (default: union of all time
+    stamps) with one searchsorted call. The returned performance is of
+    dtype (e.g. np.float32 to halve the memory).
+
+    :returns: performance, grid -- array of shape len(grid) x
+              len(performance_list) and the time stamps
+    """
+    if grid is None:
+        grid = get_time_grid(time_list)
+    grid = np.asarray(grid, dtype=np.float64)
+
+    performance = np.empty((len(grid), len(performance_list)), dtype=dtype)
+    for c, (p, t) in enumerate(zip(performance_list, time_list)):
+        if len(p) != len(t):
+            raise ValueError("(%d) Array length mismatch: %d != %d" %
+                             (c, len(p), len(t)))
+        p = np.asarray(p)
+        t = np.asarray(t, dtype=np.float64)
+        if len(t) == 0:
+            performance[:, c] = replace_nan
+            continue
+        order = np.argsort(t, kind="mergesort")
+        idx = ffill_index(t[order], grid)
+        performance[:, c] = p[order][idx]
+        performance[idx < 0, c] = replace_nan
+
+    if not np.isfinite(performance).all():
+        raise ValueError("\nCould not align lists, because \n"
+                         "\t(a) one list is empty?\n"
+                         "\t(b) the lists do not start with the same times and"
+                         " replace_nan is not set?\n"
+                         "\t(c) replace_nan is not set and there are non valid "
+                         "numbers in the list\n"
+                         "\t(d) any other reason.")
+    return performance, grid
+
+
+def resample_trajectory(time_, performance, num_points, log=True):
+    """
+    Projects a step trajectory onto at most num_points log- or linearly
+    spaced time stamps; each new point gets the value at or before it.
+
+    time_: np.ndarray T
+    performance: np.ndarray ... x T
+    :returns: time_, performance -- on the new grid, unchanged if there are
+              not more than num_points time stamps
+    """
+    time_ = np.asarray(time_)
+    performance = np.asarray(performance)
+    if len(time_) <= num_points:
+        return time_, performance
+    grid = get_time_grid([time_], num_points=num_points, log=log)
+    idx = ffill_index(time_, grid)
+    return grid, performance[..., idx]
+
+
+def compress_flat_segments(time_, *lines):
+    """
+    Removes all points lying in the middle of a flat segment, i.e. points
+    with the same value as their left and right neighbour in every line.
+    Whether the lines are drawn as steps or with linear interpolation, this
+    does not change what is drawn.
+
+    :returns: time_, *lines -- without the removed points
+    """
+    time_ = np.asarray(time_)
+    lines = [np.asarray(line) for line in lines]
+    keep = np.zeros(len(time_), dtype=bool)
+    if len(keep) > 0:
+        keep[[0, -1]] = True
+    for line in lines:
+        change = line[1:] != line[:-1]
+        keep[1:] |= change
+        keep[:-1] |= change
+    return (time_[keep], ) + tuple(line[keep] for line in lines)
@@ -1,4 +1,26 @@
 import itertools
+import os
+
+import numpy as np
+
+# Named style profiles (matplotlib style sheets), see use_style
+STYLE_DIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "styles")
+STYLE_SUFFIX = ".mplstyle"
+
+# rcParam of a style sheet -> key of get_defaults it overrides
+STYLE_PROPERTIES = (("axes.labelsize", "labelfontsize"),
+                    ("figure.titlesize", "titlefontsize"),
+                    ("legend.fontsize", "legendsize"),
+                    ("xtick.labelsize", "ticklabelsize"),
+                    ("lines.linewidth", "linewidth"),
+                    ("lines.markersize", "markersize"),
+                    ("grid.color", "gridcolor"),
+                    ("grid.alpha", "gridalpha"),
+                    ("figure.dpi", "dpi"))
+
+_STYLE_CACHE = dict()
+_active_style = None
 
 
 def get_empty_iterator():
@@ -37,7 +59,51 @@ def get_plot_colors():
                             ])
 
 
-def get_defaults():
+def get_style_names():
+    return sorted(fn[:-len(STYLE_SUFFIX)] for fn in os.listdir(STYLE_DIR)
+                  if fn.endswith(STYLE_SUFFIX))
+
+
+def load_style(name):
+    """
+    Returns the rcParams of the style profile name (one of get_style_names()
+    or the path of a style sheet); every style sheet is only parsed once
+    """
+    if name not in _STYLE_CACHE:
+        import matplotlib
+        fn = name
+        if not os.path.isfile(fn):
+            fn = os.path.join(STYLE_DIR, name + STYLE_SUFFIX)
+        if not os.path.isfile(fn):
+            raise ValueError("Unknown style %s, use one of %s or a style "
+                             "sheet" % (name, ", ".join(get_style_names())))
+        _STYLE_CACHE[name] = dict(matplotlib.rc_params_from_file(
+            fn, use_default_template=False))
+    return _STYLE_CACHE[name]
+
+
+def use_style(name=None, usetex=False):
+    """
+    Applies the style profile name (None: keep the current rcParams) to
+    matplotlib. Math is rendered with mathtext unless usetex, which runs
+    LaTeX for every new label (rendered labels are kept in matplotlib's
+    tex.cache). Applying the active style again does nothing.
+    """
+    global _active_style
+    if _active_style == (name, usetex):
+        return
+    import matplotlib
+    if name is not None:
+        matplotlib.rcParams.update(load_style(name))
+    matplotlib.rcParams["text.usetex"] = usetex
+    _active_style = (name, usetex)
+
+
+def get_defaults(style=None):
+    """
+    style: name of a style profile (see load_style), its font sizes, line
+           widths, grid and figure size replace the defaults
+    """
     default = {"linestyles": get_single_linestyle(),
                "colors": get_plot_colors(),
                "markers": get_plot_markers(),
@@ -54,13 +120,22 @@ def get_defaults():
                "drawstyle": "default",
                "incheswidth": 8.0,
                "inchesheight": 6.0,
-               "loweryloglimit": 10e-10
+               "loweryloglimit": 10e-10,
+               "resample": None
                }
+    if style is not None:
+        rc = load_style(style)
+        for rc_key, key in STYLE_PROPERTIES:
+            if rc_key in rc:
+                default[key] = rc[rc_key]
+        if "figure.figsize" in rc:
+            default["incheswidth"], default["inchesheight"] = \
+                rc["figure.figsize"]
     return default
 
 
-def fill_with_defaults(def_dict):
-    defaults = get_defaults()
+def fill_with_defaults(def_dict, style=None):
+    defaults = get_defaults(style=style)
     for key in defaults:
         if key not in def_dict:
             def_dict[key] = defaults[key]
@@ -71,8 +146,51 @@ def fill_with_defaults(def_dict):
     return def_dict
 
 
+def index_after(times, x):
+    """
+    Returns the index of the first time stamp in times (sorted) which is
+    greater than x, 0 if there is none
+    """
+    idx = int(np.searchsorted(times, x, side="right"))
+    return 0 if idx >= len(times) else idx
+
+
+def first_change(*lines):
+    """
+    Returns the first index at which any of the (equally long) lines differs
+    from its first value, the length of the lines if none does
+    """
+    lines = [np.asarray(line) for line in lines]
+    changed = np.zeros(len(lines[0]), dtype=bool)
+    for line in lines:
+        changed |= line != line[0]
+    return int(np.argmax(changed)) if changed.any() else len(changed)
+
+
+def value_range(lower, upper, start=0):
+    """
+    Returns the minimum of lower and the maximum of upper from index start
+    on, NaNs are ignored (inf, -inf if there are no values)
+    """
+    return (np.fmin.reduce(np.asarray(lower)[start:], initial=np.inf),
+            np.fmax.reduce(np.asarray(upper)[start:], initial=-np.inf))
+
+
 def save_plot(fig, save, dpi):
     fig.tight_layout()
     fig.savefig(save, dpi=dpi, facecolor='w', edgecolor='w',
                 orientation='portrait', papertype=None, format=None,
                 transparent=False, pad_inches=0.02, bbox_inches='tight')
+
+
+def show_plot(fig):
+    """
+    Shows a Figure which was not created by pyplot (as the ones returned by
+    plot_methods) in a window
+    """
+    import matplotlib.pyplot as plt
+    # Borrow the window of a new pyplot figure
+    manager = plt.figure().canvas.manager
+    manager.canvas.figure = fig
+    fig.set_canvas(manager.canvas)
+    plt.show()
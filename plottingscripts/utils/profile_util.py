@@ -0,0 +1,106 @@
+import numpy as np
+
+# Only needs numpy, so profiles of many instances can be computed without
+# setting up matplotlib
+
+
+def performance_ratios(performance, minvalue=None):
+    """
+    Dolan-More performance ratios: the performance of every solver on every
+    instance divided by the best performance on this instance
+
+    performance: np.ndarray N x S
+        performance (lower is better, e.g. runtime) of S solvers on N
+        instances, failed runs are nan or inf
+    minvalue: float
+        replace all values smaller than this, ratios to (almost) 0 are not
+        meaningful
+    :returns: np.ndarray N x S -- ratios >= 1, inf where a solver failed
+    """
+    performance = np.array(performance, dtype=np.float64)
+    performance[np.isnan(performance)] = np.inf
+    if minvalue is not None:
+        np.maximum(performance, minvalue, out=performance)
+    if np.any(performance < 0):
+        raise ValueError("Performance ratios need values >= 0, use minvalue")
+    best = np.min(performance, axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratios = performance / best
+    # 0 / 0 on instances solved in no time, inf / inf on instances no solver
+    # solved
+    ratios[(performance == best) & np.isfinite(best)] = 1
+    ratios[np.isnan(ratios)] = np.inf
+    return ratios
+
+
+def get_thresholds(values, num_points=1000, log=True):
+    """
+    Returns the distinct finite values (only positive ones if log) or, if
+    there are more than num_points, num_points values (log-spaced if log)
+    from the smallest to the largest of them
+    """
+    values = np.asarray(values)
+    finite = values[np.isfinite(values)]
+    if log:
+        finite = finite[finite > 0]
+    if len(finite) == 0:
+        return np.ones(1)
+    # Many instances often share few distinct values (e.g. ratio 1)
+    distinct = np.unique(finite)
+    if len(distinct) <= num_points:
+        return distinct
+    lo, hi = distinct[0], distinct[-1]
+    if log:
+        return np.geomspace(lo, hi, num_points)
+    return np.linspace(lo, hi, num_points)
+
+
+def ecdf(values, thresholds):
+    """
+    Empirical cumulative distribution of every column of values: the
+    fraction of values which are <= each threshold. Every column is sorted
+    once and the thresholds are looked up with np.searchsorted; nan counts
+    as larger than every threshold.
+
+    values: np.ndarray N x S (or N)
+    thresholds: np.ndarray K, sorted
+    :returns: np.ndarray S x K
+    """
+    values = np.asarray(values)
+    if values.ndim == 1:
+        values = values[:, np.newaxis]
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    fractions = np.empty((values.shape[1], len(thresholds)))
+    for solver in range(values.shape[1]):
+        column = np.sort(values[:, solver])
+        fractions[solver] = np.searchsorted(column, thresholds,
+                                            side="right")
+    fractions /= max(1, values.shape[0])
+    return fractions
+
+
+def performance_profile(performance, num_points=1000, minvalue=None):
+    """
+    Dolan-More performance profile of S solvers on N instances
+
+    performance: np.ndarray N x S, see performance_ratios
+    :returns: taus, fractions -- np.ndarray K and S x K; fractions[s, k] is
+              the fraction of instances on which solver s is at most taus[k]
+              times worse than the best solver
+    """
+    ratios = performance_ratios(performance, minvalue=minvalue)
+    taus = get_thresholds(ratios, num_points=num_points, log=True)
+    return taus, ecdf(ratios, taus)
+
+
+def runtime_ecdf(performance, num_points=1000, log=True):
+    """
+    Fraction of the N instances each of the S solvers solved within each
+    runtime
+
+    performance: np.ndarray N x S, failed runs are nan or inf
+    :returns: thresholds, fractions -- np.ndarray K and S x K
+    """
+    performance = np.asarray(performance, dtype=np.float64)
+    thresholds = get_thresholds(performance, num_points=num_points, log=log)
+    return thresholds, ecdf(performance, thresholds)
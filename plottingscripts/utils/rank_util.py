@@ -0,0 +1,241 @@
+from collections import OrderedDict
+import warnings
+
+import numpy as np
+
+# Only needs numpy, so ranking does not pay for importing scipy
+
+
+def rankdata(a, axis=-1, decimals=None):
+    """
+    Ranks the values along axis, starting at 1; tied values get the average
+    of their ranks (same as scipy.stats.rankdata with method="average", which
+    only ranks flattened arrays)
+
+    a: np.ndarray
+    axis: int
+        axis to rank along, all other axes are ranked independently
+    decimals: int
+        round to this many decimals first, so that values which only differ
+        after that are tied (same as ranking np.round(a, decimals))
+    :returns: np.ndarray -- of the same shape as a
+    """
+    a = np.asarray(a, dtype=np.float64)
+    if decimals is not None:
+        a = np.round(a, decimals)
+    a = np.moveaxis(a, axis, -1)
+    n = a.shape[-1]
+
+    order = np.argsort(a, axis=-1, kind="mergesort")
+    sorted_ = np.take_along_axis(a, order, axis=-1)
+    pos = np.broadcast_to(np.arange(n), sorted_.shape)
+
+    # Position of the first and of the last value of each group of ties
+    starts = np.ones(sorted_.shape, dtype=bool)
+    starts[..., 1:] = sorted_[..., 1:] != sorted_[..., :-1]
+    ends = np.ones(sorted_.shape, dtype=bool)
+    ends[..., :-1] = starts[..., 1:]
+    first = np.maximum.accumulate(np.where(starts, pos, 0), axis=-1)
+    last = np.minimum.accumulate(np.where(ends, pos, n)[..., ::-1],
+                                 axis=-1)[..., ::-1]
+
+    ranks = np.empty(sorted_.shape)
+    np.put_along_axis(ranks, order, (first + last) / 2. + 1, axis=-1)
+    return np.moveaxis(ranks, -1, axis)
+
+
+def pearson(x, y, axis=-1):
+    """
+    Pearson correlation of x and y along axis, for all other axes at once;
+    nan if x or y is constant
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    x = x - np.mean(x, axis=axis, keepdims=True)
+    y = y - np.mean(y, axis=axis, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = np.sum(x * y, axis=axis) / np.sqrt(
+            np.sum(x * x, axis=axis) * np.sum(y * y, axis=axis))
+    # Rounding can push perfect correlations slightly beyond +-1
+    return np.clip(corr, -1, 1)
+
+
+def spearman(x, y, axis=-1):
+    """
+    Spearman rank-order correlation of x and y along axis (the correlation
+    returned by scipy.stats.spearmanr), for all other axes at once
+    """
+    return pearson(rankdata(x, axis=axis), rankdata(y, axis=axis), axis=axis)
+
+
+def _tied_pairs(same):
+    """
+    Number of tied pairs along the last axis of a sorted array, given
+    same = sorted[..., 1:] == sorted[..., :-1]
+    """
+    pos = np.arange(1, same.shape[-1] + 1)
+    # Position of the first value of the group of ties of each value
+    first = np.maximum.accumulate(np.where(same, 0, pos), axis=-1)
+    return np.sum(pos - first, axis=-1)
+
+
+def _count_inversions(a):
+    """
+    Number of pairs i < j with a[..., i] > a[..., j] along the last axis,
+    for all other axes at once. Bottom-up merge sort: at every level, the
+    position of a value of the right half in the (stable) merged block
+    tells how many values of the left half are not greater than it.
+    """
+    a = np.asarray(a, dtype=np.float64)
+    shape = a.shape[:-1]
+    n = a.shape[-1]
+    a = a.reshape(int(np.prod(shape)), n)
+    size = 1
+    while size < n:
+        size *= 2
+    # Padding at the end never forms an inversion
+    merged = np.full((a.shape[0], size), np.inf)
+    merged[:, :n] = a
+    inversions = np.zeros(a.shape[0])
+    width = 1
+    while width < size:
+        blocks = merged.reshape(a.shape[0], -1, 2 * width)
+        # Both halves are sorted, so the stable sort only merges them
+        order = np.argsort(blocks, axis=-1, kind="mergesort")
+        pos = np.empty_like(order)
+        np.put_along_axis(pos, order, np.arange(2 * width), axis=-1)
+        not_greater = pos[..., width:] - np.arange(width)
+        inversions += np.sum(width - not_greater, axis=(1, 2))
+        merged = np.take_along_axis(blocks, order, axis=-1).reshape(
+            a.shape[0], size)
+        width *= 2
+    return inversions.reshape(shape)
+
+
+def kendall(x, y, axis=-1):
+    """
+    Kendall's tau-b of x and y along axis (the correlation returned by
+    scipy.stats.kendalltau), for all other axes at once; nan if x or y
+    contain nan or are constant. Needs O(n log n) time: sorts by x (and y)
+    and counts the discordant pairs as inversions of y.
+    """
+    x = np.moveaxis(np.asarray(x, dtype=np.float64), axis, -1)
+    y = np.moveaxis(np.asarray(y, dtype=np.float64), axis, -1)
+    n = x.shape[-1]
+    order = np.lexsort((y, x), axis=-1)
+    x_sorted = np.take_along_axis(x, order, axis=-1)
+    y_sorted = np.take_along_axis(y, order, axis=-1)
+
+    same_x = x_sorted[..., 1:] == x_sorted[..., :-1]
+    same_xy = same_x & (y_sorted[..., 1:] == y_sorted[..., :-1])
+    y_only = np.sort(y, axis=-1)
+    pairs = n * (n - 1) / 2.
+    tied_x = _tied_pairs(same_x)
+    tied_y = _tied_pairs(y_only[..., 1:] == y_only[..., :-1])
+    tied_xy = _tied_pairs(same_xy)
+    # Pairs tied in x are sorted by y, so they are no inversions
+    discordant = _count_inversions(y_sorted)
+    concordant_minus_discordant = \
+        pairs - tied_x - tied_y + tied_xy - 2 * discordant
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tau = concordant_minus_discordant / \
+            np.sqrt((pairs - tied_x) * (pairs - tied_y))
+    tau = np.where(np.isnan(x).any(axis=-1) | np.isnan(y).any(axis=-1),
+                   np.nan, tau)
+    return np.clip(tau, -1, 1)
+
+
+CORRELATIONS = OrderedDict((("spearman", spearman), ("kendall", kendall)))
+
+
+def _correlate(x, y, rs, bootstrap_samples, confidence, max_elements):
+    """
+    Correlations of the rows of x and y (K x n), and their bootstrap
+    confidence intervals; all rows are resampled with the same indices, in
+    chunks of at most max_elements resampled values
+    """
+    stats = OrderedDict()
+    k, n = x.shape
+    if n < 2:
+        for name in CORRELATIONS:
+            stats[name] = np.full(k, np.nan)
+            if bootstrap_samples > 0:
+                stats[name + "_lower"] = np.full(k, np.nan)
+                stats[name + "_upper"] = np.full(k, np.nan)
+        return stats
+
+    if bootstrap_samples > 0:
+        idx = rs.randint(n, size=(bootstrap_samples, n))
+        chunk = max(1, max_elements // (k * n))
+    alpha = (1 - confidence) / 2. * 100
+    for name, func in CORRELATIONS.items():
+        stats[name] = func(x, y)
+        if bootstrap_samples > 0:
+            # K x B
+            resampled = np.empty((k, bootstrap_samples))
+            for start in range(0, bootstrap_samples, chunk):
+                # K x chunk x n
+                chunk_idx = idx[start:start + chunk]
+                resampled[:, start:start + chunk] = func(x[:, chunk_idx],
+                                                         y[:, chunk_idx])
+            # Resamples with only ties have no correlation and are ignored
+            with np.errstate(invalid="ignore"), warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)
+                stats[name + "_lower"], stats[name + "_upper"] = \
+                    np.nanpercentile(resampled, q=(alpha, 100 - alpha),
+                                     axis=1)
+    return stats
+
+
+def correlation_report(name_list, train_list, test_list, topk=0.2,
+                       bootstrap_samples=0, confidence=0.95, seed=1,
+                       max_elements=2**22):
+    """
+    Spearman and Kendall correlation between train and test performance of
+    many groups, on all values and on the topk fraction with the best
+    (lowest) train performance. Groups with the same number of values are
+    stacked and correlated in one call.
+
+    train_list, test_list: typing.List[np.ndarray n]
+        one entry per group, the same n for train and test
+    bootstrap_samples: int
+        if > 0, also compute confidence intervals from this many resamples;
+        both correlations take O(n log n) per group and resample, and at
+        most max_elements resampled values are held in memory at a time
+    :returns: OrderedDict -- name -> OrderedDict with the fields n,
+              spearman, kendall, topk_n, topk_spearman, topk_kendall (and
+              <field>_lower, <field>_upper with bootstrap_samples)
+    """
+    train_list = [np.asarray(t, dtype=np.float64) for t in train_list]
+    test_list = [np.asarray(t, dtype=np.float64) for t in test_list]
+    groups = OrderedDict()
+    for idx, (train, test) in enumerate(zip(train_list, test_list)):
+        if train.shape != test.shape:
+            raise ValueError("%s has %d train, but %d test values" %
+                             (name_list[idx], len(train), len(test)))
+        groups.setdefault(len(train), list()).append(idx)
+
+    rs = np.random.RandomState(seed)
+    rows = [None] * len(train_list)
+    for n in sorted(groups):
+        members = groups[n]
+        train = np.stack([train_list[i] for i in members])
+        test = np.stack([test_list[i] for i in members])
+        full = _correlate(train, test, rs, bootstrap_samples, confidence,
+                          max_elements)
+
+        num_top = int(n * topk)
+        best = np.argsort(train, axis=1, kind="mergesort")[:, :num_top]
+        top = _correlate(np.take_along_axis(train, best, axis=1),
+                         np.take_along_axis(test, best, axis=1), rs,
+                         bootstrap_samples, confidence, max_elements)
+
+        for k, idx in enumerate(members):
+            row = OrderedDict(n=n)
+            row.update((key, float(values[k])) for key, values in
+                       full.items())
+            row["topk_n"] = num_top
+            row.update(("topk_" + key, float(values[k])) for key, values in
+                       top.items())
+            rows[idx] = row
+    return OrderedDict(zip(name_list, rows))
@@ -1,11 +1,222 @@
+import bz2
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 import csv
+import fnmatch
+import gzip
+import io
+import lzma
 import os
+import re
+import tarfile
+import zipfile
+
+import numpy as np
+
+from plottingscripts.utils import arrow_util
+
+
+def _open_zstd(fn, mode):
+    """ fn: file name or binary file object """
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("Reading %s needs the zstandard package" % fn)
+    if isinstance(fn, str):
+        fn = open(fn, 'rb')
+    fh = zstandard.ZstdDecompressor().stream_reader(fn, closefd=True)
+    return io.TextIOWrapper(fh) if "t" in mode else fh
+
+
+# Suffix -> function to open a file compressed with this codec
+COMPRESSION_SUFFIXES = OrderedDict([(".gz", gzip.open), (".bz2", bz2.open),
+                                    (".xz", lzma.open), (".zst", _open_zstd)])
+
+
+def strip_compression_suffix(fn):
+    """ "run.csv.gz" -> "run.csv", other names are returned unchanged """
+    for suffix in COMPRESSION_SUFFIXES:
+        if fn.endswith(suffix):
+            return fn[:-len(suffix)]
+    return fn
+
+
+# Separates an archive from a member (or a pattern of members) in it, e.g.
+# "bundle.tar.gz::smac/run-1.csv"
+ARCHIVE_SEPARATOR = "::"
+_ARCHIVE_CACHE = dict()
+# (archive, member) -> bytes of members read ahead by prefetch
+_MEMBER_CACHE = dict()
+
+
+def split_archive_spec(fn):
+    """ "a.tar::b.csv" -> ("a.tar", "b.csv"), "b.csv" -> (None, "b.csv") """
+    if ARCHIVE_SEPARATOR not in fn:
+        return None, fn
+    archive, member = fn.split(ARCHIVE_SEPARATOR, 1)
+    return archive, member
+
+
+def source_stat(fn):
+    """ os.stat of fn, or of the archive fn is a member of """
+    archive, member = split_archive_spec(fn)
+    return os.stat(member if archive is None else archive)
+
+
+def _archive_members(archive):
+    """
+    Returns name -> TarInfo (or ZipInfo) of all regular files in archive, the
+    result is cached as long as the archive does not change
+    """
+    archive = os.path.abspath(archive)
+    stat = os.stat(archive)
+    key = (archive, stat.st_mtime, stat.st_size)
+    if key not in _ARCHIVE_CACHE:
+        if zipfile.is_zipfile(archive):
+            with zipfile.ZipFile(archive) as zf:
+                members = [(i.filename, i) for i in zf.infolist()
+                           if not i.is_dir()]
+        else:
+            with tarfile.open(archive) as tf:
+                members = [(i.name, i) for i in tf.getmembers()
+                           if i.isfile()]
+        _ARCHIVE_CACHE[key] = OrderedDict(members)
+    return _ARCHIVE_CACHE[key]
+
+
+def list_archive(archive, pattern="*"):
+    """ Sorted names of the members of archive matching the glob pattern """
+    return sorted(name for name in _archive_members(archive)
+                  if fnmatch.fnmatchcase(name, pattern))
+
+
+def _read_archive_member(archive, member):
+    """ Returns the (still compressed) bytes of member """
+    cached = _MEMBER_CACHE.get((os.path.abspath(archive), member))
+    if cached is not None:
+        return cached
+    info = _archive_members(archive).get(member)
+    if info is None:
+        raise ValueError("%s has no member %s" % (archive, member))
+    # Every call opens the archive itself, so members can be read in
+    # parallel, see prefetch
+    if isinstance(info, zipfile.ZipInfo):
+        with zipfile.ZipFile(archive) as zf:
+            return zf.read(info)
+    with tarfile.open(archive) as tf:
+        return tf.extractfile(info).read()
+
+
+def iter_archive_members(archive, members):
+    """
+    Yields (member, (still compressed) bytes) for all members of archive,
+    in the order they are stored in it. A tar archive is read in one
+    sequential pass, reading members one by one would decompress a .tar.gz
+    or .tar.xz from the start every time.
+    """
+    wanted = set(members)
+    if zipfile.is_zipfile(archive):
+        with zipfile.ZipFile(archive) as zf:
+            for member in members:
+                yield member, zf.read(member)
+        return
+    found = set()
+    with tarfile.open(archive, mode="r|*") as tf:
+        for info in tf:
+            if info.isfile() and info.name in wanted and \
+                    info.name not in found:
+                found.add(info.name)
+                yield info.name, tf.extractfile(info).read()
+                if len(found) == len(wanted):
+                    break
+    missing = wanted.difference(found)
+    if len(missing) > 0:
+        raise ValueError("%s has no member %s" %
+                         (archive, ", ".join(sorted(missing))))
+
+
+def read_archive_members(archive, members):
+    """ Returns member -> (still compressed) bytes for all members of archive """
+    return dict(iter_archive_members(archive, members))
+
+
+def _archive_key(fn):
+    """ Key of fn in _MEMBER_CACHE, None if fn is not an archive member """
+    if not isinstance(fn, str):
+        # prefetch can also be used with other readers
+        return None
+    archive, member = split_archive_spec(fn)
+    if archive is None:
+        return None
+    return os.path.abspath(archive), member
+
+
+class _ArchiveStreams(object):
+    """
+    One sequential pass over each archive with members in files. fetch(key)
+    reads the archive up to the member into _MEMBER_CACHE; members stored
+    before it in the archive, but needed later, are kept there as well.
+    """
+
+    def __init__(self, keys):
+        members = OrderedDict()
+        for key in keys:
+            if key is not None:
+                members.setdefault(key[0], list()).append(key[1])
+        self.streams = dict((archive, iter_archive_members(archive, names))
+                            for archive, names in members.items())
+        self.passed = set()
+        self.added = set()
+
+    def fetch(self, key):
+        if key is None or key in self.passed:
+            # Members read twice are read from the archive again, see
+            # _read_archive_member
+            return
+        for member, data in self.streams[key[0]]:
+            passed = (key[0], member)
+            self.passed.add(passed)
+            if passed not in _MEMBER_CACHE:
+                _MEMBER_CACHE[passed] = data
+                self.added.add(passed)
+            if passed == key:
+                return
+
+    def release(self, key):
+        """ Drops the member key from _MEMBER_CACHE once it is parsed """
+        if key in self.added:
+            _MEMBER_CACHE.pop(key, None)
+
+    def close(self):
+        for stream in self.streams.values():
+            stream.close()
+        for key in self.added:
+            _MEMBER_CACHE.pop(key, None)
+
+
+def open_text(fn):
+    """
+    Opens fn for reading text, compressed files (see COMPRESSION_SUFFIXES)
+    are decompressed while reading. fn can also be a member of a tar or zip
+    archive, "archive::member", which is read without extracting it.
+    """
+    archive, member = split_archive_spec(fn)
+    if archive is not None:
+        fh = io.BytesIO(_read_archive_member(archive, member))
+        for suffix in COMPRESSION_SUFFIXES:
+            if member.endswith(suffix):
+                return COMPRESSION_SUFFIXES[suffix](fh, 'rt')
+        return io.TextIOWrapper(fh)
+    for suffix in COMPRESSION_SUFFIXES:
+        if fn.endswith(suffix):
+            return COMPRESSION_SUFFIXES[suffix](fn, 'rt')
+    return open(fn, 'r')
 
 
 def read_csv(fn, has_header=True, data_type=str):
     data = list()
     header = None
-    with open(fn, 'r') as csvfile:
+    with open_text(fn) as csvfile:
         csv_reader = csv.reader(csvfile, delimiter=',', quotechar='|')
         for row in csv_reader:
             if header is None and has_header:
@@ -15,22 +226,99 @@ def read_csv(fn, has_header=True, data_type=str):
     return header, data
 
 
+def read_csv_array(fn, usecols=None):
+    """
+    Reads the numerical columns usecols of a csv file with one header line.
+
+    :returns: (header, np.ndarray) -- names of the selected columns and an
+              array with one row per line
+    """
+    if arrow_util.is_columnar(fn):
+        return arrow_util.read_array(fn, usecols=usecols)
+    header = _read_header(fn)
+    if usecols is None:
+        usecols = range(len(header))
+    usecols = list(usecols)
+    with open_text(fn) as fh:
+        fh.readline()
+        data = _lines_to_array(fh.readlines(), usecols=usecols)
+    return [header[i] for i in usecols], data
+
+
+def _read_and_release(streams, key, reader, fn, **kwargs):
+    try:
+        return reader(fn, **kwargs)
+    finally:
+        streams.release(key)
+
+
+def prefetch(files, reader=read_csv_array, num_workers=8, **kwargs):
+    """
+    Calls reader(fn, **kwargs) for all files in num_workers threads and
+    yields the results in the order of files. At most num_workers results
+    are in flight or wait to be consumed, so the latency of slow (network)
+    filesystems overlaps instead of adding up per file. Members of tar and
+    zip archives are read in one sequential pass per archive while the
+    files are submitted, only parsed in the threads and dropped from memory
+    once they are parsed.
+    """
+    files = list(files)
+    keys = [_archive_key(fn) for fn in files]
+    streams = _ArchiveStreams(keys)
+    try:
+        if num_workers <= 1:
+            for fn, key in zip(files, keys):
+                streams.fetch(key)
+                yield _read_and_release(streams, key, reader, fn, **kwargs)
+            return
+        with ThreadPoolExecutor(max_workers=num_workers) as pool:
+            pending = deque()
+            for fn, key in zip(files, keys):
+                if len(pending) == num_workers:
+                    yield pending.popleft().result()
+                streams.fetch(key)
+                pending.append(pool.submit(_read_and_release, streams, key,
+                                           reader, fn, **kwargs))
+            while pending:
+                yield pending.popleft().result()
+    finally:
+        streams.close()
+
+
+def prefetch_file_list(file_list, reader=read_csv_array, num_workers=8,
+                       **kwargs):
+    """
+    Same as prefetch, but for the list of lists of files returned by
+    get_file_and_name_list; yields one list of results per experiment as
+    soon as all its files are read
+    """
+    results = prefetch([fn for files in file_list for fn in files],
+                       reader=reader, num_workers=num_workers, **kwargs)
+    for files in file_list:
+        yield [next(results) for _ in files]
+
+
 def get_file_and_name_list(argument_list, match_file, len_name=1):
     """
     argument_list: [<whatisthis> <file>*]*
     match_file: string which only appears in file and not in whatisthis
     len_name: len of names describing file(s) (if >1 return list of tuples)
+    An <archive>::<glob pattern> file is replaced by all matching members of
+    the tar or zip archive, see open_text.
     """
     assert 0 < len_name == int(len_name)
     name_list = list()
     file_list = list()
     len_desc = 0
     for i in range(len(argument_list)):
-        if match_file not in argument_list[i] and len_desc == len_name:
+        # Parquet and Arrow files can be used instead of csv files
+        is_file = match_file in argument_list[i] or \
+            arrow_util.is_columnar(argument_list[i])
+        if not is_file and len_desc == len_name:
             # We have all names, but next argument is not a file
             raise ValueError("You need at least one %s file per Experiment, "
                              "%s has none" % (match_file, name_list[-1]))
-        elif match_file not in argument_list[i] and len_desc < len_name:
+        elif not is_file and len_desc < len_name:
             # We start with a new name desc
             if len_name > 1 and len_desc == 0:
                 name_list.append(list([argument_list[i], ]))
@@ -46,7 +334,17 @@ def get_file_and_name_list(argument_list, match_file, len_name=1):
                 file_list.append(list())
             continue
         else:
-            if os.path.exists(argument_list[i]):
+            archive, pattern = split_archive_spec(argument_list[i])
+            if archive is not None and os.path.exists(archive):
+                # All members of archive matching pattern
+                members = list_archive(archive, pattern)
+                if len(members) == 0:
+                    raise ValueError("%s has no member matching %s" %
+                                     (archive, pattern))
+                len_desc = 0
+                file_list[-1].extend(os.path.abspath(archive) +
+                                     ARCHIVE_SEPARATOR + m for m in members)
+            elif os.path.exists(argument_list[i]):
                 len_desc = 0
                 file_list[-1].append(os.path.abspath(argument_list[i]))
             else:
@@ -55,6 +353,130 @@ def get_file_and_name_list(argument_list, match_file, len_name=1):
     return file_list, name_list
 
 
+def _read_header(fn):
+    with open_text(fn) as fh:
+        header = fh.readline()
+    return [h.strip().strip('"').strip("'") for h in header.split(",")]
+
+
+def _lines_to_array(lines, usecols):
+    """ Parse csv lines in one go, all quotes are removed beforehand """
+    body = "".join(lines).replace('"', '').replace("'", "")
+    if body.strip() == "":
+        return np.zeros((0, len(usecols)))
+    return np.loadtxt(io.StringIO(body), delimiter=",", usecols=usecols,
+                      ndmin=2)
+
+
+def glob_to_regex(pattern):
+    """
+    Translates a glob pattern into a regular expression. Placeholders like
+    {dataset} become named groups matching one path component, '**/' matches
+    any number of directories.
+    """
+    regex = ""
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+            continue
+        c = pattern[i]
+        if c == "{":
+            end = pattern.index("}", i)
+            regex += "(?P<%s>[^/]+?)" % pattern[i + 1:end]
+            i = end + 1
+            continue
+        elif c == "*":
+            regex += "[^/]*"
+        elif c == "?":
+            regex += "[^/]"
+        else:
+            regex += re.escape(c)
+        i += 1
+    return regex + "$"
+
+
+def _walk_files(root):
+    """ Yields the paths of all files below root, using os.scandir """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=True):
+                    stack.append(entry.path)
+                else:
+                    yield entry.path
+
+
+def find_file_and_name_list(roots, pattern, name_groups=None, regex=False):
+    """
+    Walks the directories in roots once and groups all files whose path
+    (relative to its root) matches pattern.
+
+    roots: list of directories
+    pattern: glob pattern with {group} placeholders, e.g.
+             "{dataset}/{strategy}/*seed-{seed}*.csv", or a regular expression
+             with named groups if regex is True
+    name_groups: groups describing an experiment (default: all groups except
+                 "seed" in the order they appear in the pattern)
+    :returns: file_list, name_list -- same as get_file_and_name_list with
+              len_name=len(name_groups); experiments are sorted by name and
+              files by path
+    """
+    if not regex:
+        pattern = glob_to_regex(pattern)
+    matcher = re.compile(pattern)
+    if name_groups is None:
+        name_groups = [g for g, _ in sorted(matcher.groupindex.items(),
+                                            key=lambda x: x[1])
+                       if g != "seed"]
+    if len(name_groups) == 0:
+        raise ValueError("Pattern %s has no group to name experiments" %
+                         pattern)
+
+    files_per_name = OrderedDict()
+    for root in roots:
+        root = os.path.abspath(root)
+        for path in _walk_files(root):
+            rel_path = os.path.relpath(path, root).replace(os.sep, "/")
+            # Compressed files match the pattern of their uncompressed name
+            match = matcher.match(rel_path) or \
+                matcher.match(strip_compression_suffix(rel_path))
+            if match is None:
+                continue
+            name = tuple(match.group(g) for g in name_groups)
+            files_per_name.setdefault(name, list()).append(path)
+
+    file_list = list()
+    name_list = list()
+    for name in sorted(files_per_name):
+        file_list.append(sorted(files_per_name[name]))
+        if len(name_groups) == 1:
+            name_list.append(name[0])
+        else:
+            name_list.append(list(name))
+    return file_list, name_list
+
+
+def read_trajectory_array(fn):
+    """
+    Reads a trajectory file (or a validation-over-time file) into an array.
+    Like read_trajectory_file the last column (the configuration string) is
+    ignored.
+
+    :returns: (header, np.ndarray) -- column names and an array with one row
+              per line and one column per entry in header
+    """
+    with open_text(fn) as fh:
+        header = list(map(lambda s: s.strip().strip('"'),
+                          fh.readline().split(",")))
+        header = header[:-1]
+        data = _lines_to_array(fh.readlines(), usecols=range(len(header)))
+    return header, data
+
+
 def read_trajectory_file(fn):
     """ COPIED FROM pySMAC, modified to work on validate over time file
     Reads a trajectory file and returns a list of dicts with all the
@@ -70,18 +492,54 @@ def read_trajectory_file(fn):
         "CPU Time Used", "Estimated Training Performance",
         "Wallclock Time", "Incumbent ID","Automatic Configurator (CPU) Time", ..
     """
-    return_list = []
+    header, data = read_trajectory_array(fn)
+    return [dict(zip(header, row)) for row in data.tolist()]
+
 
-    with open(fn, 'r') as fh:
-        header = list(map(lambda s: s.strip('"'), fh.readline().split(",")))
-        l_info = len(header)-1
-        for line in fh.readlines():
-            tmp = line.split(",")
-            tmp_dict = {}
-            for i in range(l_info):
-                tmp_dict[header[i]] = float(tmp[i].strip().replace('"', ''))
-            return_list.append(tmp_dict)
-    return return_list
+def read_objective_matrix_array(fn):
+    """
+    Reads a validationObjectiveMatrix file into an array.
+
+    :returns: (instances, np.ndarray) -- list of instance names and an array
+              of shape (num_instances, num_configs)
+    """
+    with open_text(fn) as fh:
+        header = fh.readline().split(",")
+        num_configs = len(header) - 2
+        lines = fh.readlines()
+    instances = [line.split(",", 1)[0].strip().replace('"', '')
+                 .replace("'", "") for line in lines if line.strip() != ""]
+    if len(set(instances)) != len(instances):
+        raise ValueError("Cannot handle more than one seed per instance")
+    data = _lines_to_array(lines, usecols=range(2, num_configs + 2))
+    return instances, data
+
+
+def read_run_result_matrix_array(fn):
+    """
+    Reads a validationRunResultLineMatrix file: one row per instance (and
+    seed) with one result line "status, runtime, runlength, quality,
+    seed[, additional info]" per validated configuration.
+
+    :returns: (instances, statuses, np.ndarray) -- list of instance names,
+              an array of shape (num_instances, num_configs) with the status
+              (e.g. "SAT" or "TIMEOUT") and an array of shape (num_instances,
+              num_configs, 3) with runtime, runlength and quality
+    """
+    with open_text(fn) as fh:
+        reader = csv.reader(fh)
+        header = next(reader)
+        rows = [row for row in reader if len(row) > 0]
+    num_configs = len(header) - 2
+    instances = [row[0].strip() for row in rows]
+    cells = [[cell.split(",") for cell in row[2:num_configs + 2]]
+             for row in rows]
+    statuses = np.array([[cell[0].strip() for cell in row] for row in cells],
+                        dtype=str).reshape(len(rows), num_configs)
+    data = np.array([[[float(v) for v in cell[1:4]] for cell in row]
+                     for row in cells],
+                    dtype=np.float64).reshape(len(rows), num_configs, 3)
+    return instances, statuses, data
 
 
 def read_validationObjectiveMatrix_file(fn):
@@ -105,19 +563,107 @@ def read_validationObjectiveMatrix_file(fn):
        testing of validation runs where more than the final incumbent is
        validated
     """
-    values = {}
+    instances, data = read_objective_matrix_array(fn)
+    return OrderedDict(zip(instances, data.tolist()))
 
-    with open(fn, 'r') as fh:
-        header = fh.readline().split(",")
-        num_configs = len(header) - 2
-        for line in fh.readlines():
-            line = line.split(",")
-            inst = line[0].strip().replace('"', '').replace("'", "")
-            if inst in values:
-                raise ValueError("Cannot handle more than one "
-                                 "seed per instance")
-            values[inst] = [float(i.strip().replace('"', '').replace("'", ""))
-                            for i in line[2:]]
-            assert len(values[inst]) == num_configs
-
-    return values
+
+# Known file formats: name -> (function to check the header, reader)
+# The first format whose check returns True is used
+FILE_FORMATS = OrderedDict()
+_FORMAT_CACHE = dict()
+
+
+def register_file_format(name, check_header, reader):
+    FILE_FORMATS[name] = (check_header, reader)
+
+
+register_file_format("run_result_matrix",
+                     lambda header: header[0] == "Instance" and
+                     len(header) > 2 and "result" in header[2].lower(),
+                     read_run_result_matrix_array)
+register_file_format("objective_matrix",
+                     lambda header: header[0] == "Instance",
+                     read_objective_matrix_array)
+register_file_format("trajectory",
+                     lambda header: "time" in header[0].lower(),
+                     read_trajectory_array)
+
+
+def detect_file_format(fn):
+    """
+    Sniffs the header line of fn and returns the name of its format. The
+    result is cached as long as the file does not change.
+    """
+    fn = os.path.abspath(fn)
+    stat = source_stat(fn)
+    key = (fn, stat.st_mtime, stat.st_size)
+    if key not in _FORMAT_CACHE:
+        header = _read_header(fn)
+        for name in FILE_FORMATS:
+            if FILE_FORMATS[name][0](header):
+                _FORMAT_CACHE[key] = name
+                break
+        else:
+            raise ValueError("Unknown file format for %s, header: %s" %
+                             (fn, ",".join(header)))
+    return _FORMAT_CACHE[key]
+
+
+def read_file(fn):
+    """
+    Reads a file with the reader for its format
+
+    :returns: (format, data) -- name of the format and what the reader returns
+    """
+    if arrow_util.is_columnar(fn):
+        return "trajectory", arrow_util.read_array(fn)
+    file_format = detect_file_format(fn)
+    return file_format, FILE_FORMATS[file_format][1](fn)
+
+
+class TailReader(object):
+    """
+    Reads csv files which are still being written: every call of read()
+    only parses the complete rows appended since the previous call. Only
+    plain csv files can be read, not compressed files, archive members or
+    Parquet and Arrow files.
+
+    usecols: columns to read, default: all columns in the header of each
+             file
+    """
+
+    def __init__(self, usecols=None):
+        self.usecols = usecols
+        self.offsets = dict()
+        # fn -> columns read from fn
+        self.file_usecols = dict()
+
+    def read(self, fn):
+        """ :returns: np.ndarray -- one row per new line in fn """
+        if split_archive_spec(fn)[0] is not None or \
+                strip_compression_suffix(fn) != fn or \
+                arrow_util.is_columnar(fn):
+            raise ValueError("Cannot read appended rows of %s, only plain "
+                             "csv files can be watched" % fn)
+        offset = self.offsets.get(fn)
+        with open(fn, 'rb') as fh:
+            if offset is None:
+                header = fh.readline()
+                if not header.endswith(b"\n"):
+                    # Header is not completely written yet
+                    return np.zeros((0, 0 if self.usecols is None
+                                     else len(self.usecols)))
+                offset = fh.tell()
+                self.file_usecols[fn] = list(
+                    range(len(header.split(b","))) if self.usecols is None
+                    else self.usecols)
+            elif os.fstat(fh.fileno()).st_size < offset:
+                raise ValueError("%s got shorter since it was last read" % fn)
+            fh.seek(offset)
+            chunk = fh.read()
+
+        # Only use complete lines
+        end = chunk.rfind(b"\n") + 1
+        self.offsets[fn] = offset + end
+        lines = chunk[:end].decode().splitlines(True)
+        return _lines_to_array(lines, usecols=self.file_usecols[fn])
@@ -0,0 +1,342 @@
+import json
+import sqlite3
+
+import numpy as np
+
+from plottingscripts.utils import read_util
+from plottingscripts.utils import experiment
+
+# Version of SCHEMA, stored in the user_version of the database
+SCHEMA_VERSION = 3
+
+# One row per ingested file, identified by dataset, strategy and seed
+# (taken from the {dataset}, {strategy} and {seed} groups of the pattern).
+# The numbers of a file are stored as float64 BLOBs: one per column of a
+# trajectory and one per objective or run result matrix, so reading a run
+# is one query and a np.frombuffer instead of one row per value. Time is
+# indexed per run (first and last time stamp of a trajectory): runs outside
+# a time range are skipped in SQL, the rows within a run are selected after
+# reading its columns.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    source TEXT UNIQUE NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    format TEXT NOT NULL,
+    dataset TEXT,
+    strategy TEXT,
+    seed TEXT,
+    -- JSON list of the column names (trajectory) or instances (objective
+    -- and run result matrix)
+    header TEXT NOT NULL,
+    -- first and last time stamp of a trajectory, NULL for other formats
+    t_min REAL,
+    t_max REAL
+);
+CREATE INDEX IF NOT EXISTS runs_dataset ON runs (dataset);
+CREATE INDEX IF NOT EXISTS runs_strategy ON runs (strategy);
+CREATE INDEX IF NOT EXISTS runs_seed ON runs (seed);
+CREATE INDEX IF NOT EXISTS runs_time ON runs (t_min, t_max);
+CREATE TABLE IF NOT EXISTS trajectory (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    col INTEGER NOT NULL,
+    -- all rows of column col, column 0 is the time
+    value BLOB NOT NULL,
+    PRIMARY KEY (run_id, col)
+);
+CREATE TABLE IF NOT EXISTS objective_matrix (
+    run_id INTEGER PRIMARY KEY REFERENCES runs (id) ON DELETE CASCADE,
+    num_configs INTEGER NOT NULL,
+    -- num_instances x num_configs
+    value BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS run_result_matrix (
+    run_id INTEGER PRIMARY KEY REFERENCES runs (id) ON DELETE CASCADE,
+    num_configs INTEGER NOT NULL,
+    -- JSON list of the num_instances x num_configs statuses
+    status TEXT NOT NULL,
+    -- num_instances x num_configs x (runtime, runlength, quality)
+    value BLOB NOT NULL
+);
+"""
+
+
+def connect(fn):
+    """ Opens (and if needed creates) the result store in fn """
+    conn = sqlite3.connect(fn)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    has_runs = conn.execute("SELECT name FROM sqlite_master WHERE "
+                            "type = 'table' AND name = 'runs'").fetchone()
+    if version != SCHEMA_VERSION and has_runs is not None:
+        conn.close()
+        raise ValueError("%s was written by an older version of the result "
+                         "store, ingest the files into a new database" % fn)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.executescript(SCHEMA)
+    conn.execute("PRAGMA user_version = %d" % SCHEMA_VERSION)
+    return conn
+
+
+def _to_blob(data):
+    return np.ascontiguousarray(data, dtype=np.float64).tobytes()
+
+
+def _from_blob(blob):
+    return np.frombuffer(blob, dtype=np.float64)
+
+
+def _insert_trajectory(conn, run_id, data):
+    conn.executemany("INSERT INTO trajectory VALUES (?, ?, ?)",
+                     [(run_id, col, _to_blob(data[:, col]))
+                      for col in range(data.shape[1])])
+
+
+def _insert_objective_matrix(conn, run_id, data):
+    conn.execute("INSERT INTO objective_matrix VALUES (?, ?, ?)",
+                 (run_id, data.shape[1], _to_blob(data)))
+
+
+def _insert_run_result_matrix(conn, run_id, statuses, data):
+    conn.execute("INSERT INTO run_result_matrix VALUES (?, ?, ?, ?)",
+                 (run_id, statuses.shape[1],
+                  json.dumps(statuses.ravel().tolist()), _to_blob(data)))
+
+
+def read_file(fn):
+    """
+    Same as read_util.read_file, but trajectories keep their last column if
+    it is numeric (e.g. the overhead of validation results)
+    """
+    file_format = read_util.detect_file_format(fn)
+    if file_format == "trajectory":
+        try:
+            return file_format, read_util.read_csv_array(fn)
+        except ValueError:
+            # The last column holds the configuration
+            pass
+    return read_util.read_file(fn)
+
+
+def _stored_run(conn, fn, stat):
+    """
+    Returns the id of the stored run of fn and whether fn did not change
+    since it was stored; (None, False) if it is not stored
+    """
+    row = conn.execute("SELECT id, mtime, size FROM runs WHERE source = ?",
+                       (fn, )).fetchone()
+    if row is None:
+        return None, False
+    return row[0], row[1:] == (stat.st_mtime, stat.st_size)
+
+
+def is_up_to_date(conn, fn):
+    """ True if fn is stored and did not change since """
+    return _stored_run(conn, fn, read_util.source_stat(fn))[1]
+
+
+def ingest_file(conn, fn, dataset=None, strategy=None, seed=None,
+                data=None):
+    """
+    Stores fn unless it is already stored and did not change since.
+    data: (format, data) as returned by read_file, read from fn if None
+
+    :returns: bool -- whether fn was (re)ingested
+    """
+    stat = read_util.source_stat(fn)
+    run_id, up_to_date = _stored_run(conn, fn, stat)
+    if up_to_date:
+        return False
+    if data is None:
+        data = read_file(fn)
+    file_format, content = data
+    header = content[0]
+    t_min = t_max = None
+    if file_format == "trajectory" and len(content[1]) > 0:
+        t_min = float(np.min(content[1][:, 0]))
+        t_max = float(np.max(content[1][:, 0]))
+    with conn:
+        if run_id is not None:
+            conn.execute("DELETE FROM runs WHERE id = ?", (run_id, ))
+        run_id = conn.execute(
+            "INSERT INTO runs (source, mtime, size, format, dataset, "
+            "strategy, seed, header, t_min, t_max) VALUES "
+            "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (fn, stat.st_mtime, stat.st_size, file_format, dataset,
+             strategy, seed, json.dumps(list(header)), t_min,
+             t_max)).lastrowid
+        if file_format == "trajectory":
+            _insert_trajectory(conn, run_id, content[1])
+        elif file_format == "objective_matrix":
+            _insert_objective_matrix(conn, run_id, content[1])
+        elif file_format == "run_result_matrix":
+            _insert_run_result_matrix(conn, run_id, *content[1:])
+        else:
+            raise ValueError("Cannot store files of format %s" % file_format)
+    return True
+
+
+def ingest(conn, roots, pattern, regex=False, num_workers=8):
+    """
+    Stores all files below roots matching pattern, see
+    read_util.find_file_and_name_list; the {dataset}, {strategy} and {seed}
+    groups of the pattern describe the run. Only new and changed files are
+    read.
+
+    :returns: int -- number of (re)ingested files
+    """
+    if not regex:
+        pattern = read_util.glob_to_regex(pattern)
+    groups = [g for g in ("dataset", "strategy", "seed") if
+              "(?P<%s>" % g in pattern]
+    file_list, name_list = read_util.find_file_and_name_list(
+        roots, pattern, name_groups=groups, regex=True)
+    file_list = [[fn for fn in files if not is_up_to_date(conn, fn)]
+                 for files in file_list]
+    count = 0
+    for name, files, data_list in zip(
+            name_list, file_list, read_util.prefetch_file_list(
+                file_list, reader=read_file,
+                num_workers=num_workers)):
+        if len(groups) == 1:
+            name = [name]
+        for fn, data in zip(files, data_list):
+            count += ingest_file(conn, fn, data=data,
+                                 **dict(zip(groups, name)))
+    return count
+
+
+def _time_conditions(time_range):
+    """ SQL conditions and parameters for runs with times in time_range """
+    conditions = list()
+    params = list()
+    if time_range[0] is not None:
+        conditions.append("t_max >= ?")
+        params.append(time_range[0])
+    if time_range[1] is not None:
+        conditions.append("t_min <= ?")
+        params.append(time_range[1])
+    return conditions, params
+
+
+def query_runs(conn, dataset=None, strategy=None, seed=None, file_format=None,
+               time_range=(None, None)):
+    """
+    :returns: list of (id, source, dataset, strategy, seed) -- all stored
+              runs matching the given (non-None) criteria, sorted by dataset,
+              strategy and seed; a criterion can also be a list of values.
+              With a time_range only trajectories with time stamps
+              time_range[0] <= time <= time_range[1] are returned.
+    """
+    conditions, params = _time_conditions(time_range)
+    for key, value in (("dataset", dataset), ("strategy", strategy),
+                       ("seed", seed), ("format", file_format)):
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple)):
+            conditions.append("%s IN (%s)" %
+                              (key, ", ".join("?" * len(value))))
+            params.extend(value)
+        else:
+            conditions.append("%s = ?" % key)
+            params.append(value)
+    query = "SELECT id, source, dataset, strategy, seed FROM runs"
+    if len(conditions) > 0:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY dataset, strategy, seed, source"
+    return conn.execute(query, params).fetchall()
+
+
+def _get_header(conn, run_id):
+    return json.loads(conn.execute("SELECT header FROM runs WHERE id = ?",
+                                   (run_id, )).fetchone()[0])
+
+
+def get_trajectory(conn, run_id, usecols=None, time_range=(None, None)):
+    """
+    :returns: np.ndarray -- the columns usecols of a stored trajectory (same
+              as read_util.read_csv_array), optionally only rows with
+              time_range[0] <= time <= time_range[1]
+    """
+    num_cols = len(_get_header(conn, run_id))
+    usecols = list(range(num_cols)) if usecols is None else list(usecols)
+    conditions, params = _time_conditions(time_range)
+    if len(conditions) > 0 and conn.execute(
+            "SELECT id FROM runs WHERE id = ? AND " + " AND ".join(conditions),
+            [run_id] + params).fetchone() is None:
+        # No time stamp in time_range, the columns are not read
+        return np.zeros((0, len(usecols)))
+    columns = dict((col, _from_blob(value)) for col, value in conn.execute(
+        "SELECT col, value FROM trajectory WHERE run_id = ? AND col IN "
+        "(%s)" % ", ".join("?" * len(set(usecols + [0]))),
+        [run_id] + sorted(set(usecols + [0]))))
+    keep = np.ones(len(columns[0]), dtype=bool)
+    if time_range[0] is not None:
+        keep &= columns[0] >= time_range[0]
+    if time_range[1] is not None:
+        keep &= columns[0] <= time_range[1]
+    data = np.empty((int(keep.sum()), len(usecols)))
+    for i, col in enumerate(usecols):
+        data[:, i] = columns[col][keep]
+    return data
+
+
+def get_objective_matrix(conn, run_id):
+    """
+    :returns: (instances, np.ndarray) -- same as
+              read_util.read_objective_matrix_array
+    """
+    instances = _get_header(conn, run_id)
+    num_configs, value = conn.execute(
+        "SELECT num_configs, value FROM objective_matrix WHERE run_id = ?",
+        (run_id, )).fetchone()
+    return instances, \
+        _from_blob(value).reshape(len(instances), num_configs).copy()
+
+
+def get_run_result_matrix(conn, run_id):
+    """
+    :returns: (instances, statuses, np.ndarray) -- same as
+              read_util.read_run_result_matrix_array
+    """
+    instances = _get_header(conn, run_id)
+    num_configs, status, value = conn.execute(
+        "SELECT num_configs, status, value FROM run_result_matrix WHERE "
+        "run_id = ?", (run_id, )).fetchone()
+    statuses = np.array(json.loads(status), dtype=str).reshape(
+        len(instances), num_configs)
+    data = _from_blob(value).reshape(len(instances), num_configs, 3).copy()
+    return instances, statuses, data
+
+
+def load_run_sets(conn, dataset=None, strategy=None, by="strategy",
+                  columns=("train", "test"),
+                  column_idx=experiment.CLASSIC_VALIDATION_COLUMNS,
+                  **kwargs):
+    """
+    Same as experiment.load_run_sets, but for the stored trajectories
+    matching dataset and strategy (see query_runs); runs are grouped into
+    one RunSet per value of by ("dataset" or "strategy"). All runs need to
+    have the same value of the other one, e.g. by="strategy" raises a
+    ValueError if the runs are on more than one dataset instead of averaging
+    over datasets. kwargs are passed to experiment.RunSet.from_arrays.
+    """
+    other = {"dataset": "strategy", "strategy": "dataset"}[by]
+    usecols = [column_idx["time"]] + [column_idx[c] for c in columns]
+    groups = dict()
+    others = set()
+    for run_id, source, d, s, _seed in query_runs(
+            conn, dataset=dataset, strategy=strategy,
+            file_format="trajectory"):
+        run = {"dataset": d, "strategy": s}
+        groups.setdefault(run[by], list()).append((run_id, source))
+        others.add(run[other])
+    if len(others) > 1:
+        raise ValueError("Found runs of more than one %s (%s), select one "
+                         "to get one RunSet per %s" %
+                         (other, ", ".join(sorted(map(str, others))), by))
+    return [experiment.RunSet.from_arrays(
+        name, [source for _, source in groups[name]],
+        [get_trajectory(conn, run_id, usecols=usecols)
+         for run_id, _ in groups[name]], columns=columns, **kwargs)
+        for name in sorted(groups, key=str)]
@@ -0,0 +1,170 @@
+from concurrent.futures import ProcessPoolExecutor
+import os
+import tempfile
+
+import numpy as np
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    # Python < 3.8, arrays are shared through memory mapped files
+    shared_memory = None
+
+
+class SharedArray(object):
+    """
+    A np.ndarray in shared memory (multiprocessing.shared_memory) or, if that
+    is not available, in a memory mapped temporary file. Only name, shape and
+    dtype are pickled, so passing it to another process does not copy the
+    data; the other process attaches to the same memory on first access.
+
+    The creating process owns the memory and has to unlink() it.
+    """
+    __slots__ = ("name", "shape", "dtype", "backend", "_buffer", "_array",
+                 "_owner")
+
+    def __init__(self, name, shape, dtype, backend, owner=False):
+        self.name = name
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.backend = backend
+        self._buffer = None
+        self._array = None
+        self._owner = owner
+
+    @classmethod
+    def create(cls, shape, dtype=np.float64, backend=None, directory=None):
+        """
+        Allocates an (uninitialized) shared array
+
+        backend: "shm" or "memmap", default: "shm" if available
+        directory: where to put the memory mapped file (default: tempdir)
+        """
+        if backend is None:
+            backend = "memmap" if shared_memory is None else "shm"
+        nbytes = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+        if backend == "shm":
+            if shared_memory is None:
+                raise ValueError("multiprocessing.shared_memory needs "
+                                 "Python >= 3.8, use backend='memmap'")
+            buffer = shared_memory.SharedMemory(create=True, size=nbytes)
+            name = buffer.name
+        elif backend == "memmap":
+            fd, name = tempfile.mkstemp(prefix="plottingscripts-",
+                                        suffix=".bin", dir=directory)
+            os.close(fd)
+            buffer = np.memmap(name, dtype=np.uint8, mode="w+",
+                               shape=(nbytes, ))
+        else:
+            raise ValueError("Unknown backend: %s" % backend)
+        shared = cls(name, shape, dtype, backend, owner=True)
+        shared._buffer = buffer
+        return shared
+
+    @classmethod
+    def from_array(cls, array, **kwargs):
+        """ Copies array into a new shared array, kwargs go to create """
+        array = np.asarray(array)
+        shared = cls.create(array.shape, array.dtype, **kwargs)
+        shared.array[...] = array
+        return shared
+
+    @property
+    def array(self):
+        """ The np.ndarray, a view on the shared memory """
+        if self._array is None:
+            if self._buffer is None:
+                self._attach()
+            buf = self._buffer.buf if self.backend == "shm" else self._buffer
+            self._array = np.ndarray(self.shape, dtype=self.dtype, buffer=buf)
+        return self._array
+
+    def _attach(self):
+        if self.backend == "shm":
+            # Worker processes share the resource tracker of their parent,
+            # so attaching does not hand the memory to another tracker
+            self._buffer = shared_memory.SharedMemory(name=self.name)
+        else:
+            self._buffer = np.memmap(self.name, dtype=np.uint8, mode="r+")
+
+    def close(self):
+        """ Detaches this process from the memory """
+        self._array = None
+        if self._buffer is not None and self.backend == "shm":
+            try:
+                self._buffer.close()
+            except BufferError:
+                # Views on the array are still alive, the mapping is
+                # released together with the last one
+                pass
+        self._buffer = None
+
+    def unlink(self):
+        """ Frees the memory, only the creating process should call this """
+        buffer = self._buffer
+        self.close()
+        if self.backend == "shm":
+            if buffer is None:
+                # Only opened to unlink it
+                buffer = shared_memory.SharedMemory(name=self.name)
+                try:
+                    buffer.unlink()
+                finally:
+                    buffer.close()
+            else:
+                buffer.unlink()
+        elif os.path.exists(self.name):
+            os.remove(self.name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._owner:
+            self.unlink()
+        else:
+            self.close()
+
+    def __getstate__(self):
+        return self.name, self.shape, self.dtype.str, self.backend
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+
+def _call_shared(func, shared, args, kwargs):
+    try:
+        return func(shared.array, *args, **kwargs)
+    finally:
+        shared.close()
+
+
+def map_shared(func, arrays, args=None, num_workers=4, **kwargs):
+    """
+    Returns [func(array, *args[i], **kwargs) for i, array in
+    enumerate(arrays)], computed in num_workers processes. Every array is
+    copied once into shared memory (unless it already is a SharedArray) and
+    attached by the workers without copying, so only args, kwargs and the
+    results are pickled. func has to be defined at module level.
+    """
+    arrays = list(arrays)
+    if args is None:
+        args = [()] * len(arrays)
+    if num_workers <= 1:
+        return [func(a.array if isinstance(a, SharedArray) else a, *arg,
+                     **kwargs) for a, arg in zip(arrays, args)]
+
+    created = list()
+    try:
+        shared = list()
+        for array in arrays:
+            if not isinstance(array, SharedArray):
+                array = SharedArray.from_array(array)
+                created.append(array)
+            shared.append(array)
+        with ProcessPoolExecutor(max_workers=num_workers) as pool:
+            return list(pool.map(_call_shared, [func] * len(shared), shared,
+                                 args, [kwargs] * len(shared)))
+    finally:
+        for array in created:
+            array.unlink()
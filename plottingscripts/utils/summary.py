@@ -0,0 +1,434 @@
+import json
+import os
+
+import numpy as np
+
+from plottingscripts.utils import read_util, shared_array
+import plottingscripts.utils.merge_test_performance_different_times as mdt
+
+
+SUMMARY_SUFFIX = ".summary.npz"
+# Agglomerations which need all runs, a Summary can not compute them
+BOOTSTRAP_AGGLOMERATIONS = ("bootstrapci", "bootstrapcimedian")
+
+
+def aggregate(performance, agglomeration="mean", scale_std=1):
+    """
+    Aggregates repeated runs for each time step
+
+    performance: np.ndarray N x T
+        performance of N runs at T time steps
+    agglomeration: str
+        "mean" (mean +- scale_std * std), "meanstderr" (mean +- standard
+        error), "median" (median and quartiles), "bootstrapci" (mean and
+        95% bootstrap confidence interval of the mean) or "bootstrapcimedian"
+        (median and 95% bootstrap confidence interval of the median)
+    :returns: m, lower, upper -- np.ndarray T each
+    """
+    performance = np.asarray(performance)
+    # Means and stds are always accumulated in float64, also for float32 runs
+    if agglomeration == "mean":
+        m = np.mean(performance, axis=0, dtype=np.float64)
+        std = np.std(performance, axis=0, dtype=np.float64)
+        lower = m - std*scale_std
+        upper = m + std*scale_std
+    elif agglomeration == "meanstderr":
+        m = np.mean(performance, axis=0, dtype=np.float64)
+        stderr = np.std(performance, axis=0, dtype=np.float64) / \
+            np.sqrt(performance.shape[0])
+        lower = m - stderr
+        upper = m + stderr
+    elif agglomeration == "median":
+        m = np.median(performance, axis=0)
+        lower = np.percentile(performance, axis=0, q=25)
+        upper = np.percentile(performance, axis=0, q=75)
+    elif agglomeration == "bootstrapci":
+        m = np.mean(performance, axis=0, dtype=np.float64)
+        lower, upper = bootstrap_ci(performance, statistic="mean")
+    elif agglomeration == "bootstrapcimedian":
+        m = np.median(performance, axis=0)
+        lower, upper = bootstrap_ci(performance, statistic="median")
+    else:
+        raise ValueError("Unknown agglomeration: %s" % agglomeration)
+    return m, lower, upper
+
+
+def bootstrap_ci(performance, statistic="mean", num_samples=1000,
+                 confidence=0.95, seed=1, max_elements=2**22):
+    """
+    Percentile bootstrap confidence interval of the mean or median of the
+    runs at each time step. The runs are resampled once and the same
+    resamples are used for all time steps, which are processed in chunks of
+    at most max_elements values.
+
+    performance: np.ndarray N x T
+    statistic: str
+        "mean" or "median"
+    seed: int
+        seed of the local np.random.RandomState, so the interval is the same
+        for every call
+    :returns: lower, upper -- np.ndarray T each
+    """
+    performance = np.asarray(performance)
+    num_runs, num_steps = performance.shape
+    rs = np.random.RandomState(seed)
+    # B x N, which runs are drawn for which resample
+    idx = rs.randint(num_runs, size=(num_samples, num_runs))
+    if statistic == "mean":
+        # How often each run is drawn, the means are then a matrix product
+        counts = np.zeros((num_samples, num_runs))
+        np.add.at(counts, (np.arange(num_samples)[:, None], idx), 1)
+        counts /= num_runs
+        per_step = num_samples
+    elif statistic == "median":
+        per_step = num_samples * num_runs
+    else:
+        raise ValueError("Unknown statistic: %s" % statistic)
+
+    alpha = (1 - confidence) / 2. * 100
+    lower = np.empty(num_steps)
+    upper = np.empty(num_steps)
+    chunk = max(1, max_elements // per_step)
+    for start in range(0, num_steps, chunk):
+        stop = min(start + chunk, num_steps)
+        values = np.asarray(performance[:, start:stop], dtype=np.float64)
+        if statistic == "mean":
+            resampled = np.dot(counts, values)
+        else:
+            # B x N x chunk
+            resampled = np.median(values[idx], axis=1)
+        lower[start:stop], upper[start:stop] = np.percentile(
+            resampled, q=(alpha, 100 - alpha), axis=0)
+    return lower, upper
+
+
+def compute_curve(times, performance, agglomeration="mean", scale_std=1,
+                  num_points=None, log=False):
+    """
+    Computes the curves plot_methods.plot_optimization_trace_mult_exp draws
+    for one experiment
+
+    times: np.ndarray T
+    performance: np.ndarray N x T or Summary (then times is ignored)
+    num_points: resample runs to at most this many (log-spaced if log) time
+                steps before aggregating them, see
+                merge_test_performance_different_times.resample_trajectory
+    :returns: times, m, lower, upper -- np.ndarray T each
+    """
+    if isinstance(performance, Summary):
+        if num_points is not None:
+            performance = performance.resample(int(num_points), log=log)
+        return (performance.times, ) + \
+            performance.aggregate(agglomeration, scale_std)
+    times = np.asarray(times)
+    if num_points is not None:
+        times, performance = mdt.resample_trajectory(
+            times, performance, num_points=int(num_points), log=log)
+    return (times, ) + aggregate(performance, agglomeration, scale_std)
+
+
+class Summary(object):
+    """
+    Summary statistics over the runs of one experiment on a time grid. Can be
+    passed to plot_methods.plot_optimization_trace_mult_exp instead of the
+    performance of all runs.
+    """
+    __slots__ = ("times", "mean", "std", "median", "q25", "q75", "num_runs")
+
+    def __init__(self, times, mean, std, median, q25, q75, num_runs):
+        self.times = np.asarray(times)
+        self.mean = np.asarray(mean)
+        self.std = np.asarray(std)
+        self.median = np.asarray(median)
+        self.q25 = np.asarray(q25)
+        self.q75 = np.asarray(q75)
+        self.num_runs = int(num_runs)
+
+    @classmethod
+    def from_performance(cls, times, performance):
+        """ performance: np.ndarray N x T """
+        performance = np.asarray(performance)
+        q25, median, q75 = np.percentile(performance, q=(25, 50, 75), axis=0)
+        return cls(times=times,
+                   mean=np.mean(performance, axis=0, dtype=np.float64),
+                   std=np.std(performance, axis=0, dtype=np.float64),
+                   median=median, q25=q25, q75=q75,
+                   num_runs=performance.shape[0])
+
+    def subset(self, idx):
+        """ Returns a Summary with only the time steps idx (slice or mask) """
+        return Summary(times=self.times[idx], mean=self.mean[idx],
+                       std=self.std[idx], median=self.median[idx],
+                       q25=self.q25[idx], q75=self.q75[idx],
+                       num_runs=self.num_runs)
+
+    def resample(self, num_points, log=True):
+        """
+        Same as resampling the runs with
+        merge_test_performance_different_times.resample_trajectory before
+        summarizing them: every new time step gets the statistics at or
+        before it
+        """
+        times, idx = mdt.resample_trajectory(self.times,
+                                             np.arange(len(self.times)),
+                                             num_points=num_points, log=log)
+        resampled = self.subset(idx)
+        resampled.times = times
+        return resampled
+
+    def scale(self, factor):
+        """ Returns the Summary of all runs multiplied with factor """
+        q25, q75 = self.q25 * factor, self.q75 * factor
+        if factor < 0:
+            q25, q75 = q75, q25
+        return Summary(times=self.times, mean=self.mean * factor,
+                       std=self.std * abs(factor),
+                       median=self.median * factor, q25=q25, q75=q75,
+                       num_runs=self.num_runs)
+
+    def aggregate(self, agglomeration="mean", scale_std=1):
+        """ Same as summary.aggregate, but on the precomputed statistics """
+        if agglomeration == "mean":
+            return (self.mean, self.mean - self.std*scale_std,
+                    self.mean + self.std*scale_std)
+        elif agglomeration == "meanstderr":
+            stderr = self.std / np.sqrt(self.num_runs)
+            return self.mean, self.mean - stderr, self.mean + stderr
+        elif agglomeration == "median":
+            return self.median, self.q25, self.q75
+        elif agglomeration in BOOTSTRAP_AGGLOMERATIONS:
+            raise ValueError("%s needs all runs, not only their Summary" %
+                             agglomeration)
+        else:
+            raise ValueError("Unknown agglomeration: %s" % agglomeration)
+
+
+def summarize_batch(time_list, performance_list):
+    """
+    Same as calling Summary.from_performance for each experiment, but
+    experiments with the same number of runs and time steps are stacked and
+    summarized with one call per statistic
+
+    time_list: typing.List[np.ndarray T]
+    performance_list: typing.List[np.ndarray N x T]
+    :returns: list of Summary -- in the order of performance_list
+    """
+    performance_list = [np.asarray(p) for p in performance_list]
+    groups = dict()
+    for idx, performance in enumerate(performance_list):
+        groups.setdefault(performance.shape, list()).append(idx)
+
+    summaries = [None] * len(performance_list)
+    for (num_runs, _), members in groups.items():
+        # K x N x T, statistics are computed over the runs
+        stacked = np.stack([performance_list[i] for i in members])
+        q25, median, q75 = np.percentile(stacked, q=(25, 50, 75), axis=1)
+        mean = np.mean(stacked, axis=1, dtype=np.float64)
+        std = np.std(stacked, axis=1, dtype=np.float64)
+        for k, idx in enumerate(members):
+            summaries[idx] = Summary(times=time_list[idx], mean=mean[k],
+                                     std=std[k], median=median[k],
+                                     q25=q25[k], q75=q75[k],
+                                     num_runs=num_runs)
+    return summaries
+
+
+def _summarize(performance, times):
+    return Summary.from_performance(times, performance)
+
+
+def summarize_parallel(time_list, performance_list, num_workers=4):
+    """
+    Same as summarize_batch, but every experiment is summarized in one of
+    num_workers processes; the runs are passed through shared memory (see
+    shared_array.map_shared), only the Summaries are sent back
+    """
+    return shared_array.map_shared(_summarize, performance_list,
+                                   args=[(t, ) for t in time_list],
+                                   num_workers=num_workers)
+
+
+class IncrementalSummary(object):
+    """
+    Summary over runs which are still running. poll() only parses the rows
+    appended to the files since the last call, summary() only recomputes
+    the forward-filled trajectories and statistics from the earliest new time
+    stamp on. Rows of one file need to be appended in order of time.
+
+    files: typing.List[str]
+        one file per run
+    column: int
+        column with the performance, time is in the first column
+    maxvalue: float
+        replace all values higher than this
+    replace_nan: float
+        value of a run before its first time stamp
+    """
+
+    def __init__(self, files, column=2, maxvalue=None, replace_nan=np.NaN):
+        self.files = list(files)
+        self.reader = read_util.TailReader(usecols=(0, column))
+        self.maxvalue = maxvalue
+        self.replace_nan = replace_nan
+        self.time_list = [np.zeros(0) for _ in self.files]
+        self.performance_list = [np.zeros(0) for _ in self.files]
+        self.times = np.zeros(0)
+        self.performance = np.zeros((len(self.files), 0))
+        self._summary = None
+        # Earliest time stamp read, but not yet merged
+        self._dirty_from = None
+
+    def poll(self):
+        """ Reads new rows, returns True if there were any """
+        changed = False
+        for run, fn in enumerate(self.files):
+            data = self.reader.read(fn)
+            data = data[data[:, 0] >= 0]
+            if len(data) == 0:
+                continue
+            values = data[:, 1]
+            if self.maxvalue is not None:
+                values = np.minimum(values, self.maxvalue)
+            self.time_list[run] = np.concatenate((self.time_list[run],
+                                                  data[:, 0]))
+            self.performance_list[run] = np.concatenate(
+                (self.performance_list[run], values))
+            if self._dirty_from is None:
+                self._dirty_from = data[0, 0]
+            self._dirty_from = min(self._dirty_from, data[0, 0])
+            changed = True
+        return changed
+
+    def summary(self):
+        """ :returns: Summary -- over everything read so far """
+        if self._dirty_from is None:
+            return self._summary
+
+        start = np.searchsorted(self.times, self._dirty_from, side="left")
+        tail_times = np.unique(np.concatenate(
+            [self.times[start:]] +
+            [t[t >= self._dirty_from] for t in self.time_list]))
+        tail = np.empty((len(self.files), len(tail_times)))
+        for run, (t, p) in enumerate(zip(self.time_list,
+                                         self.performance_list)):
+            if len(t) == 0:
+                tail[run] = self.replace_nan
+                continue
+            idx = mdt.ffill_index(t, tail_times)
+            tail[run] = p[idx]
+            tail[run, idx < 0] = self.replace_nan
+
+        self.times = np.concatenate((self.times[:start], tail_times))
+        self.performance = np.hstack((self.performance[:, :start], tail))
+        tail_summary = Summary.from_performance(tail_times, tail)
+        if self._summary is None:
+            self._summary = tail_summary
+        else:
+            self._summary = Summary(
+                *[np.concatenate((getattr(self._summary, key)[:start],
+                                  getattr(tail_summary, key)))
+                  for key in ("times", "mean", "std", "median", "q25",
+                              "q75")],
+                num_runs=len(self.files))
+        self._dirty_from = None
+        return self._summary
+
+
+def _source_stats(files):
+    stats = [read_util.source_stat(fn) for fn in files]
+    return (np.array([s.st_mtime for s in stats], dtype=np.float64),
+            np.array([s.st_size for s in stats], dtype=np.int64))
+
+
+def _build_parameters(column=2, num_points=None, log=True,
+                      dtype=np.float64):
+    """ The arguments of build_summary which change the Summary, as str """
+    return json.dumps({"column": column, "num_points": num_points,
+                       "log": log, "dtype": np.dtype(dtype).name},
+                      sort_keys=True)
+
+
+def write_summary(fn, summary, files, **kwargs):
+    """
+    Writes summary, the state of the files and the arguments of
+    build_summary (kwargs) it was built with to fn
+    """
+    mtimes, sizes = _source_stats(files)
+    directory = os.path.dirname(fn)
+    if directory != "" and not os.path.isdir(directory):
+        os.makedirs(directory)
+    np.savez_compressed(fn, times=summary.times, mean=summary.mean,
+                        std=summary.std, median=summary.median,
+                        q25=summary.q25, q75=summary.q75,
+                        num_runs=summary.num_runs,
+                        files=np.array([os.path.abspath(f) for f in files]),
+                        mtimes=mtimes, sizes=sizes,
+                        parameters=_build_parameters(**kwargs))
+
+
+def read_summary(fn):
+    with np.load(fn) as data:
+        return Summary(times=data["times"], mean=data["mean"],
+                       std=data["std"], median=data["median"],
+                       q25=data["q25"], q75=data["q75"],
+                       num_runs=data["num_runs"])
+
+
+def is_up_to_date(fn, files, **kwargs):
+    """
+    True if the sidecar fn exists and was built from exactly these files,
+    none of which changed since, with the same arguments of build_summary
+    (kwargs)
+    """
+    if not os.path.exists(fn):
+        return False
+    with np.load(fn) as data:
+        if "parameters" not in data.files or \
+                str(data["parameters"]) != _build_parameters(**kwargs):
+            return False
+        if list(data["files"]) != [os.path.abspath(f) for f in files]:
+            return False
+        mtimes, sizes = _source_stats(files)
+        return np.array_equal(data["mtimes"], mtimes) and \
+            np.array_equal(data["sizes"], sizes)
+
+
+def build_summary(files, column=2, num_points=None, log=True, num_workers=8,
+                  dtype=np.float64):
+    """
+    Reads time (first column) and performance (column) of all files, aligns
+    them with forward-filling (into an array of dtype) and returns their
+    Summary. Rows with time < 0 and empty files are skipped. num_workers
+    files are read in parallel.
+    """
+    time_list = list()
+    performance_list = list()
+    for fn, (_header, data) in zip(files, read_util.prefetch(
+            files, num_workers=num_workers, usecols=(0, column))):
+        data = data[data[:, 0] >= 0]
+        if len(data) == 0:
+            print("Found empty file %s" % fn)
+            continue
+        time_list.append(data[:, 0])
+        performance_list.append(data[:, 1])
+    grid = mdt.get_time_grid(time_list, num_points=num_points, log=log)
+    performance, times = mdt.align_trajectories(performance_list, time_list,
+                                                grid=grid, dtype=dtype)
+    return Summary.from_performance(times, performance.transpose())
+
+
+def load_or_build_summary(fn, files, num_workers=8, **kwargs):
+    """
+    Returns the Summary stored in the sidecar fn, (re)builds it first if any
+    of the files changed or it was built with other arguments; kwargs are
+    passed to build_summary
+    """
+    if is_up_to_date(fn, files, **kwargs):
+        return read_summary(fn)
+    summary = build_summary(files, num_workers=num_workers, **kwargs)
+    write_summary(fn, summary, files, **kwargs)
+    return summary
+
+
+def get_summary_filename(directory, name):
+    return os.path.join(directory, name.replace(os.sep, "_") + SUMMARY_SUFFIX)
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+
+from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter
+
+from plottingscripts.utils import result_store
+
+
+def main():
+    prog = "python ingest_results.py --db results.db --root <dir> " \
+           "--pattern '{dataset}/{strategy}/*seed-{seed}*.csv'"
+    description = "Store trajectories, objective and run result matrices " \
+                  "in a SQLite database, which plot scripts can query " \
+                  "(--db) instead of reading the files again. Files are " \
+                  "only read again if they changed."
+
+    parser = ArgumentParser(description=description, prog=prog,
+                            formatter_class=ArgumentDefaultsHelpFormatter)
+
+    parser.add_argument("--db", dest="db", required=True,
+                        help="SQLite database, created if it does not exist")
+    parser.add_argument("--root", dest="root", action="append",
+                        required=True,
+                        help="Directory to search for files, can be given "
+                             "more than once")
+    parser.add_argument("--pattern", dest="pattern", required=True,
+                        help="Pattern of file paths relative to root, "
+                             "{dataset}, {strategy} and {seed} describe the "
+                             "run")
+    parser.add_argument("--regex", dest="regex", default=False,
+                        action="store_true",
+                        help="--pattern is a regular expression with named "
+                             "groups")
+    args = parser.parse_args()
+
+    conn = result_store.connect(args.db)
+    count = result_store.ingest(conn, roots=args.root, pattern=args.pattern,
+                                regex=args.regex)
+    print("Ingested %d file(s) into %s" % (count, args.db))
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
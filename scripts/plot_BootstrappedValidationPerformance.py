@@ -8,7 +8,8 @@ import numpy as np
 
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from plottingscripts.utils import read_util, plot_util, helper
+from plottingscripts.utils import read_util, plot_util, helper, experiment
+from plottingscripts.utils import export_util
 import plottingscripts.plotting.plot_methods as plot_methods
 import plottingscripts.utils.macros
 
@@ -41,24 +42,48 @@ def main():
     parser.add_argument("-s", "--save", dest="save",
                         default="", help="Where to save plot instead of "
                                          "showing it?")
+    export_util.add_export_arguments(parser)
     parser.add_argument("-t", "--title", dest="title",
                         default="", help="Optional supertitle for plot")
     parser.add_argument("--maxvalue", dest="maxvalue", type=float,
                         default=plottingscripts.utils.macros.MAXINT,
                         help="Replace all values higher than this?")
     parser.add_argument("--agglomeration", dest="agglomeration", type=str,
-                        default="median", choices=("median", "mean"),
-                        help="Plot mean or median")
+                        default="median",
+                        choices=("median", "mean", "bootstrapci",
+                                 "bootstrapcimedian"),
+                        help="Plot mean or median, bootstrapci(median) "
+                             "shows the mean (median) with its 95%% "
+                             "bootstrap confidence interval")
     parser.add_argument("-v", "--verbose", dest="verbose", action="store_true",
                         default=False,
                         help="print number of runs on plot")
     parser.add_argument("-b", "--bootstrap", dest="bootstrap", default="10x8",
                         help="n*m; For each non-GGA experiment draw n times m "
                              "trajectories and plot best of train")
+    parser.add_argument("--timesteps", dest="timesteps", type=int,
+                        default=None,
+                        help="Align runs on this many log-spaced time steps "
+                             "instead of on the union of all time steps")
+    parser.add_argument("--dtype", dest="dtype", default="float64",
+                        choices=("float64", "float32"),
+                        help="Store the runs in this precision, float32 "
+                             "halves the memory (means are still "
+                             "accumulated in float64)")
     parser.add_argument("--seed", default=None, type=int, dest="seed",
                         help="Seed for reproducibility."
                              "Will be used for every Bootstrap sampling")
 
+    parser.add_argument("--style", dest="style", default=None,
+                        help="Style profile (%s) or path of a matplotlib "
+                             "style sheet, its sizes replace the defaults "
+                             "of the properties below" %
+                             ", ".join(plot_util.get_style_names()))
+    parser.add_argument("--usetex", dest="usetex", default=False,
+                        action="store_true",
+                        help="Render text with LaTeX instead of mathtext "
+                             "(much slower)")
+
     # Properties
     # We need this to show defaults for -h
     defaults = plot_util.get_defaults()
@@ -67,6 +92,15 @@ def main():
                             help="%s, default: %s" % (key, str(defaults[key])))
     args, unknown = parser.parse_known_args()
 
+    if args.data_only and args.export is None:
+        raise ValueError("--data-only needs --export")
+
+    # Properties which are not given default to the style profile, which is
+    # applied once for the whole process
+    defaults = plot_util.get_defaults(style=args.style)
+    if not args.data_only:
+        plot_util.use_style(args.style, usetex=args.usetex)
+
     sys.stdout.write("\nFound " + str(len(unknown)) + " arguments\n")
 
     # Calc bootstrap samples
@@ -95,45 +129,29 @@ def main():
                      in range(len(name_list))]
 
     # Get data from csv
+    # Although we only care about test, we need both for bootstrapping
+    run_sets = experiment.load_run_sets(file_list, name_list,
+                                        columns=("train", "test"),
+                                        maxvalue=args.maxvalue,
+                                        align=True, num_points=args.timesteps,
+                                        dtype=args.dtype)
     performance = list()
-    time_ = list()
     show_from = -plottingscripts.utils.macros.MAXINT
 
-    for name in range(len(name_list)):
-        # We have a new experiment
-        tmp_tst_perf_list = list()
-        tmp_trn_perf_list = list()
-        for fl in file_list[name]:
-            _none, csv_data = read_util.read_csv(fl, has_header=True)
-            csv_data = np.array(csv_data)
-
-            # Replace too high values with args.maxint
-            # Although we only care about test, we need both for bootstrapping
-            trn_data = [min([args.maxvalue, float(i.strip())]) for i
-                        in csv_data[:, 1]]
-            tst_data = [min([args.maxvalue, float(i.strip())]) for i
-                        in csv_data[:, 2]]
-
-            # Do we have only non maxint data?
-            show_from = max(tst_data.count(args.maxvalue), show_from)
-            tmp_tst_perf_list.append(tst_data)
-            tmp_trn_perf_list.append(trn_data)
-            time_.append([float(i.strip()) for i in csv_data[:, 0]])
-            # Check whether we have the same times for all runs
-            if len(time_) == 2:
-                if time_[0] == time_[1]:
-                    time_ = [time_[0], ]
-                else:
-                    raise NotImplementedError(".csv are not using the same "
-                                              "timesteps")
-        tmp_trn_perf_list = np.array(tmp_trn_perf_list)
-        tmp_tst_perf_list = np.array(tmp_tst_perf_list)
+    for name, run_set in enumerate(run_sets):
+        tmp_trn_perf_list = run_set.train
+        tmp_tst_perf_list = run_set.test
+
+        # Do we have only non maxint data?
+        show_from = max(int(np.max(np.sum(tmp_tst_perf_list == args.maxvalue,
+                                          axis=1))), show_from)
 
         # If not GGA draw bootstrap samples
         if "GGA" not in name_list[name]:
             print("Bootstrap %s" % name_list[name])
             new_performance = np.zeros([bootstrap_repetitions,
-                                        tmp_tst_perf_list.shape[1]])
+                                        tmp_tst_perf_list.shape[1]],
+                                       dtype=tmp_tst_perf_list.dtype)
             for t in range(tmp_tst_perf_list.shape[1]):
                 # for each timestep
                 for i in range(bootstrap_repetitions):
@@ -152,15 +170,22 @@ def main():
 
     performance = [np.array(i) for i in performance]
 
-    time_ = np.array(time_).flatten()
-    print(time_.shape)
     print([p.shape for p in performance])
 
     if args.xmin is None and show_from != 0:
         args.xmin = show_from
 
     properties = helper.fill_property_dict(arguments=args, defaults=defaults)
-    new_time_list = [time_ for i in range(len(performance))]
+    new_time_list = [run_set.times for run_set in run_sets]
+    if args.export is not None:
+        print("Export curves to %s" % args.export)
+        export_util.write_curves(args.export, export_util.compute_curves(
+            name_list, new_time_list, performance,
+            agglomeration=args.agglomeration,
+            num_points=properties["resample"], log=args.logx))
+    if args.data_only:
+        return
+
     fig = plot_methods.\
         plot_optimization_trace_mult_exp(time_list=new_time_list,
                                          performance_list=performance,
@@ -177,9 +202,9 @@ def main():
                                          properties=properties)
     if args.save != "":
         print("Save plot to %s" % args.save)
-        plot_util.save_plot(fig, args.save, plot_util.get_defaults()['dpi'])
+        plot_util.save_plot(fig, args.save, float(properties['dpi']))
     else:
-        fig.show()
+        plot_util.show_plot(fig)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
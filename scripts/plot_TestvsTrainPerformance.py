@@ -5,15 +5,12 @@ import itertools
 import os
 import sys
 
-import numpy as np
-
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from plottingscripts.utils import read_util, plot_util, helper
+from plottingscripts.utils import read_util, plot_util, helper, experiment
+from plottingscripts.utils import export_util
 import plottingscripts.plotting.plot_methods as plot_methods
 import plottingscripts.utils.macros
-import plottingscripts.utils.merge_test_performance_different_times as \
-    merge_test_performance_different_times
 
 
 def main():
@@ -41,17 +38,32 @@ def main():
     parser.add_argument("-s", "--save", dest="save",
                         default="",
                         help="Where to save plot instead of showing it?")
+    export_util.add_export_arguments(parser)
     parser.add_argument("-t", "--title", dest="title",
                         default="", help="Optional supertitle for plot")
     parser.add_argument("--maxvalue", dest="maxvalue", type=float,
                         default=plottingscripts.utils.macros.MAXINT,
                         help="Replace all values higher than this?")
     parser.add_argument("--agglomeration", dest="agglomeration", type=str,
-                        default="median", choices=("median", "mean"),
-                        help="Plot mean or median")
+                        default="median",
+                        choices=("median", "mean", "bootstrapci",
+                                 "bootstrapcimedian"),
+                        help="Plot mean or median, bootstrapci(median) "
+                             "shows the mean (median) with its 95%% "
+                             "bootstrap confidence interval")
     parser.add_argument("-v", "--verbose", dest="verbose", action="store_true",
                         default=False, help="print number of runs on plot")
 
+    parser.add_argument("--style", dest="style", default=None,
+                        help="Style profile (%s) or path of a matplotlib "
+                             "style sheet, its sizes replace the defaults "
+                             "of the properties below" %
+                             ", ".join(plot_util.get_style_names()))
+    parser.add_argument("--usetex", dest="usetex", default=False,
+                        action="store_true",
+                        help="Render text with LaTeX instead of mathtext "
+                             "(much slower)")
+
     # Properties
     # We need this to show defaults for -h
     defaults = plot_util.get_defaults()
@@ -60,6 +72,15 @@ def main():
                             help="%s, default: %s" % (key, str(defaults[key])))
     args, unknown = parser.parse_known_args()
 
+    if args.data_only and args.export is None:
+        raise ValueError("--data-only needs --export")
+
+    # Properties which are not given default to the style profile, which is
+    # applied once for the whole process
+    defaults = plot_util.get_defaults(style=args.style)
+    if not args.data_only:
+        plot_util.use_style(args.style, usetex=args.usetex)
+
     sys.stdout.write("\nFound " + str(len(unknown)) + " arguments\n")
 
     if len(unknown) < 2:
@@ -96,6 +117,15 @@ def main():
         properties["colors"] = itertools.cycle(c)
         properties["markers"] = itertools.cycle([""])
 
+    if args.export is not None:
+        print("Export curves to %s" % args.export)
+        export_util.write_curves(args.export, export_util.compute_curves(
+            name_list_test_train, new_time_list, performance,
+            agglomeration=args.agglomeration,
+            num_points=properties["resample"], log=args.logx))
+    if args.data_only:
+        return
+
     fig = plot_methods.\
         plot_optimization_trace_mult_exp(time_list=new_time_list,
                                          performance_list=performance,
@@ -112,64 +142,30 @@ def main():
 
     if args.save != "":
         print("Save plot to %s" % args.save)
-        plot_util.save_plot(fig, args.save, plot_util.get_defaults()['dpi'])
+        plot_util.save_plot(fig, args.save, float(properties['dpi']))
     else:
-        fig.show()
+        plot_util.show_plot(fig)
 
 
 def get_performance_data(file_list, name_list, maxvalue):
-    # Get data from csv
+    """
+    Reads one RunSet per experiment; train and test performance are returned
+    as two experiments named <name>_train and <name>_test
+    """
+    run_sets = experiment.load_run_sets(file_list, name_list,
+                                        columns=("train", "test"),
+                                        maxvalue=maxvalue, align=True)
+    name_list_test_train = list()
+    time_list = list()
     performance = list()
-    time_ = list()
-    name_list_test_train = []
-    for name in range(len(name_list)):
-        # We have a new experiment
-        trn_perf = []
-        tst_perf = []
-        time_for_name = []
-
-        for fl in file_list[name]:
-            _none, csv_data = read_util.read_csv(fl, has_header=True)
-            csv_data = np.array(csv_data)
-            # Replace too high values with args.maxint
-            train_data = [min([maxvalue, float(i.strip())])
-                          for i in csv_data[:, 1]]
-            test_data = [min([maxvalue, float(i.strip())])
-                         for i in csv_data[:, 2]]
-            time_data = [float(i.strip()) for i in csv_data[:, 0]]
-
-            trn_perf.append(train_data)
-            tst_perf.append(test_data)
-            time_for_name.append(time_data)
-
-        merged_performances = trn_perf + tst_perf
-        len_trn_perf = len(trn_perf)
-        merged_time = time_for_name + time_for_name
-
-        merged_performances, merged_time = merge_test_performance_different_times. \
-            fill_trajectory(merged_performances, merged_time)
-        trn_perf = merged_performances[:, :len_trn_perf]
-        tst_perf = merged_performances[:, len_trn_perf:]
-
-        # Convert to numpy arrays
-        trn_perf = np.array(trn_perf)
-        tst_perf = np.array(tst_perf)
-        merged_time = np.array(merged_time)
-
-        # Append performance to global plotting array
-        name_list_test_train.append("%s_train" % name_list[name])
-        performance.append(trn_perf.transpose())
-        name_list_test_train.append("%s_test" % name_list[name])
-        performance.append(tst_perf.transpose())
-        # Append the time twice, once for the test, once for the training array
-        time_.append(merged_time)
-        time_.append(merged_time)
-    performance = np.array([np.array(i) for i in performance])
-    time_ = np.array(time_)
-    # This plotting function requires a time array for each experiment
-    # new_time_list = np.array([time_ for i in range(len(performance))])
-    new_time_list = np.array(time_)
-    return name_list_test_train, new_time_list, performance
+    for run_set in run_sets:
+        for column in ("train", "test"):
+            name_list_test_train.append("%s_%s" % (run_set.name, column))
+            # This plotting function requires a time array for each
+            # experiment
+            time_list.append(run_set.times)
+            performance.append(run_set.column(column))
+    return name_list_test_train, time_list, performance
 
 
 if __name__ == "__main__":
@@ -5,10 +5,9 @@ import sys
 
 import numpy as np
 
-from plottingscripts.utils import read_util, plot_util
+from plottingscripts.utils import read_util, plot_util, experiment
+from plottingscripts.utils import export_util
 import plottingscripts.plotting.plot_methods as plot_methods
-import plottingscripts.utils.merge_test_performance_different_times as \
-    merge_test_performance_different_times
 import plottingscripts.utils.macros
 
 
@@ -32,6 +31,7 @@ def main():
                         default=None, help="Minimum of the x-axis")
     parser.add_argument("-s", "--save", dest="save", default="",
                         help="Where to save plot instead of showing it?")
+    export_util.add_export_arguments(parser)
     parser.add_argument("-t", "--title", dest="title", default="",
                         help="Optional supertitle for plot")
     parser.add_argument("--maxvalue", dest="maxvalue", type=float,
@@ -40,14 +40,21 @@ def main():
     parser.add_argument("-v", "--verbose", dest="verbose", action="store_true",
                         default=False, help="print number of runs on plot")
     parser.add_argument("--agglomeration", dest="agglomeration", type=str,
-                        default="median", help="Show mean or median",
-                        choices=("mean", "median"))
+                        default="median",
+                        help="Show mean or median, bootstrapci(median) shows "
+                             "the mean (median) with its 95%% bootstrap "
+                             "confidence interval",
+                        choices=("mean", "median", "bootstrapci",
+                                 "bootstrapcimedian"))
     parser.add_argument("--ylabel", dest="ylabel", default="Performance")
     parser.add_argument("--optimum", dest="optimum", default=0, type=float,
                         help="Plot difference to optimum")
 
     args, unknown = parser.parse_known_args()
 
+    if args.data_only and args.export is None:
+        raise ValueError("--data-only needs --export")
+
     sys.stdout.write("\nFound " + str(len(unknown)) + " arguments\n")
 
     if len(unknown) < 2:
@@ -66,43 +73,37 @@ def main():
         name_list = [name_list[i] + " (" + str(len(file_list[i])) + ")"
                      for i in range(len(name_list))]
 
-    # Get data from csv
-    performance_list = list()
-    time_list = list()
-
+    # Get data from csv, the performance is in the second column
+    run_sets = experiment.load_run_sets(file_list, name_list,
+                                        columns=("train", ),
+                                        column_idx={"time": 0, "train": 1},
+                                        align=True)
     show_from = -plottingscripts.utils.macros.MAXINT
-
-    for name in range(len(name_list)):
-        # We have a new experiment
-        performance = list()
-        time_ = list()
-        for fl in file_list[name]:
-            _none, csv_data = read_util.read_csv(fl, has_header=True)
-            csv_data = np.array(csv_data)
-
-            # Replace too high values with args.maxint
-            data = [min([args.maxvalue, float(i.strip()) - args.optimum])
-                    for i in csv_data[:, 1]]
-
-            # do we have only non maxint data?
-            show_from = max(data.count(args.maxvalue), show_from)
-
-            performance.append(data)
-            time_.append([float(i.strip()) for i in csv_data[:, 0]])
-        if len(time_) > 1:
-            performance, time_ = merge_test_performance_different_times.\
-                fill_trajectory(performance_list=performance, time_list=time_)
-            print(performance[0][:10])
-        else:
-            time_ = time_[0]
-        performance = [np.array(i) for i in performance]
-        time_ = np.array(time_)
-        performance_list.append(performance)
-        time_list.append(time_)
+    for run_set in run_sets:
+        performance = run_set.train
+        performance -= args.optimum
+        # Runs have maxvalue before their first time stamp
+        performance[np.isnan(performance)] = args.maxvalue
+        np.minimum(performance, args.maxvalue, out=performance)
+
+        # do we have only non maxint data?
+        show_from = max(int(np.max(np.sum(performance == args.maxvalue,
+                                          axis=1))), show_from)
+    time_list = [r.times for r in run_sets]
+    performance_list = [r.train for r in run_sets]
 
     if args.xmin is None and show_from != 0:
         args.xmin = show_from
 
+    if args.export is not None:
+        print("Export curves to %s" % args.export)
+        export_util.write_curves(args.export, export_util.compute_curves(
+            name_list, time_list, performance_list,
+            agglomeration=args.agglomeration,
+            num_points=plot_util.get_defaults()["resample"], log=args.log))
+    if args.data_only:
+        return
+
     fig = plot_methods.\
         plot_optimization_trace_mult_exp(time_list=time_list,
                                          performance_list=performance_list,
@@ -120,7 +121,7 @@ def main():
         print("Save plot to %s" % args.save)
         plot_util.save_plot(fig, args.save, plot_util.get_defaults()['dpi'])
     else:
-        fig.show()
+        plot_util.show_plot(fig)
 
 if __name__ == "__main__":
     main()
@@ -3,14 +3,18 @@
 from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter
 import os
 import sys
+import time
 
 import numpy as np
 
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from plottingscripts.utils import read_util, plot_util, helper
+from plottingscripts.utils import read_util, plot_util, helper, experiment, \
+    summary, result_store
+from plottingscripts.utils import export_util
 import plottingscripts.plotting.plot_methods as plot_methods
 import plottingscripts.utils.macros
+import plottingscripts.utils.merge_test_performance_different_times as mdt
 
 
 def main():
@@ -40,16 +44,43 @@ def main():
                         help="Label on x-axis")
     parser.add_argument("-s", "--save", dest="save", default="",
                         help="Where to save plot instead of showing it?")
+    export_util.add_export_arguments(parser)
     parser.add_argument("-t", "--title", dest="title",
                         default="", help="Optional supertitle for plot")
     parser.add_argument("--maxvalue", dest="maxvalue", type=float,
                         default=plottingscripts.utils.macros.MAXINT,
                         help="Replace all values higher than this?")
     parser.add_argument("--agglomeration", dest="agglomeration", type=str,
-                        default="median", choices=("median", "mean"),
-                        help="Plot mean or median")
+                        default="median",
+                        choices=("median", "mean", "bootstrapci",
+                                 "bootstrapcimedian"),
+                        help="Plot mean or median, bootstrapci(median) "
+                             "shows the mean (median) with its 95%% "
+                             "bootstrap confidence interval")
     parser.add_argument("-v", "--verbose", dest="verbose", action="store_true",
                         default=False, help="print number of runs on plot")
+    parser.add_argument("--timesteps", dest="timesteps", type=int,
+                        default=None,
+                        help="Align runs on this many log-spaced time steps "
+                             "instead of on the union of all time steps")
+    parser.add_argument("--dtype", dest="dtype", default="float64",
+                        choices=("float64", "float32"),
+                        help="Store the runs in this precision, float32 "
+                             "halves the memory (means are still "
+                             "accumulated in float64)")
+    parser.add_argument("--db", dest="db", default=None,
+                        help="Query runs from this result store (see "
+                             "ingest_results.py) instead of reading files")
+    parser.add_argument("--dataset", dest="dataset", default=None,
+                        help="With --db: only runs on this dataset, "
+                             "needed if the store holds more than one")
+    parser.add_argument("--strategy", dest="strategy", action="append",
+                        default=None,
+                        help="With --db: only these strategies (default: "
+                             "all), can be given more than once")
+    parser.add_argument("--watch", dest="watch", type=float, default=None,
+                        help="Keep running and re-render the plot to --save "
+                             "every WATCH seconds if the files changed")
     parser.add_argument("--scaleY", dest="scale_y", default=1, type=float,
                         help="Multiply all Y values with this factor")
     group = parser.add_mutually_exclusive_group()
@@ -57,6 +88,16 @@ def main():
                        action='store_true')
     group.add_argument('--test', dest="test", default=True, action='store_true')
 
+    parser.add_argument("--style", dest="style", default=None,
+                        help="Style profile (%s) or path of a matplotlib "
+                             "style sheet, its sizes replace the defaults "
+                             "of the properties below" %
+                             ", ".join(plot_util.get_style_names()))
+    parser.add_argument("--usetex", dest="usetex", default=False,
+                        action="store_true",
+                        help="Render text with LaTeX instead of mathtext "
+                             "(much slower)")
+
     # Properties
     # We need this to show defaults for -h
     defaults = plot_util.get_defaults()
@@ -65,9 +106,18 @@ def main():
                             help="%s, default: %s" % (key, str(defaults[key])))
     args, unknown = parser.parse_known_args()
 
+    if args.data_only and args.export is None:
+        raise ValueError("--data-only needs --export")
+
+    # Properties which are not given default to the style profile, which is
+    # applied once for the whole process
+    defaults = plot_util.get_defaults(style=args.style)
+    if not args.data_only:
+        plot_util.use_style(args.style, usetex=args.usetex)
+
     sys.stdout.write("\nFound " + str(len(unknown)) + " arguments\n")
 
-    if len(unknown) < 2:
+    if len(unknown) < 2 and args.db is None:
         print("To few arguments given")
         parser.print_help()
         sys.exit(1)
@@ -80,9 +130,25 @@ def main():
             args.ylabel = "%s performance on test instances" % \
                           args.agglomeration
 
-    # Get files and names
-    file_list, name_list = read_util.get_file_and_name_list(unknown,
-                                                            match_file='.csv')
+    column = "train" if args.train else "test"
+
+    if args.db is not None:
+        # Get data from the result store, one experiment per strategy
+        conn = result_store.connect(args.db)
+        run_sets = result_store.load_run_sets(conn, dataset=args.dataset,
+                                              strategy=args.strategy,
+                                              columns=(column, ),
+                                              maxvalue=args.maxvalue,
+                                              align=True,
+                                              num_points=args.timesteps,
+                                              dtype=args.dtype)
+        conn.close()
+        name_list = [r.name for r in run_sets]
+        file_list = [r.metadata["files"] for r in run_sets]
+    else:
+        # Get files and names
+        file_list, name_list = read_util.get_file_and_name_list(
+            unknown, match_file='.csv')
     for idx in range(len(name_list)):
         print("%20s contains %d file(s)" %
               (name_list[idx], len(file_list[idx])))
@@ -90,43 +156,29 @@ def main():
     if args.verbose:
         name_list = [name_list[i] + " (" + str(len(file_list[i])) + ")" for
                      i in range(len(name_list))]
+        if args.db is not None:
+            for run_set, name in zip(run_sets, name_list):
+                run_set.name = name
 
-    # Get data from csv
-    performance = list()
-    time_ = list()
-    show_from = -plottingscripts.utils.macros.MAXINT
+    if args.watch is not None:
+        watch(args, file_list, name_list, column, defaults)
+        return
 
-    for name in range(len(name_list)):
-        # We have a new experiment
-        performance.append(list())
-        for fl in file_list[name]:
-            _none, csv_data = read_util.read_csv(fl, has_header=True)
-            csv_data = np.array(csv_data)
-            # Replace too high values with args.maxint
-            if args.train:
-                data = [min([args.maxvalue, float(i.strip())]) for i in
-                        csv_data[:, 1]]
-            elif args.test:
-                data = [min([args.maxvalue, float(i.strip())]) for i in
-                        csv_data[:, 2]]
-            else:
-                print("This should not happen")
-            # do we have only non maxint data?
-            show_from = max(data.count(args.maxvalue), show_from)
-            performance[-1].append(data)
-            time_.append([float(i.strip()) for i in csv_data[:, 0]])
-            # Check whether we have the same times for all runs
-            if len(time_) == 2:
-                if time_[0] == time_[1]:
-                    time_ = [time_[0], ]
-                else:
-                    raise NotImplementedError(".csv are not using the same "
-                                              "times")
-
-    performance = [np.array(i) for i in performance]
-
-    # print time_
-    time_ = np.array(time_).flatten()
+    if args.db is None:
+        # Get data from csv
+        run_sets = experiment.load_run_sets(file_list, name_list,
+                                            columns=(column, ),
+                                            maxvalue=args.maxvalue,
+                                            align=True,
+                                            num_points=args.timesteps,
+                                            dtype=args.dtype)
+
+    # do we have only non maxint data?
+    show_from = -plottingscripts.utils.macros.MAXINT
+    for run_set in run_sets:
+        show_from = max(int(np.max(np.sum(run_set.column(column) ==
+                                          args.maxvalue, axis=1))),
+                        show_from)
 
     if args.train:
                 print("Plot TRAIN performance")
@@ -140,30 +192,95 @@ def main():
 
     if args.scale_y != 1:
         print("Scale Y values with %g", args.scale_y)
-        performance = np.array(performance)
-        performance = args.scale_y * performance
+        for run_set in run_sets:
+            run_set.values *= args.scale_y
     properties = helper.fill_property_dict(arguments=args, defaults=defaults)
     print(properties)
-    new_time_list = [time_ for i in range(len(performance))]
-    fig = plot_methods.\
-        plot_optimization_trace_mult_exp(time_list=new_time_list,
-                                         performance_list=performance,
-                                         title=args.title,
-                                         name_list=name_list,
-                                         logx=args.logx, logy=args.logy,
-                                         y_min=args.ymin,
-                                         y_max=args.ymax,
-                                         x_min=args.xmin,
-                                         x_max=args.xmax,
-                                         agglomeration=args.agglomeration,
-                                         legend=(args.legendlocation is None),
-                                         ylabel=args.ylabel, xlabel=args.xlabel,
-                                         properties=properties)
+    if args.export is not None:
+        print("Export curves to %s" % args.export)
+        export_util.write_curves(args.export,
+                                 export_util.compute_run_set_curves(
+                                     run_sets, column=column,
+                                     agglomeration=args.agglomeration,
+                                     num_points=properties["resample"],
+                                     log=args.logx))
+    if args.data_only:
+        return
+
+    fig = plot_methods.plot_run_sets(run_sets=run_sets, column=column,
+                                     title=args.title,
+                                     logx=args.logx, logy=args.logy,
+                                     y_min=args.ymin,
+                                     y_max=args.ymax,
+                                     x_min=args.xmin,
+                                     x_max=args.xmax,
+                                     agglomeration=args.agglomeration,
+                                     ylabel=args.ylabel, xlabel=args.xlabel,
+                                     properties=properties)
     if args.save != "":
         print("Save plot to %s" % args.save)
-        plot_util.save_plot(fig, args.save, plot_util.get_defaults()['dpi'])
+        plot_util.save_plot(fig, args.save, float(properties['dpi']))
     else:
-        fig.show()
+        plot_util.show_plot(fig)
+
+
+def watch(args, file_list, name_list, column, defaults):
+    if args.save == "":
+        raise ValueError("--watch needs --save")
+    if args.agglomeration in summary.BOOTSTRAP_AGGLOMERATIONS:
+        raise ValueError("--watch only keeps summaries of the runs, it can "
+                         "not plot --agglomeration %s" % args.agglomeration)
+    watched = [summary.IncrementalSummary(
+        files, column=experiment.CLASSIC_VALIDATION_COLUMNS[column],
+        maxvalue=args.maxvalue, replace_nan=args.maxvalue)
+        for files in file_list]
+    while True:
+        # Only parse new rows and only render if there were any
+        if any([w.poll() for w in watched]):
+            summaries = [w.summary() for w in watched]
+            if args.timesteps is not None:
+                # Same grid as load_run_sets(num_points=args.timesteps)
+                summaries = [s if s is None else s.resample(args.timesteps)
+                             for s in summaries]
+            # Only show time steps at which all runs have started
+            summaries = [s.subset(np.isfinite(s.mean)) for s in summaries
+                         if s is not None]
+            if len(summaries) < len(watched) or \
+                    any(len(s.times) == 0 for s in summaries):
+                print("Waiting for all runs to start")
+                time.sleep(args.watch)
+                continue
+            # Same as main: only show time steps from the number of maxvalue
+            # entries on and scale the values
+            show_from = -plottingscripts.utils.macros.MAXINT
+            for w in watched:
+                performance = w.performance
+                if args.timesteps is not None:
+                    _, performance = mdt.resample_trajectory(
+                        w.times, performance, num_points=args.timesteps)
+                show_from = max(int(np.max(np.sum(
+                    performance == args.maxvalue, axis=1))), show_from)
+            x_min = args.xmin
+            if x_min is None and show_from != 0:
+                x_min = show_from
+            if args.scale_y != 1:
+                summaries = [s.scale(args.scale_y) for s in summaries]
+            properties = helper.fill_property_dict(arguments=args,
+                                                   defaults=defaults)
+            # The color, marker and linestyle cycles have to start anew
+            for key in ("colors", "markers", "linestyles"):
+                properties[key] = None
+            fig = plot_methods.plot_optimization_trace_mult_exp(
+                time_list=[s.times for s in summaries],
+                performance_list=summaries, name_list=list(name_list),
+                title=args.title, logx=args.logx, logy=args.logy,
+                y_min=args.ymin, y_max=args.ymax, x_min=x_min,
+                x_max=args.xmax, agglomeration=args.agglomeration,
+                ylabel=args.ylabel, xlabel=args.xlabel, properties=properties)
+            print("Save plot to %s" % args.save)
+            plot_util.save_plot(fig, args.save, float(properties['dpi']))
+        time.sleep(args.watch)
+
 
 if __name__ == "__main__":
     main()
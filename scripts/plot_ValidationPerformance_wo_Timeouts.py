@@ -5,8 +5,10 @@ import sys
 
 import numpy as np
 
-from plottingscripts.utils import read_util, plot_util
+from plottingscripts.utils import read_util, plot_util, experiment
+from plottingscripts.utils import export_util
 import plottingscripts.plotting.plot_methods as plot_methods
+import plottingscripts.utils.macros
 
 
 def main():
@@ -31,15 +33,20 @@ def main():
     parser.add_argument("-s", "--save", dest="save",
                         default="",
                         help="Where to save plot instead of showing it?")
+    export_util.add_export_arguments(parser)
     parser.add_argument("-t", "--title", dest="title",
                         default="",
                         help="Optional supertitle for plot")
     parser.add_argument("--maxvalue", dest="maxvalue", type=float,
-                        default=sys.maxint,
+                        default=plottingscripts.utils.macros.MAXINT,
                         help="Replace all values higher than this?")
     parser.add_argument("--agglomeration", dest="agglomeration", type=str,
-                        default="median", choices=("median", "mean"),
-                        help="Plot mean or median")
+                        default="median",
+                        choices=("median", "mean", "bootstrapci",
+                                 "bootstrapcimedian"),
+                        help="Plot mean or median, bootstrapci(median) "
+                             "shows the mean (median) with its 95%% "
+                             "bootstrap confidence interval")
     parser.add_argument("-v", "--verbose", dest="verbose", action="store_true",
                         default=False, help="print number of runs on plot")
     parser.add_argument("-c", "--cutoff", dest="cutoff", required=True,
@@ -47,10 +54,13 @@ def main():
 
     args, unknown = parser.parse_known_args()
 
+    if args.data_only and args.export is None:
+        raise ValueError("--data-only needs --export")
+
     sys.stdout.write("\nFound " + str(len(unknown)) + " arguments\n")
 
     if len(unknown) < 2:
-        print "To less arguments given"
+        print("To less arguments given")
         parser.print_help()
         sys.exit(1)
 
@@ -61,53 +71,57 @@ def main():
     file_list, name_list = read_util.get_file_and_name_list(unknown,
                                                             match_file='.csv')
     for idx in range(len(name_list)):
-        print "%20s contains %d file(s)" % (name_list[idx], len(file_list[idx]))
+        print("%20s contains %d file(s)" % (name_list[idx], len(file_list[idx])))
 
     if args.verbose:
         name_list = [name_list[i] + " (" + str(len(file_list[i])) + ")" for
                      i in range(len(name_list))]
 
-    # Get data from csv
-    performance = list()
-    time_ = list()
-
-    for name in range(len(name_list)):
-        # We have a new experiment
-        performance.append(list())
-        time_.append([1, 2])
-        for fl in file_list[name]:
-            data_dict = read_util.read_validationObjectiveMatrix_file(fl)
-            # Get Performance for each step
-            tmp_performance = list()
-            for idx in [0, -1]:
-                summer = [data_dict[inst][idx] for inst in data_dict.keys()]
-                summer = np.array(summer)
-                notTimeout_idx = summer < args.cutoff
-                summer = summer[notTimeout_idx]
-                tmp_performance.append(np.mean(summer))
-            performance[-1].append(tmp_performance)
-
-    performance = [np.array(i) for i in performance]
-
-    # This plotting function requires a time array for each experiment
-    fig = plot_methods.plot_optimization_trace_mult_exp(time_list=time_,
-                                                        performance_list=performance,
-                                                        title=args.title,
-                                                        name_list=name_list,
-                                                        logx=args.logx,
-                                                        logy=args.logy,
-                                                        y_max=args.ymax,
-                                                        y_min=args.ymin,
-                                                        x_min=0.8,
-                                                        x_max=2.2,
-                                                        agglomeration=args.agglomeration,
-                                                        ylabel=args.ylabel)
+    # Get data from csv, one RunSet per experiment with the mean
+    # performance of the first and the last configuration as time steps 1
+    # and 2
+    run_sets = list()
+    for name, files in zip(name_list, file_list):
+        values = np.empty((1, len(files), 2))
+        for run, (_instances, data) in enumerate(read_util.prefetch(
+                files, reader=read_util.read_objective_matrix_array)):
+            for step, config in enumerate((0, -1)):
+                performance = data[:, config]
+                notTimeout_idx = performance < args.cutoff
+                values[0, run, step] = np.mean(performance[notTimeout_idx])
+        np.minimum(values, args.maxvalue, out=values)
+        run_sets.append(experiment.RunSet(name, times=[1, 2], values=values,
+                                          columns=("test", ),
+                                          metadata={"files": list(files)}))
+
+    if args.export is not None:
+        print("Export curves to %s" % args.export)
+        export_util.write_curves(args.export,
+                                 export_util.compute_run_set_curves(
+                                     run_sets, column="test",
+                                     agglomeration=args.agglomeration,
+                                     num_points=plot_util.get_defaults()[
+                                         "resample"],
+                                     log=args.logx))
+    if args.data_only:
+        return
+
+    fig = plot_methods.plot_run_sets(run_sets=run_sets, column="test",
+                                     title=args.title,
+                                     logx=args.logx,
+                                     logy=args.logy,
+                                     y_max=args.ymax,
+                                     y_min=args.ymin,
+                                     x_min=0.8,
+                                     x_max=2.2,
+                                     agglomeration=args.agglomeration,
+                                     ylabel=args.ylabel)
 
     if args.save != "":
-        print "Save plot to %s" % args.save
+        print("Save plot to %s" % args.save)
         plot_util.save_plot(fig, args.save, plot_util.get_defaults()['dpi'])
     else:
-        fig.show()
+        plot_util.show_plot(fig)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
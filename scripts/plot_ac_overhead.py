@@ -3,10 +3,10 @@
 from argparse import ArgumentParser
 import sys
 
-import numpy as np
-
-from plottingscripts.utils import read_util, plot_util
+from plottingscripts.utils import read_util, plot_util, experiment
+from plottingscripts.utils import export_util
 import plottingscripts.plotting.plot_methods as plot_methods
+import plottingscripts.utils.macros
 
 
 def main():
@@ -32,21 +32,39 @@ def main():
                         help="Label on y-axis")
     parser.add_argument("-s", "--save", dest="save",
                         default="", help="Where to save plot instead of showing it?")
+    export_util.add_export_arguments(parser)
     parser.add_argument("-t", "--title", dest="title",
                         default="", help="Optional supertitle for plot")
     parser.add_argument("--maxvalue", dest="maxvalue", type=float,
-                        default=sys.maxint, help="Replace all values higher than this?")
+                        default=plottingscripts.utils.macros.MAXINT,
+                        help="Replace all values higher than this?")
     parser.add_argument("--agglomeration", dest="agglomeration", type=str,
-                        default="median", choices=("median", "mean"),
-                        help="Plot mean or median")
+                        default="median",
+                        choices=("median", "mean", "bootstrapci",
+                                 "bootstrapcimedian"),
+                        help="Plot mean or median, bootstrapci(median) "
+                             "shows the mean (median) with its 95%% "
+                             "bootstrap confidence interval")
     parser.add_argument("-v", "--verbose", dest="verbose", action="store_true", default=False,
                         help="print number of runs on plot")
+    parser.add_argument("--timesteps", dest="timesteps", type=int,
+                        default=None,
+                        help="Align runs on this many log-spaced time steps "
+                             "instead of on the union of all time steps")
+    parser.add_argument("--dtype", dest="dtype", default="float64",
+                        choices=("float64", "float32"),
+                        help="Store the runs in this precision, float32 "
+                             "halves the memory (means are still "
+                             "accumulated in float64)")
     args, unknown = parser.parse_known_args()
 
+    if args.data_only and args.export is None:
+        raise ValueError("--data-only needs --export")
+
     sys.stdout.write("\nFound " + str(len(unknown)) + " arguments\n")
 
     if len(unknown) < 2:
-        print "To less arguments given"
+        print("To less arguments given")
         parser.print_help()
         sys.exit(1)
 
@@ -56,54 +74,46 @@ def main():
     # Get files and names
     file_list, name_list = read_util.get_file_and_name_list(unknown, match_file='.csv')
     for idx in range(len(name_list)):
-        print "%20s contains %d file(s)" % (name_list[idx], len(file_list[idx]))
+        print("%20s contains %d file(s)" % (name_list[idx], len(file_list[idx])))
 
     if args.verbose:
         name_list = [name_list[i] + " (" + str(len(file_list[i])) + ")" for i in range(len(name_list))]
 
     # Get data from csv
-    overhead = list()
-    time_ = list()
-    show_from = -sys.maxint
-
-    for name in range(len(name_list)):
-        # We have a new experiment
-        overhead.append(list())
-        for fl in file_list[name]:
-            _none, csv_data = read_util.read_csv(fl, has_header=True)
-            csv_data = np.array(csv_data)
-            overhead[-1].append(csv_data[:, 3])
-            time_.append([float(i.strip()) for i in csv_data[:, 0]])
-            # Check whether we have the same times for all runs
-            if len(time_) == 2:
-                if time_[0] == time_[1]:
-                    time_ = [time_[0], ]
-                else:
-                    raise NotImplementedError(".csv are not using the same times")
-    overhead = [np.array(i, dtype=np.float32) for i in overhead]
-    # print time_
-    time_ = np.array(time_).flatten()
-
-    # This plotting function requires a time array for each experiment
-    new_time_list = [time_ for i in range(len(overhead))]
-    fig = plot_methods.plot_optimization_trace_mult_exp(time_list=new_time_list,
-                                                        performance_list=overhead,
-                                                        title=args.title,
-                                                        name_list=name_list,
-                                                        logx=args.logx,
-                                                        logy=args.logy,
-                                                        y_min=args.ymin,
-                                                        y_max=args.ymax,
-                                                        x_min=args.xmin,
-                                                        x_max=args.xmax,
-                                                        agglomeration=args.agglomeration,
-                                                        ylabel=args.ylabel)
+    run_sets = experiment.load_run_sets(file_list, name_list,
+                                        columns=("overhead", ),
+                                        align=True, num_points=args.timesteps,
+                                        dtype=args.dtype)
+
+    if args.export is not None:
+        print("Export curves to %s" % args.export)
+        export_util.write_curves(args.export,
+                                 export_util.compute_run_set_curves(
+                                     run_sets, column="overhead",
+                                     agglomeration=args.agglomeration,
+                                     num_points=plot_util.get_defaults()[
+                                         "resample"],
+                                     log=args.logx))
+    if args.data_only:
+        return
+
+    fig = plot_methods.plot_run_sets(run_sets=run_sets,
+                                     column="overhead",
+                                     title=args.title,
+                                     logx=args.logx,
+                                     logy=args.logy,
+                                     y_min=args.ymin,
+                                     y_max=args.ymax,
+                                     x_min=args.xmin,
+                                     x_max=args.xmax,
+                                     agglomeration=args.agglomeration,
+                                     ylabel=args.ylabel)
 
     if args.save != "":
-        print "Save plot to %s" % args.save
+        print("Save plot to %s" % args.save)
         plot_util.save_plot(fig, args.save, plot_util.get_defaults()['dpi'])
     else:
-        fig.show()
+        plot_util.show_plot(fig)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -28,6 +28,16 @@ def main():
                         default="", help="Optional supertitle for plot")
     parser.add_argument("-v", "--verbose", dest="verbose", action="store_true",
                         default=False, help="print number of runs on plot")
+    parser.add_argument("--root", dest="root", default=None, action="append",
+                        help="Search files below this directory instead of "
+                             "listing them (can be given more than once)")
+    parser.add_argument("--pattern", dest="pattern", default=None,
+                        help="Glob pattern relative to --root with {dataset} "
+                             "and {strategy} placeholders, e.g. "
+                             "'{dataset}/{strategy}/*.csv'")
+    parser.add_argument("--regex", dest="regex", default=False,
+                        action="store_true",
+                        help="--pattern is a regex with named groups")
 
     # Properties
     # We need this to show defaults for -h
@@ -41,15 +51,19 @@ def main():
 
     sys.stdout.write("\nFound " + str(len(unknown)) + " arguments\n")
 
-    if len(unknown) < 2:
+    if len(unknown) < 2 and args.pattern is None:
         print("To less arguments given")
         parser.print_help()
         sys.exit(1)
 
     # Get files and names
-    file_list, name_list = read_util.get_file_and_name_list(unknown,
-                                                            match_file='.csv',
-                                                            len_name=2)
+    if args.pattern is not None:
+        file_list, name_list = read_util.find_file_and_name_list(
+            roots=args.root or ["."], pattern=args.pattern,
+            name_groups=("dataset", "strategy"), regex=args.regex)
+    else:
+        file_list, name_list = read_util.get_file_and_name_list(
+            unknown, match_file='.csv', len_name=2)
 
     datasets = set()
     strategies = set()
@@ -83,7 +97,7 @@ def main():
             file_path = strategy_dataset[strategy][dataset][1]
             labels.append(dataset_id)
 
-            with open(file_path, 'r') as csvfile:
+            with read_util.open_text(file_path) as csvfile:
                 csvreader = csv.reader(csvfile, delimiter=',', quotechar='"')
                 for idx, row in enumerate(csvreader):
                     if idx > 0:
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+
+from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter
+import sys
+
+import numpy as np
+
+from plottingscripts.utils import read_util, plot_util, profile_util, helper
+from plottingscripts.plotting.profiles import plot_cumulative_distributions
+
+
+# Results of a validationRunResultLineMatrix which count as solved, same as
+# in get_percentage_solved.py
+SOLVED_STATUSES = ("SAT", "UNSAT")
+
+
+def read_solver(files, config=-1, cutoff=None, agglomeration="mean",
+                num_workers=8):
+    """
+    Reads the performance of one solver from validationObjectiveMatrix or
+    validationRunResultLineMatrix files (one per run) and aggregates the
+    runs per instance. Of a validationRunResultLineMatrix the runtime is
+    used, results which are not SOLVED_STATUSES count as failed (inf).
+
+    config: column of the validated configuration, default: last one
+    cutoff: performance >= cutoff counts as failed (inf)
+    :returns: instances, performance -- both sorted by instance name
+    """
+    instances = None
+    runs = list()
+    for fn, (file_format, content) in zip(files, read_util.prefetch(
+            files, reader=read_util.read_file, num_workers=num_workers)):
+        if file_format not in ("objective_matrix", "run_result_matrix"):
+            raise ValueError("%s is a %s, not an objective or run result "
+                             "matrix" % (fn, file_format))
+        names = np.array(content[0])
+        order = np.argsort(names, kind="mergesort")
+        if instances is None:
+            instances = names[order]
+        elif not np.array_equal(instances, names[order]):
+            raise ValueError("%s has other instances than %s" %
+                             (fn, files[0]))
+        if file_format == "objective_matrix":
+            values = np.array(content[1][order, config], dtype=np.float64)
+        else:
+            _names, statuses, data = content
+            values = np.array(data[order, config, 0], dtype=np.float64)
+            values[~np.isin(statuses[order, config], SOLVED_STATUSES)] = \
+                np.inf
+        if cutoff is not None:
+            values[values >= cutoff] = np.inf
+        runs.append(values)
+    if agglomeration == "mean":
+        performance = np.mean(runs, axis=0)
+    else:
+        performance = np.median(runs, axis=0)
+    return instances, performance
+
+
+def main():
+    prog = "python plot_performance_profile.py <WhatIsThis> " \
+           "one/or/many/*validationObjectiveMatrix-traj*.csv " \
+           "<WhatIsThis> one/or/many/*RunResultLineMatrix-traj*.csv"
+    description = "Plot Dolan-More performance profiles or runtime ECDFs " \
+                  "of several solvers on the same instances"
+
+    parser = ArgumentParser(description=description, prog=prog,
+                            formatter_class=ArgumentDefaultsHelpFormatter)
+
+    # General Options
+    parser.add_argument("--kind", dest="kind", default="profile",
+                        choices=("profile", "ecdf"),
+                        help="Plot the fraction of instances within a ratio "
+                             "to the best solver (profile) or within a "
+                             "runtime (ecdf)")
+    parser.add_argument("--config", dest="config", type=int, default=-1,
+                        help="Which validated configuration (column) to use, "
+                             "default: the last one")
+    parser.add_argument("--cutoff", dest="cutoff", type=float, default=None,
+                        help="Performance >= cutoff counts as not solved")
+    parser.add_argument("--minvalue", dest="minvalue", type=float,
+                        default=None, help="Replace all values smaller than "
+                                           "this")
+    parser.add_argument("--agglomeration", dest="agglomeration", type=str,
+                        default="mean", choices=("mean", "median"),
+                        help="Aggregation over the runs (files) of a solver "
+                             "per instance")
+    parser.add_argument("--points", dest="points", type=int, default=1000,
+                        help="Evaluate the distributions at this many "
+                             "thresholds (log-spaced if --logx)")
+    parser.add_argument("--workers", dest="workers", type=int, default=8,
+                        help="Number of files read in parallel")
+    parser.add_argument("--logx", action="store_true", dest="logx",
+                        default=False, help="Plot x-axis on log scale")
+    parser.add_argument("--xmax", dest="xmax", type=float,
+                        default=None, help="Maximum of the x-axis")
+    parser.add_argument("--xmin", dest="xmin", type=float,
+                        default=None, help="Minimum of the x-axis")
+    parser.add_argument("-s", "--save", dest="save",
+                        default="", help="Where to save plot instead of "
+                                         "showing it?")
+    parser.add_argument("-t", "--title", dest="title",
+                        default=None, help="Optional supertitle for plot")
+    parser.add_argument("--xlabel", dest="xlabel", default=None,
+                        help="x label, default depends on --kind")
+    parser.add_argument("--ylabel", dest="ylabel",
+                        default="fraction of instances", help="y label")
+    parser.add_argument("--style", dest="style", default=None,
+                        help="Style profile (%s) or path of a matplotlib "
+                             "style sheet, its sizes replace the defaults "
+                             "of the properties below" %
+                             ", ".join(plot_util.get_style_names()))
+    parser.add_argument("--usetex", dest="usetex", default=False,
+                        action="store_true",
+                        help="Render text with LaTeX instead of mathtext "
+                             "(much slower)")
+
+    # Properties
+    # We need this to show defaults for -h
+    defaults = plot_util.get_defaults()
+    for key in defaults:
+        parser.add_argument("--%s" % key, dest=key, default=None,
+                            help="%s, default: %s" % (key, str(defaults[key])))
+    args, unknown = parser.parse_known_args()
+
+    if len(unknown) < 2:
+        print("To less arguments given")
+        parser.print_help()
+        sys.exit(1)
+
+    if args.xlabel is None:
+        args.xlabel = "performance ratio" if args.kind == "profile" \
+            else "runtime [sec]"
+
+    # Get files and names
+    file_list, name_list = read_util.get_file_and_name_list(unknown,
+                                                            match_file='.csv')
+    for idx in range(len(name_list)):
+        print("%20s contains %d file(s)" % (name_list[idx],
+                                            len(file_list[idx])))
+
+    # N x S, all solvers on the same instances
+    instances = None
+    performance = list()
+    for name, files in zip(name_list, file_list):
+        solver_instances, solver_performance = read_solver(
+            files, config=args.config, cutoff=args.cutoff,
+            agglomeration=args.agglomeration, num_workers=args.workers)
+        if instances is None:
+            instances = solver_instances
+        elif not np.array_equal(instances, solver_instances):
+            raise ValueError("%s was run on other instances than %s" %
+                             (name, name_list[0]))
+        performance.append(solver_performance)
+    performance = np.stack(performance, axis=1)
+    print("Found %d instances" % len(instances))
+
+    if args.kind == "profile":
+        x, fractions = profile_util.performance_profile(
+            performance, num_points=args.points, minvalue=args.minvalue)
+    else:
+        if args.minvalue is not None:
+            performance = np.maximum(performance, args.minvalue)
+        x, fractions = profile_util.runtime_ecdf(
+            performance, num_points=args.points, log=args.logx)
+    for name, fraction in zip(name_list, fractions):
+        print("%20s solved %.4f of all instances" % (name, fraction[-1]))
+
+    defaults = plot_util.get_defaults(style=args.style)
+    plot_util.use_style(args.style, usetex=args.usetex)
+    properties = helper.fill_property_dict(arguments=args, defaults=defaults)
+
+    fig = plot_cumulative_distributions(x, fractions, name_list,
+                                        title=args.title, logx=args.logx,
+                                        properties=properties,
+                                        x_min=args.xmin, x_max=args.xmax,
+                                        xlabel=args.xlabel,
+                                        ylabel=args.ylabel)
+    if args.save != "":
+        print("Save plot to %s" % args.save)
+        plot_util.save_plot(fig, args.save, float(properties['dpi']))
+    else:
+        plot_util.show_plot(fig)
+
+
+if __name__ == "__main__":
+    main()
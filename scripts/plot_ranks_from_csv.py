@@ -1,76 +1,62 @@
 #!/usr/bin/env python
 from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter
 from collections import OrderedDict
-import csv
-import scipy.stats
 import sys
 import warnings
 
 import numpy as np
 
 from plottingscripts.utils import read_util
+from plottingscripts.utils import experiment
+from plottingscripts.utils import export_util
 from plottingscripts.utils import plot_util
-from plottingscripts.utils.merge_test_performance_different_times import \
-    fill_trajectory
+from plottingscripts.utils import rank_util
+from plottingscripts.utils import shared_array
+import plottingscripts.utils.merge_test_performance_different_times as mdt
 import plottingscripts.plotting.plot_methods as plot_methods
 
 
 def read_data(file_list, name_list):
+    """
+    Reads the test performance of every (dataset, estimator) in name_list
+    into a RunSet. Datasets with an empty file or without runs of as many
+    estimators as the others are skipped.
+
+    :returns: dataset_dict, dataset_list, estimator_list -- dataset ->
+              estimator -> RunSet and the sets of datasets and estimators
+    """
     dataset_dict = OrderedDict()
     estimator_list = set()
     dataset_list = set()
 
     to_skip = set()
 
-    for idx, desc in enumerate(name_list):
-        dataset = desc[0]
-        est = desc[1]
+    column_idx = experiment.CLASSIC_VALIDATION_COLUMNS
+    data_lists = read_util.prefetch_file_list(
+        file_list, usecols=(column_idx["time"], column_idx["test"]))
+    for (dataset, est), files, data_list in zip(name_list, file_list,
+                                                data_lists):
         estimator_list.add(est)
 
-        trajectories = []
-        times_ = []
-        # print("Processing %s" % est)
-        for csv_file in file_list[idx]:
-            # print(file_list[idx][0])
-            fh = open(csv_file, 'r')
-            reader = csv.reader(fh)
-            p = list()
-            t = list()
-            for i, row in enumerate(reader):
-                if i == 0:
-                    continue
-                if float(row[0]) < 0:
-                    warnings.warn('Found time stamp < 0 in file %s' % csv_file)
-                    continue
-                try:
-                    t.append(float(row[0]))
-                    p.append(float(row[2]))
-                except IndexError:
-                    print('IndexError reading %s at line %d: %s' %
-                          (csv_file, i, row))
-                    raise
-
-            if len(t) == 0:
+        runs = list()
+        for csv_file, (_header, data) in zip(files, data_list):
+            if np.any(data[:, 0] < 0):
+                warnings.warn('Found time stamp < 0 in file %s' % csv_file)
+                data = data[data[:, 0] >= 0]
+            if len(data) == 0:
                 print('Found empty file %s' % csv_file)
                 continue
+            runs.append(data)
 
-            times_.append(t)
-            trajectories.append(p)
-
-        if len(trajectories) != len(file_list[idx]):
+        if len(runs) != len(files):
             to_skip.add(dataset)
             continue
 
-        trajectories, times_ = fill_trajectory(trajectories, times_)
-
         dataset_list.add(dataset)
         if dataset not in dataset_dict:
             dataset_dict[dataset] = OrderedDict()
-        if est not in dataset_dict[dataset]:
-            dataset_dict[dataset][est] = OrderedDict()
-
-        dataset_dict[dataset][est]["times"] = times_
-        dataset_dict[dataset][est]["performances"] = trajectories
+        dataset_dict[dataset][est] = experiment.RunSet.from_arrays(
+            est, files, runs, columns=("test", ), align=True)
 
     max_num_keys = max([len(dataset_dict[dataset]) for dataset in dataset_dict])
     for dataset in dataset_dict:
@@ -79,21 +65,14 @@ def read_data(file_list, name_list):
 
     for dataset in to_skip:
         print('Skipping dataset %s' % dataset)
-        try:
-            del dataset_dict[dataset]
-        except:
-            pass
-        try:
-            dataset_list.remove(dataset)
-        except:
-            pass
+        dataset_dict.pop(dataset, None)
+        dataset_list.discard(dataset)
     return dataset_dict, dataset_list, estimator_list
 
 
 def calculate_ranking(performances, estimators, bootstrap_samples=500):
     num_steps = len(performances[estimators[0]]["performances"][0])
     num_estimators = len(estimators)
-    ranking = np.zeros((num_steps, len(estimators)), dtype=np.float64)
 
     rs = np.random.RandomState(1)
 
@@ -104,28 +83,43 @@ def calculate_ranking(performances, estimators, bootstrap_samples=500):
         for idx in range(num_estimators):
             combination.append(rs.randint(maximum[idx]))
         combinations.append(np.array(combination))
+    combinations = np.array(combinations).reshape(-1, num_estimators)
 
     # Initializes ranking array
     # Not sure whether we need this
     #for j, est in enumerate(estimators):
     #    ranking[0][j] = np.mean(range(1, len(estimators) + 1))
 
-    for i in range(ranking.shape[0]):
-        num_products = 0
-
-        for combination in combinations:
-            ranks = scipy.stats.rankdata(
-                [np.round(
-                    performances[estimators[idx]]["performances"][number][i], 5)
-                 for idx, number in enumerate(combination)])
-            num_products += 1
-            for j, est in enumerate(estimators):
-                ranking[i][j] += ranks[j]
-
-        for j, est in enumerate(estimators):
-            ranking[i][j] = ranking[i][j] / num_products
-
-    return list(np.transpose(ranking)), estimators
+    # Rank all combinations at all time steps at once, in chunks of time steps
+    # to bound the memory (bootstrap_samples x num_estimators x chunk)
+    runs = [np.asarray(performances[est]["performances"]) for est in
+            estimators]
+    ranking = np.zeros((num_estimators, num_steps), dtype=np.float64)
+    chunk = max(1, 2**22 // max(1, bootstrap_samples * num_estimators))
+    for start in range(0, num_steps, chunk):
+        stop = min(start + chunk, num_steps)
+        values = np.stack([runs[idx][combinations[:, idx], start:stop]
+                           for idx in range(num_estimators)], axis=1)
+        ranks = rank_util.rankdata(values, axis=1, decimals=5)
+        ranking[:, start:stop] = np.sum(ranks, axis=0) / len(combinations)
+
+    return list(ranking), estimators
+
+
+def calculate_ranking_stacked(performance, counts, estimators,
+                              bootstrap_samples=500):
+    """
+    Same as calculate_ranking, but the runs of all estimators are stacked
+    in performance (one row per run, counts[i] rows for estimators[i]), e.g.
+    a shared_array.SharedArray
+    """
+    performances = OrderedDict()
+    start = 0
+    for est, count in zip(estimators, counts):
+        performances[est] = {"performances": performance[start:start + count]}
+        start += count
+    return calculate_ranking(performances, estimators,
+                             bootstrap_samples=bootstrap_samples)
 
 
 def main():
@@ -162,6 +156,29 @@ def main():
                         default=None, help="x label (overrides default)")
     parser.add_argument("--ylabel",type=str,
                         default=None, help="y label (overrides default)")
+    export_util.add_export_arguments(parser, what="ranks per dataset")
+    parser.add_argument("--root", dest="root", default=None, action="append",
+                        help="Search files below this directory instead of "
+                             "listing them (can be given more than once)")
+    parser.add_argument("--pattern", dest="pattern", default=None,
+                        help="Glob pattern relative to --root with {dataset} "
+                             "and {strategy} placeholders, e.g. "
+                             "'{dataset}/{strategy}/*.csv'")
+    parser.add_argument("--regex", dest="regex", default=False,
+                        action="store_true",
+                        help="--pattern is a regex with named groups")
+    parser.add_argument("--processes", dest="processes", type=int, default=1,
+                        help="Rank the datasets in this many processes")
+
+    parser.add_argument("--style", dest="style", default=None,
+                        help="Style profile (%s) or path of a matplotlib "
+                             "style sheet, its sizes replace the defaults "
+                             "of the properties below" %
+                             ", ".join(plot_util.get_style_names()))
+    parser.add_argument("--usetex", dest="usetex", default=False,
+                        action="store_true",
+                        help="Render text with LaTeX instead of mathtext "
+                             "(much slower)")
 
     # Properties
     # We need this to show defaults for -h
@@ -172,17 +189,30 @@ def main():
 
     args, unknown = parser.parse_known_args()
 
+    if args.data_only and args.export is None:
+        raise ValueError("--data-only needs --export")
+
+    # Properties which are not given default to the style profile, which is
+    # applied once for the whole process
+    defaults = plot_util.get_defaults(style=args.style)
+    if not args.data_only:
+        plot_util.use_style(args.style, usetex=args.usetex)
+
     sys.stdout.write("\nFound " + str(len(unknown)) + " arguments\n")
 
-    if len(unknown) < 2:
+    if len(unknown) < 2 and args.pattern is None:
         print("To less arguments given")
         parser.print_help()
         sys.exit(1)
 
     # Get files and names
-    file_list, name_list = read_util.get_file_and_name_list(unknown,
-                                                            match_file='.csv',
-                                                            len_name=2)
+    if args.pattern is not None:
+        file_list, name_list = read_util.find_file_and_name_list(
+            roots=args.root or ["."], pattern=args.pattern,
+            name_groups=("dataset", "strategy"), regex=args.regex)
+    else:
+        file_list, name_list = read_util.get_file_and_name_list(
+            unknown, match_file='.csv', len_name=2)
     for idx in range(len(name_list)):
         assert len(file_list[idx]) == 1, "%s" % file_list[idx]
         print("%20s contains %d file(s)" %
@@ -196,54 +226,59 @@ def main():
     print("Found estimators: %s" % str(estimator_list))
 
     for dataset in dataset_list:
-        # In order to use fill trajectory for all runs on one dataset,
-        # the trajectories for each run need to be in one array -> flatten the
-        # array and put it together afterwards
-
         print("Processing dataset: %s" % dataset)
         if dataset not in dataset_dict:
             # This should never happen
             raise ValueError("Dataset %s lost" % dataset)
 
-        # Merge the times of this dataset
-        performances_per_estimator = list()
-        times_per_estimator = list()
-        num_performances_per_estimator = list()
-        for est in dataset_dict[dataset]:
-            num_performances = len(dataset_dict[dataset][est]['performances'])
-            num_performances_per_estimator.extend([est] * num_performances)
-            performances_per_estimator.extend(dataset_dict[dataset][est]['performances'])
-            times_per_estimator.extend(
-                [dataset_dict[dataset][est]['times']] * num_performances)
-
-        performances, times = fill_trajectory(
-            performance_list=performances_per_estimator,
-            time_list=times_per_estimator)
-
-        assert performances.shape[0] == times.shape[0], \
-            (performances.shape[0], times.shape[0])
-
-        for i, est in enumerate(dataset_dict[dataset]):
-            dataset_dict[dataset][est]['performances'] = list()
-            dataset_dict[dataset][est]['times'] = list()
-
-        for est, perf in zip (num_performances_per_estimator,
-                              performances.transpose()):
-            dataset_dict[dataset][est]['performances'].append(perf)
-            dataset_dict[dataset][est]['times'].append(times)
-
-    # Calculate rankings
+        # All runs on one dataset on one time grid
+        run_sets = experiment.align_run_sets(
+            [dataset_dict[dataset][est] for est in estimator_list])
+        if not all(np.isfinite(r.test).all() for r in run_sets):
+            raise ValueError("Runs on dataset %s do not start at the same "
+                             "time" % dataset)
+        dataset_dict[dataset] = OrderedDict(zip(estimator_list, run_sets))
+
+    # Calculate rankings, the datasets are distributed over args.processes
+    # processes which get the runs through shared memory
+    if args.processes <= 1:
+        rankings = list()
+        for dataset in dataset_list:
+            performances = OrderedDict(
+                (est, {"performances": dataset_dict[dataset][est].test})
+                for est in estimator_list)
+            rankings.append(calculate_ranking(
+                performances, estimator_list,
+                bootstrap_samples=args.samples))
+    else:
+        # The runs of a dataset are written directly into shared memory,
+        # there is no stacked copy
+        stacked = list()
+        rank_args = list()
+        try:
+            for dataset in dataset_list:
+                runs = [dataset_dict[dataset][est].test
+                        for est in estimator_list]
+                shared = shared_array.SharedArray.create(
+                    (sum(len(r) for r in runs), runs[0].shape[1]),
+                    dtype=runs[0].dtype)
+                stacked.append(shared)
+                np.concatenate(runs, out=shared.array)
+                shared.close()
+                rank_args.append(([len(r) for r in runs], estimator_list))
+            rankings = shared_array.map_shared(
+                calculate_ranking_stacked, stacked, args=rank_args,
+                num_workers=args.processes, bootstrap_samples=args.samples)
+        finally:
+            for shared in stacked:
+                shared.unlink()
+
     ranking_list = list()
     time_list = list()
-    for dataset in dataset_list:
-
-        ranking, e_list = calculate_ranking(performances=dataset_dict[dataset],
-                                            estimators=estimator_list,
-                                            bootstrap_samples=args.samples)
-
+    for dataset, (ranking, e_list) in zip(dataset_list, rankings):
         ranking_list.extend(ranking)
         assert len(e_list) == len(estimator_list)
-        time_list.extend([dataset_dict[dataset][e]["times"][0] for e in e_list])
+        time_list.extend([dataset_dict[dataset][e].times for e in e_list])
 
     # Fill trajectories as ranks are calculated on different time steps
     # sanity check
@@ -252,8 +287,8 @@ def main():
     assert len(ranking_list[0]) == len(time_list[0]), "%d is not %d" % \
                                                       (len(ranking_list[0]),
                                                        len(time_list[0]))
-    p, times = fill_trajectory(performance_list=ranking_list,
-                               time_list=time_list)
+    p, times = mdt.align_trajectories(performance_list=ranking_list,
+                                      time_list=time_list)
     del ranking_list, dataset_dict
     p = p.transpose()
 
@@ -267,10 +302,18 @@ def main():
         assert np.array(entry).shape[1] == time_list[0].shape[0], \
             (np.array(entry).shape[1], time_list[0].shape)
 
+    if args.export is not None:
+        print("Export ranks to %s" % args.export)
+        export_util.write_ranking(args.export, estimator_list, dataset_list,
+                                  times, performance_list)
+    if args.data_only:
+        return
+
     prop = {}
     args_dict = vars(args)
     for key in defaults:
         prop[key] = args_dict[key]
+    prop = plot_util.fill_with_defaults(prop, style=args.style)
     #prop['linestyles'] = itertools.cycle(["-", ":"])
 
     ylabel = "average rank (%d bootstrap samples)" % args.samples
@@ -287,9 +330,9 @@ def main():
 
     if args.save != "":
         print("Save plot to %s" % args.save)
-        plot_util.save_plot(fig, args.save, plot_util.get_defaults()['dpi'])
+        plot_util.save_plot(fig, args.save, float(prop['dpi']))
     else:
-        fig.show()
+        plot_util.show_plot(fig)
 
 
 if __name__ == "__main__":
@@ -5,14 +5,15 @@ import os
 import sys
 import collections
 
-import scipy.stats
 import numpy as np
+import tabulate
 
 from matplotlib.pyplot import tight_layout, figure, subplots_adjust, subplot, savefig, show, tick_params
 import matplotlib.gridspec
 
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-from plottingscripts.utils import read_util, plot_util, macros
+from plottingscripts.utils import read_util, plot_util, macros, rank_util, \
+    export_util
 
 
 def main():
@@ -58,7 +59,21 @@ def main():
                              "as default")
     parser.add_argument("--correlation", dest="correlation", default=False,
                         action="store_true",
-                        help="Show Spearman rank-order correlation coefficient")
+                        help="Show Spearman and Kendall rank correlation "
+                             "coefficients of all and of the --topk best "
+                             "configurations")
+    parser.add_argument("--topk", dest="topk", type=float, default=20,
+                        help="Percentage of configurations with the best "
+                             "train performance for the second correlation")
+    parser.add_argument("--bootstrap", dest="bootstrap", type=int, default=0,
+                        help="Also show bootstrap confidence intervals of the "
+                             "correlations, computed from this many samples")
+    parser.add_argument("--confidence", dest="confidence", type=float,
+                        default=0.95, help="Level of the confidence intervals")
+    parser.add_argument("--correlation-report", dest="correlation_report",
+                        default=None,
+                        help="Also write the correlations to this file (.csv "
+                             "or .json), implies --correlation")
     parser.add_argument("--default", dest="default", default=False,
                         action="store_true",
                         help="If 'default' in name use different marker style")
@@ -91,52 +106,55 @@ def main():
         name_ls.append(base_name)
         value_dict[name_list[name]] = list()
         for fl in file_list[name]:
-            try:
-                data = read_util.read_validationObjectiveMatrix_file(fl)
+            file_format, data = read_util.read_file(fl)
+            if file_format not in ("objective_matrix", "trajectory"):
+                raise ValueError("%s is a %s file, only objective matrix "
+                                 "and trajectory files can be plotted" %
+                                 (fl, file_format))
+            if file_format == "objective_matrix":
                 assert args.cutoff is not None, "If reading Objective Matrix " \
                                                 "you  need to set --cutoff"
                 assert args.par is not None, "If reading Objective Matrix " \
                                              "you need to set --par"
-                perf = list()
-                for cf in data:
-                    row = np.array(data[cf])
-                    row[row >= args.cutoff] = args.par * args.cutoff
-                    perf.append(row)
-                perf = np.array(perf)
-                value_dict[name_list[name]].append(np.mean(perf, axis=0))
-                min_ = np.min((min_, np.min(np.mean(perf, axis=0))))
-                max_ = np.max((max_, np.max(np.mean(perf, axis=0))))
-            except ValueError:
-                print("Trying to read trajectory file")
-                data = read_util.read_trajectory_file(fl)
-                for entry in data:
-                    value_dict[name_list[name]].append(
-                            entry["Test Set Performance"])
-                    min_ = np.min((min_, entry["Test Set Performance"]))
-                    max_ = np.max((max_, entry["Test Set Performance"]))
-        value_dict[name_list[name]] = np.array(value_dict[name_list[name]]).ravel()
+                perf = data[1]
+                perf[perf >= args.cutoff] = args.par * args.cutoff
+                perf = np.mean(perf, axis=0)
+            else:
+                header, data = data
+                perf = data[:, header.index("Test Set Performance")]
+            value_dict[name_list[name]].append(perf)
+            if len(perf) > 0:
+                min_ = np.min((min_, np.min(perf)))
+                max_ = np.max((max_, np.max(perf)))
+        value_dict[name_list[name]] = np.concatenate(value_dict[name_list[name]])
         print(value_dict[name_list[name]].shape)
     name_ls = sorted(list(set(name_ls)))
 
     ################### Calculate correlation
-    if args.correlation:
+    if args.correlation or args.correlation_report is not None:
+        report_names = list()
         for base_name in name_ls:
             if len(value_dict[base_name + "_train"]) < 2:
                 print("% 15s has only one entry" % base_name)
                 continue
-
-            corr, pvalue = scipy.stats.spearmanr(
-                    value_dict[base_name + "_train"],
-                    value_dict[base_name + "_test"])
-            print("% 50s has a correlation of % 5g" % (base_name[:50], corr))
-
-            # Calc correlation for 20% best
-            idx = np.argsort(value_dict[base_name + "_train"])
-            idx = idx[:int(len(idx)*0.2)]
-            corr, pvalue = scipy.stats.spearmanr(
-                    value_dict[base_name + "_train"][idx],
-                    value_dict[base_name + "_test"][idx])
-            print("Top 20%% (% 3d) of % 33s has a correlation of % 5g" % (len(idx), base_name[:32], corr))
+            report_names.append(base_name)
+
+        # All groups at once, groups with the same size in one batch
+        report = rank_util.correlation_report(
+            report_names, [value_dict[b + "_train"] for b in report_names],
+            [value_dict[b + "_test"] for b in report_names],
+            topk=args.topk / 100., bootstrap_samples=args.bootstrap,
+            confidence=args.confidence)
+        if len(report) > 0:
+            fields = list(next(iter(report.values())))
+            print(tabulate.tabulate(
+                [[name[:50]] + [row[f] for f in fields]
+                 for name, row in report.items()],
+                headers=["name"] + [f.replace("topk", "top%g%%" % args.topk)
+                                    for f in fields], floatfmt=".4g"))
+        if args.correlation_report is not None:
+            print("Write correlations to %s" % args.correlation_report)
+            export_util.write_correlations(args.correlation_report, report)
 
     ################### Plotting starts here
     ################### TODO: Put plotting code in separate script
@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+
+from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter
+from collections import OrderedDict
+
+import numpy as np
+
+from plottingscripts.utils import experiment, export_util, plot_util, \
+    read_util, summary
+import plottingscripts.plotting.plot_methods as plot_methods
+
+
+def main():
+    prog = "python plot_small_multiples.py --root <dir> " \
+           "--pattern '{dataset}/{strategy}/*ClassicValidationResults*.csv'"
+    description = "Plot the test performance of all strategies on all " \
+                  "datasets, one panel per dataset, into one figure"
+
+    parser = ArgumentParser(description=description, prog=prog,
+                            formatter_class=ArgumentDefaultsHelpFormatter)
+
+    # General Options
+    parser.add_argument("--root", dest="root", default=None, action="append",
+                        help="Search files below this directory (can be "
+                             "given more than once), default: .")
+    parser.add_argument("--pattern", dest="pattern", required=True,
+                        help="Glob pattern relative to --root with a "
+                             "{dataset} and a {strategy} placeholder")
+    parser.add_argument("--regex", dest="regex", default=False,
+                        action="store_true",
+                        help="--pattern is a regex with named groups")
+    parser.add_argument("--column", dest="column", default="test",
+                        choices=("train", "test"), help="Column to plot")
+    parser.add_argument("--logy", action="store_true", dest="logy",
+                        default=False, help="Plot y-axis on log scale")
+    parser.add_argument("--logx", action="store_true", dest="logx",
+                        default=False, help="Plot x-axis on log scale")
+    parser.add_argument("--ymax", dest="ymax", type=float,
+                        default=None, help="Maximum of the y-axis")
+    parser.add_argument("--ymin", dest="ymin", type=float,
+                        default=None, help="Minimum of the y-axis")
+    parser.add_argument("--xmax", dest="xmax", type=float,
+                        default=None, help="Maximum of the x-axis")
+    parser.add_argument("--xmin", dest="xmin", type=float,
+                        default=None, help="Minimum of the x-axis")
+    parser.add_argument("--ncols", dest="ncols", type=int, default=None,
+                        help="Panels per row, default: square grid")
+    parser.add_argument("--sharey", dest="sharey", default=False,
+                        action="store_true",
+                        help="Share the y-axis between all panels")
+    parser.add_argument("--timesteps", dest="timesteps", type=int,
+                        default=None,
+                        help="Align runs on this many (log-spaced if --logx) "
+                             "time steps instead of on all time stamps")
+    parser.add_argument("--dtype", dest="dtype", default="float64",
+                        choices=("float64", "float32"),
+                        help="Store the runs in this precision, float32 "
+                             "halves the memory (means are still "
+                             "accumulated in float64)")
+    parser.add_argument("--agglomeration", dest="agglomeration",
+                        default="mean", choices=("mean", "meanstderr",
+                                                 "median"),
+                        help="Aggregation over the runs of a strategy")
+    parser.add_argument("--maxvalue", dest="maxvalue", type=float,
+                        default=None, help="Replace all values higher than "
+                                           "this")
+    parser.add_argument("--workers", dest="workers", type=int, default=8,
+                        help="Number of files read in parallel")
+    parser.add_argument("--processes", dest="processes", type=int, default=1,
+                        help="Aggregate the runs in this many processes "
+                             "(passed through shared memory) instead of in "
+                             "one batched pass")
+    parser.add_argument("-s", "--save", dest="save", default="",
+                        help="Where to save plot instead of showing it?")
+    parser.add_argument("-t", "--title", dest="title",
+                        default=None, help="Optional supertitle for plot")
+    parser.add_argument("--xlabel", dest="xlabel",
+                        default="time [sec]", help="x label")
+    parser.add_argument("--ylabel", dest="ylabel",
+                        default="Minfunction value", help="y label")
+    export_util.add_export_arguments(
+        parser, what="plotted curves (named <dataset>/<strategy>)")
+
+    parser.add_argument("--style", dest="style", default=None,
+                        help="Style profile (%s) or path of a matplotlib "
+                             "style sheet, its sizes replace the defaults "
+                             "of the properties below" %
+                             ", ".join(plot_util.get_style_names()))
+    parser.add_argument("--usetex", dest="usetex", default=False,
+                        action="store_true",
+                        help="Render text with LaTeX instead of mathtext "
+                             "(much slower)")
+
+    # Properties
+    # We need this to show defaults for -h
+    defaults = plot_util.get_defaults()
+    for key in defaults:
+        parser.add_argument("--%s" % key, dest=key, default=None,
+                            help="%s, default: %s" % (key, str(defaults[key])))
+    args = parser.parse_args()
+
+    if args.data_only and args.export is None:
+        raise ValueError("--data-only needs --export")
+
+    # Properties which are not given default to the style profile, which is
+    # applied once for the whole process
+    defaults = plot_util.get_defaults(style=args.style)
+    if not args.data_only:
+        plot_util.use_style(args.style, usetex=args.usetex)
+
+    file_list, name_list = read_util.find_file_and_name_list(
+        roots=args.root or ["."], pattern=args.pattern,
+        name_groups=("dataset", "strategy"), regex=args.regex)
+    if len(file_list) == 0:
+        raise ValueError("No file matches %s" % args.pattern)
+    for (dataset, strategy), files in zip(name_list, file_list):
+        print("%20s %20s contains %d file(s)" %
+              (dataset, strategy, len(files)))
+
+    # Files of all datasets are read in parallel, runs keep their own time
+    # stamps
+    run_sets = experiment.load_run_sets(
+        file_list, [strategy for _, strategy in name_list],
+        num_workers=args.workers, columns=(args.column, ),
+        maxvalue=args.maxvalue, align=True, dtype=args.dtype)
+
+    # All strategies of a dataset on one time grid, runs are only resampled
+    # once (resampling a resampled run picks earlier values)
+    panels = OrderedDict()
+    for (dataset, _), run_set in zip(name_list, run_sets):
+        panels.setdefault(dataset, list()).append(run_set)
+    for dataset in panels:
+        panels[dataset] = experiment.align_run_sets(
+            panels[dataset], num_points=args.timesteps, log=args.logx)
+
+    # Aggregate all panels at once, then only draw
+    flat = [r for run_set_list in panels.values() for r in run_set_list]
+    if args.processes > 1:
+        summaries = iter(summary.summarize_parallel(
+            [r.times for r in flat], [r.column(args.column) for r in flat],
+            num_workers=args.processes))
+    else:
+        summaries = iter(summary.summarize_batch(
+            [r.times for r in flat], [r.column(args.column) for r in flat]))
+    # Only show time steps at which all runs of a strategy have started
+    summary_lists = [[s.subset(np.isfinite(s.mean)) for s in
+                      (next(summaries) for _ in run_set_list)]
+                     for run_set_list in panels.values()]
+
+    prop = {}
+    args_dict = vars(args)
+    for key in defaults:
+        prop[key] = args_dict[key]
+    prop = plot_util.fill_with_defaults(prop, style=args.style)
+
+    if args.export is not None:
+        print("Export curves to %s" % args.export)
+        curves = OrderedDict()
+        for dataset, run_set_list, summary_list in zip(panels, panels.values(),
+                                                       summary_lists):
+            for r, s in zip(run_set_list, summary_list):
+                curves["%s/%s" % (dataset, r.name)] = summary.compute_curve(
+                    None, s, agglomeration=args.agglomeration,
+                    num_points=prop["resample"], log=args.logx)
+        export_util.write_curves(args.export, curves)
+    if args.data_only:
+        return
+
+    fig = plot_methods.plot_small_multiples(
+        time_lists=[[s.times for s in summary_list]
+                    for summary_list in summary_lists],
+        performance_lists=summary_lists,
+        name_lists=[[r.name for r in run_set_list]
+                    for run_set_list in panels.values()],
+        panel_titles=list(panels), title=args.title, ncols=args.ncols,
+        sharey=args.sharey, properties=prop, xlabel=args.xlabel,
+        ylabel=args.ylabel, logy=args.logy, logx=args.logx, y_min=args.ymin,
+        y_max=args.ymax, x_min=args.xmin, x_max=args.xmax,
+        agglomeration=args.agglomeration)
+    if args.save != "":
+        print("Save plot to %s" % args.save)
+        plot_util.save_plot(fig, args.save, float(prop['dpi']))
+    else:
+        plot_util.show_plot(fig)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,16 @@
 #!/usr/bin/env python
 
 from argparse import ArgumentParser
+from collections import OrderedDict
 import sys
 import itertools
 
-from matplotlib.pyplot import figure, subplot, rc
 import matplotlib.gridspec
 import numpy as np
 
-from plottingscripts.utils import read_util, plot_util
+from plottingscripts.utils import read_util, plot_util, experiment
+from plottingscripts.utils import export_util
+import plottingscripts.utils.macros
 
 
 def plot_optimization_trace(times, performance_list, title, min_test, max_test,
@@ -16,8 +18,8 @@ def plot_optimization_trace(times, performance_list, title, min_test, max_test,
                             y_min=None, y_max=None,
                             x_min=None, x_max=None, ylabel="Loss",
                             properties=None):
-    # To use LaTeX
-    rc('text', usetex=True)
+    # pyplot is only needed (and imported) when drawing
+    from matplotlib.pyplot import figure, subplot
 
     # complete properties
     if properties is None:
@@ -27,7 +29,7 @@ def plot_optimization_trace(times, performance_list, title, min_test, max_test,
     properties["linestyles"] = plot_util.get_plot_linestyles()
 
     # Hack to not use black
-    properties["colors"].next()
+    next(properties["colors"])
 
     # Set up figure
     ratio = 5
@@ -42,9 +44,9 @@ def plot_optimization_trace(times, performance_list, title, min_test, max_test,
         fig.suptitle(title, fontsize=int(properties["titlefontsize"]))
 
     # set initial limits
-    auto_y_min = sys.maxint
-    auto_y_max = -sys.maxint
-    auto_x_min = sys.maxint
+    auto_y_min = np.inf
+    auto_y_max = -np.inf
+    auto_x_min = np.inf
 
     for idx, performance in enumerate(performance_list):
         if logy:
@@ -52,37 +54,31 @@ def plot_optimization_trace(times, performance_list, title, min_test, max_test,
             min_test[idx] = np.log10(min_test[idx])
             max_test[idx] = np.log10(max_test[idx])
 
-        color = properties["colors"].next()
-        marker = properties["markers"].next()
-        linestyle = properties["linestyles"].next()
+        color = next(properties["colors"])
+        marker = next(properties["markers"])
+        linestyle = next(properties["linestyles"])
 
         ax1.plot(times, performance, color=color,
-                 linewidth=int(properties["linewidth"]),
-                 markersize=int(properties["markersize"]),
+                 linewidth=float(properties["linewidth"]),
+                 markersize=float(properties["markersize"]),
                  linestyle=linestyle, marker=marker, label=name_list[idx])
         #ax1.fill_between(times, min_test[idx], max_test[idx], facecolor=color,
         #                 alpha=0.2, edgecolor="")
 
         # Get limits
         # For y_min we always take the lowest value
-        auto_y_min = min(min(min_test[idx]), auto_y_min)
+        auto_y_min = min(plot_util.value_range(min_test[idx],
+                                               max_test[idx])[0], auto_y_min)
 
         # For y_max we take the highest value after the test_on_best_train/test starts to change
-        init_per = performance[0]
-        init_up = max_test[idx][0]
-        init_lo = min_test[idx][0]
-        init_idx = 0
-        # Find out when test_on_best_train/test changes
-        while init_idx < len(performance) and init_per == performance[init_idx] and \
-                init_up == max_test[idx][init_idx] and init_lo == min_test[idx][init_idx]:
-            # stop when test_on_best_train/test changes
-            init_idx += 1
+        init_idx = plot_util.first_change(performance, max_test[idx],
+                                          min_test[idx])
 
         # Found the first change, but show two more points on the left side
         init_idx = max(0, init_idx-3)
-        if init_idx >= 0:
-            auto_x_min = min(times[init_idx], auto_x_min)
-        auto_y_max = max(max(max_test[idx][init_idx:]), auto_y_max)
+        auto_x_min = min(times[init_idx], auto_x_min)
+        auto_y_max = max(plot_util.value_range(min_test[idx], max_test[idx],
+                                               start=init_idx)[1], auto_y_max)
     auto_x_max = times[-1]
 
     # Label axes
@@ -101,7 +97,7 @@ def plot_optimization_trace(times, performance_list, title, min_test, max_test,
         ax1.set_ylim([y_min, auto_y_max + 0.01*abs(auto_y_max - y_min)])
     elif y_max is not None and y_min is None:
         ax1.set_ylim([auto_y_min - 0.01*abs(y_max - auto_y_min), y_max])
-    elif y_max > y_min and y_max is not None and y_min is not None:
+    elif y_max is not None and y_min is not None and y_max > y_min:
         ax1.set_ylim([y_min, y_max])
     else:
         ax1.set_ylim([auto_y_min-0.01*abs((auto_y_max - auto_y_min)),
@@ -111,7 +107,7 @@ def plot_optimization_trace(times, performance_list, title, min_test, max_test,
         ax1.set_xlim([x_min - 0.1*abs(x_min), auto_x_max + 0.1*abs(auto_x_max)])
     elif x_max is not None and x_min is None:
         ax1.set_xlim([auto_x_min - 0.1*abs(auto_x_min), x_max - 0.1*abs(x_max)])
-    elif x_max > x_min and x_max is not None and x_min is not None:
+    elif x_max is not None and x_min is not None and x_max > x_min:
         ax1.set_xlim([x_min, x_max])
     else:
         ax1.set_xlim([auto_x_min - 0.1*abs(auto_x_min),
@@ -124,10 +120,33 @@ def plot_optimization_trace(times, performance_list, title, min_test, max_test,
     return fig
 
 
-def get_test_of_best_train(train, test):
-    # get argmin of test performance and return test performance at this idx
-    idx = np.argmin(train, 0)
-    return [test[idx[row], row] for row in range(len(idx))]
+def get_test_of_best_train(train, test, cumulative=False):
+    """
+    For each time step return the test performance of the run with the best
+    train performance.
+
+    train, test: np.ndarray N x T
+        performance of N runs at T time steps
+    cumulative: bool
+        if True, use the incumbent over all runs and all time steps up to
+        now, i.e. the test performance only changes if the best train
+        performance seen so far improves
+    """
+    train = np.asarray(train)
+    test = np.asarray(test)
+    idx = np.argmin(train, axis=0)[np.newaxis]
+    best_train = np.take_along_axis(train, idx, axis=0)[0]
+    best_test = np.take_along_axis(test, idx, axis=0)[0]
+    if not cumulative:
+        return best_test
+
+    # Index of the time step at which the current incumbent was found
+    running_best = np.minimum.accumulate(best_train)
+    improved = np.ones(len(best_train), dtype=bool)
+    improved[1:] = best_train[1:] < running_best[:-1]
+    incumbent = np.maximum.accumulate(
+        np.where(improved, np.arange(len(best_train)), 0))
+    return best_test[incumbent]
 
 
 def main():
@@ -152,16 +171,41 @@ def main():
 
     parser.add_argument("-s", "--save", dest="save", default="",
                         help="Where to save plot instead of showing it?")
+    export_util.add_export_arguments(parser)
     parser.add_argument("-t", "--title", dest="title",
                         default="", help="Optional supertitle for plot")
     parser.add_argument("--maxvalue", dest="maxvalue", type=float,
-                        default=sys.maxint,
+                        default=plottingscripts.utils.macros.MAXINT,
                         help="Replace all values higher than this?")
     parser.add_argument("--ylabel", dest="ylabel", default="loss",
                         help="Label on y-axis")
+    parser.add_argument("--timesteps", dest="timesteps", type=int,
+                        default=None,
+                        help="Align runs on this many log-spaced time steps "
+                             "instead of on the union of all time steps")
+    parser.add_argument("--dtype", dest="dtype", default="float64",
+                        choices=("float64", "float32"),
+                        help="Store the runs in this precision, float32 "
+                             "halves the memory (means are still "
+                             "accumulated in float64)")
+    parser.add_argument("--cumulative", dest="cumulative", default=False,
+                        action="store_true",
+                        help="Plot test performance of the best train "
+                             "performance seen so far instead of the best "
+                             "train performance at each time step")
     parser.add_argument("-v", "--verbose", dest="verbose", action="store_true",
                         default=False, help="print number of runs on plot")
 
+    parser.add_argument("--style", dest="style", default=None,
+                        help="Style profile (%s) or path of a matplotlib "
+                             "style sheet, its sizes replace the defaults "
+                             "of the properties below" %
+                             ", ".join(plot_util.get_style_names()))
+    parser.add_argument("--usetex", dest="usetex", default=False,
+                        action="store_true",
+                        help="Render text with LaTeX instead of mathtext "
+                             "(much slower)")
+
     # Properties
     # We need this to show defaults for -h
     defaults = plot_util.get_defaults()
@@ -170,8 +214,17 @@ def main():
                             help="%s, default: %s" % (key, str(defaults[key])))
     args, unknown = parser.parse_known_args()
 
+    if args.data_only and args.export is None:
+        raise ValueError("--data-only needs --export")
+
+    # Properties which are not given default to the style profile, which is
+    # applied once for the whole process
+    defaults = plot_util.get_defaults(style=args.style)
+    if not args.data_only:
+        plot_util.use_style(args.style, usetex=args.usetex)
+
     if len(unknown) < 2:
-        print "To less arguments given"
+        print("To less arguments given")
         parser.print_help()
         sys.exit(1)
 
@@ -181,40 +234,25 @@ def main():
     file_list, name_list = read_util.get_file_and_name_list(unknown,
                                                             match_file='.csv')
     for idx in range(len(name_list)):
-        print "%20s contains %d file(s)" % (name_list[idx], len(file_list[idx]))
+        print("%20s contains %d file(s)" %
+              (name_list[idx], len(file_list[idx])))
 
     if args.verbose:
         name_list = [name_list[i] + " (" + str(len(file_list[i])) + ")" for i
                      in range(len(name_list))]
 
-    # Get data from csv
-    train_performance = list()
-    test_performance = list()
-    time_ = list()
-    for name in range(len(name_list)):
-        # We have a new experiment
-        train_performance.append(list())
-        test_performance.append(list())
-        for fl in file_list[name]:
-            _none, csv_data = read_util.read_csv(fl, has_header=True)
-            csv_data = np.array(csv_data)
-            # Replace too high values with args.maxint
-            train_performance[-1].append([min([args.maxvalue, float(i.strip())])
-                                          for i in csv_data[:, 1]])
-            test_performance[-1].append([min([args.maxvalue, float(i.strip())])
-                                         for i in csv_data[:, 2]])
-            time_.append([float(i.strip()) for i in csv_data[:, 0]])
-            # Check whether we have the same times for all runs
-            if len(time_) == 2:
-                if time_[0] == time_[1]:
-                    time_ = [time_[0], ]
-                else:
-                    raise NotImplementedError(".csv's do not use the same "
-                                              "timesteps")
-
-    train_performance = [np.array(i) for i in train_performance]
-    test_performance = [np.array(i) for i in test_performance]
-    time_ = np.array(time_).flatten()
+    # Get data from csv, on the time stamps of the runs
+    run_sets = experiment.load_run_sets(file_list, name_list,
+                                        columns=("train", "test"),
+                                        maxvalue=args.maxvalue,
+                                        align=True, dtype=args.dtype)
+    # All experiments are plotted on the same time steps, runs are only
+    # resampled once (resampling a resampled run picks earlier values)
+    run_sets = experiment.align_run_sets(run_sets, num_points=args.timesteps,
+                                         fill_value=args.maxvalue)
+    train_performance = [r.train for r in run_sets]
+    test_performance = [r.test for r in run_sets]
+    time_ = run_sets[0].times
 
     # Now get the test results for the best train performance
     # All arrays are numExp x numTrials
@@ -222,15 +260,27 @@ def main():
     min_test = list()
     max_test = list()
     for i in range(len(train_performance)):
-        test_of_best_train.append(get_test_of_best_train(train_performance[i],
-                                                         test_performance[i]))
+        test_of_best_train.append(get_test_of_best_train(
+            train_performance[i], test_performance[i],
+            cumulative=args.cumulative))
         min_test.append(np.min(test_performance[i], 0))
         max_test.append(np.max(test_performance[i], 0))
 
+    if args.export is not None:
+        # m is the test performance of the best train run, lower and upper
+        # the best and worst test performance
+        print("Export curves to %s" % args.export)
+        export_util.write_curves(args.export, OrderedDict(
+            (name, (time_, m, lower, upper)) for name, m, lower, upper in
+            zip(name_list, test_of_best_train, min_test, max_test)))
+    if args.data_only:
+        return
+
     prop = {}
     args_dict = vars(args)
     for key in defaults:
         prop[key] = args_dict[key]
+    prop = plot_util.fill_with_defaults(prop, style=args.style)
 
     fig = plot_optimization_trace(times=time_,
                                   performance_list=test_of_best_train,
@@ -241,10 +291,11 @@ def main():
                                   x_min=args.xmin, x_max=args.xmax,
                                   ylabel=args.ylabel)
     if args.save != "":
-        print "Save plot to %s" % args.save
-        plot_util.save_plot(fig, args.save, plot_util.get_defaults()['dpi'])
+        print("Save plot to %s" % args.save)
+        plot_util.save_plot(fig, args.save, float(prop['dpi']))
     else:
         fig.show()
 
+
 if __name__ == "__main__":
     main()
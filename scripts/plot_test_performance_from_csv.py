@@ -1,13 +1,15 @@
 #!/usr/bin/env python
 
 from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter
-import csv
 import itertools
 import sys
+import time
 import warnings
 
-from plottingscripts.utils.merge_test_performance_different_times import fill_trajectory
-from plottingscripts.utils import read_util, plot_util
+import numpy as np
+
+from plottingscripts.utils import read_util, plot_util, summary, experiment
+from plottingscripts.utils import export_util
 import plottingscripts.plotting.plot_methods as plot_methods
 
 
@@ -45,6 +47,39 @@ def main():
                         default="Minfunction value", help="y label")
     parser.add_argument("-v", "--verbose", dest="verbose", action="store_true", default=False,
                         help="print number of runs on plot")
+    parser.add_argument("--watch", dest="watch", type=float, default=None,
+                        help="Keep running and re-render the plot to --save "
+                             "every WATCH seconds if the files changed")
+    parser.add_argument("--dtype", dest="dtype", default="float64",
+                        choices=("float64", "float32"),
+                        help="Store the runs in this precision, float32 "
+                             "halves the memory (means are still "
+                             "accumulated in float64)")
+    export_util.add_export_arguments(parser)
+    parser.add_argument("--summarydir", dest="summarydir", default=None,
+                        help="Plot from the summary sidecars in this "
+                             "directory, sidecars which are missing or older "
+                             "than their files are (re)built first")
+    parser.add_argument("--root", dest="root", default=None, action="append",
+                        help="Search files below this directory instead of "
+                             "listing them (can be given more than once)")
+    parser.add_argument("--pattern", dest="pattern", default=None,
+                        help="Glob pattern relative to --root with a "
+                             "{strategy} placeholder, e.g. "
+                             "'{strategy}/*seed-{seed}*.csv'")
+    parser.add_argument("--regex", dest="regex", default=False,
+                        action="store_true",
+                        help="--pattern is a regex with named groups")
+
+    parser.add_argument("--style", dest="style", default=None,
+                        help="Style profile (%s) or path of a matplotlib "
+                             "style sheet, its sizes replace the defaults "
+                             "of the properties below" %
+                             ", ".join(plot_util.get_style_names()))
+    parser.add_argument("--usetex", dest="usetex", default=False,
+                        action="store_true",
+                        help="Render text with LaTeX instead of mathtext "
+                             "(much slower)")
 
     # Properties
     # We need this to show defaults for -h
@@ -54,59 +89,94 @@ def main():
                             help="%s, default: %s" % (key, str(defaults[key])))
     args, unknown = parser.parse_known_args()
 
+    if args.data_only and args.export is None:
+        raise ValueError("--data-only needs --export")
+
+    # Properties which are not given default to the style profile, which is
+    # applied once for the whole process
+    defaults = plot_util.get_defaults(style=args.style)
+    if not args.data_only:
+        plot_util.use_style(args.style, usetex=args.usetex)
+
     sys.stdout.write("\nFound " + str(len(unknown)) + " arguments\n")
 
-    if len(unknown) < 2:
+    if len(unknown) < 2 and args.pattern is None:
         print("To less arguments given")
         parser.print_help()
         sys.exit(1)
 
     # Get files and names
-    file_list, name_list = read_util.get_file_and_name_list(unknown, match_file='.csv')
+    if args.pattern is not None:
+        file_list, name_list = read_util.find_file_and_name_list(
+            roots=args.root or ["."], pattern=args.pattern,
+            name_groups=("strategy", ), regex=args.regex)
+    else:
+        file_list, name_list = read_util.get_file_and_name_list(
+            unknown, match_file='.csv')
     for idx in range(len(name_list)):
         print("%20s contains %d file(s)" % (name_list[idx], len(file_list[idx])))
 
+    prop = {}
+    args_dict = vars(args)
+    for key in defaults:
+        prop[key] = args_dict[key]
+    prop = plot_util.fill_with_defaults(prop, style=args.style)
+
+    if args.watch is not None:
+        watch(args, file_list, name_list, prop)
+        return
+
     times = list()
     performances = list()
-    for idx, name in enumerate(name_list):
-        trajectories = []
-        times_ = []
+    column_idx = experiment.CLASSIC_VALIDATION_COLUMNS
+    if args.summarydir is None:
+        # Reads the files of all experiments in parallel
+        data_lists = read_util.prefetch_file_list(
+            file_list, usecols=(column_idx["time"], column_idx["test"]))
+    else:
+        data_lists = itertools.repeat(None)
+    for idx, (name, data_list) in enumerate(zip(name_list, data_lists)):
+        if args.summarydir is not None:
+            fn = summary.get_summary_filename(args.summarydir, name)
+            s = summary.load_or_build_summary(fn, file_list[idx],
+                                              dtype=args.dtype)
+            times.append(s.times)
+            performances.append(s)
+            continue
+
         print("Processing %s" % name)
-        for csv_file in file_list[idx]:
-            # print(file_list[idx][0])
-            fh = open(csv_file, 'r')
-            reader = csv.reader(fh)
-            p = list()
-            t = list()
-            for i, row in enumerate(reader):
-                if i == 0:
-                    continue
-                if float(row[0]) < 0:
-                    warnings.warn('Found time stamp < 0 in file %s' % csv_file)
-                    continue
-                t.append(float(row[0]))
-                p.append(float(row[2]))
-
-            if len(t) == 0:
+        files = list()
+        runs = list()
+        for csv_file, (_header, data) in zip(file_list[idx], data_list):
+            if np.any(data[:, 0] < 0):
+                warnings.warn('Found time stamp < 0 in file %s' % csv_file)
+                data = data[data[:, 0] >= 0]
+            if len(data) == 0:
                 print('Found empty file %s' % csv_file)
                 continue
-
-            times_.append(t)
-            trajectories.append(p)
-        trajectories, times_ = fill_trajectory(trajectories, times_)
-
-        times.append(times_)
-        performances.append(trajectories.transpose())
+            files.append(csv_file)
+            runs.append(data)
+        # Runs are aligned on the union of their time stamps, only time
+        # steps at which all runs have started are shown
+        run_set = experiment.RunSet.from_arrays(name, files, runs,
+                                                columns=("test", ),
+                                                align=True, dtype=args.dtype)
+        keep = np.isfinite(run_set.test).all(axis=0)
+        times.append(run_set.times[keep])
+        performances.append(run_set.test[:, keep])
 
     # Sort names alphabetical as done here:
     # http://stackoverflow.com/questions/15610724/sorting-multiple-lists-in-python-based-on-sorting-of-a-single-list
     sorted_lists = sorted(zip(name_list, times, performances), key=lambda x: x[0])
     name_list, times, performances = [[x[i] for x in sorted_lists] for i in range(3)]
 
-    prop = {}
-    args_dict = vars(args)
-    for key in defaults:
-        prop[key] = args_dict[key]
+    if args.export is not None:
+        print("Export curves to %s" % args.export)
+        export_util.write_curves(args.export, export_util.compute_curves(
+            name_list, times, performances, agglomeration="mean",
+            scale_std=1, num_points=prop["resample"], log=args.logx))
+    if args.data_only:
+        return
 
     fig = plot_methods.plot_optimization_trace_mult_exp(time_list=times,
                                                         performance_list=performances,
@@ -124,9 +194,45 @@ def main():
                                                         scale_std=1)
     if args.save != "":
         print("Save plot to %s" % args.save)
-        plot_util.save_plot(fig, args.save, plot_util.get_defaults()['dpi'])
+        plot_util.save_plot(fig, args.save, float(prop['dpi']))
     else:
-        fig.show()
+        plot_util.show_plot(fig)
+
+
+def watch(args, file_list, name_list, prop):
+    if args.save == "":
+        raise ValueError("--watch needs --save")
+    watched = [summary.IncrementalSummary(files, column=2)
+               for files in file_list]
+    order = sorted(range(len(name_list)), key=lambda i: name_list[i])
+    while True:
+        # Only parse new rows and only render if there were any
+        if any([w.poll() for w in watched]):
+            summaries = [watched[i].summary() for i in order]
+            # Only show time steps at which all runs have started
+            summaries = [s.subset(np.isfinite(s.mean)) for s in summaries
+                         if s is not None]
+            if len(summaries) < len(order) or \
+                    any(len(s.times) == 0 for s in summaries):
+                print("Waiting for all runs to start")
+                time.sleep(args.watch)
+                continue
+            # The color, marker and linestyle cycles have to start anew
+            properties = dict(prop)
+            for key in ("colors", "markers", "linestyles"):
+                properties[key] = None
+            fig = plot_methods.plot_optimization_trace_mult_exp(
+                time_list=[s.times for s in summaries],
+                performance_list=summaries,
+                name_list=[name_list[i] for i in order], title=args.title,
+                ylabel=args.ylabel, xlabel=args.xlabel, logy=args.logy,
+                logx=args.logx, y_min=args.ymin, y_max=args.ymax,
+                x_min=args.xmin, x_max=args.xmax, properties=properties,
+                scale_std=1)
+            print("Save plot to %s" % args.save)
+            plot_util.save_plot(fig, args.save, float(prop['dpi']))
+        time.sleep(args.watch)
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+
+from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter
+import sys
+
+from plottingscripts.utils import read_util, summary
+
+
+def main():
+    prog = "python summarize.py <WhatIsThis> " \
+           "one/or/many/*ClassicValidationResults*.csv"
+    description = "Write mean, std, median and quartiles over all runs of " \
+                  "each experiment to a sidecar file, which can be plotted " \
+                  "without reading the runs again. Sidecars are only " \
+                  "rebuilt if one of their files changed."
+
+    parser = ArgumentParser(description=description, prog=prog,
+                            formatter_class=ArgumentDefaultsHelpFormatter)
+
+    parser.add_argument("-o", "--outdir", dest="outdir", default=".",
+                        help="Where to write the <WhatIsThis>%s files" %
+                             summary.SUMMARY_SUFFIX)
+    parser.add_argument("--column", dest="column", default=2, type=int,
+                        help="Column with the performance (starting at 0)")
+    parser.add_argument("--timesteps", dest="timesteps", type=int,
+                        default=None,
+                        help="Summarize on this many time steps instead of "
+                             "on the union of all time steps")
+    parser.add_argument("--linear", dest="linear", default=False,
+                        action="store_true",
+                        help="Use linearly instead of log-spaced time steps")
+    parser.add_argument("--dtype", dest="dtype", default="float64",
+                        choices=("float64", "float32"),
+                        help="Align the runs in this precision before "
+                             "summarizing them")
+    parser.add_argument("--force", dest="force", default=False,
+                        action="store_true",
+                        help="Rebuild sidecars even if nothing changed")
+    args, unknown = parser.parse_known_args()
+
+    if len(unknown) < 2:
+        print("To less arguments given")
+        parser.print_help()
+        sys.exit(1)
+
+    file_list, name_list = read_util.get_file_and_name_list(unknown,
+                                                            match_file='.csv')
+
+    # Sidecars built with other arguments are rebuilt
+    parameters = dict(column=args.column, num_points=args.timesteps,
+                      log=not args.linear, dtype=args.dtype)
+    for name, files in zip(name_list, file_list):
+        fn = summary.get_summary_filename(args.outdir, name)
+        if not args.force and summary.is_up_to_date(fn, files, **parameters):
+            print("%20s is up to date" % name)
+            continue
+        print("%20s summarize %d file(s) to %s" % (name, len(files), fn))
+        s = summary.build_summary(files, **parameters)
+        summary.write_summary(fn, s, files, **parameters)
+
+
+if __name__ == "__main__":
+    main()
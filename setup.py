@@ -8,12 +8,14 @@ setuptools.setup(
     description='Code to plot output of various AAD experiments',
     version='0.0.1dev',
     packages=setuptools.find_packages(),
+    package_data={"plottingscripts": ["styles/*.mplstyle"]},
     install_requires=["numpy",
-                      "scipy",
                       "matplotlib",
                       "pandas",
                       "tabulate"
                       ],
+    extras_require={"zstd": ["zstandard"],
+                    "arrow": ["pyarrow"]},
     test_requires=["mock"],
     test_suite='nose.collector',
     scripts=glob.glob(os.path.join('scripts', '*.py')),
@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from plottingscripts.utils import arrow_util, export_util, read_util
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+@unittest.skipIf(pyarrow is None, "needs pyarrow")
+class arrowUtilTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_read_array(self):
+        table = pyarrow.table({"Time": [0., 1., 2.], "Train": [3., 2., 1.],
+                               "Test": [4., 3., 2.]})
+        for suffix in (".parquet", ".arrow"):
+            fn = os.path.join(self.tmp_dir, "run" + suffix)
+            if suffix == ".parquet":
+                pyarrow.parquet.write_table(table, fn)
+            else:
+                with pyarrow.OSFile(fn, "wb") as sink:
+                    with pyarrow.ipc.new_file(sink, table.schema) as writer:
+                        writer.write_table(table)
+            header, data = read_util.read_csv_array(fn, usecols=(0, 2))
+            self.assertListEqual(header, ["Time", "Test"])
+            np.testing.assert_array_equal(data, [[0, 4], [1, 3], [2, 2]])
+            self.assertEqual(read_util.read_file(fn)[0], "trajectory")
+
+    def test_load_run_sets(self):
+        table = pyarrow.table({
+            "dataset": ["d1"] * 4 + ["d2"] * 2,
+            "strategy": ["smac", "smac", "smac", "smac", "rs", "rs"],
+            "seed": [1, 1, 2, 2, 1, 1],
+            "time": [0., 1., 0., 1., 0., 1.],
+            "test": [5., 4., 3., 2., 1., 0.]})
+        root = os.path.join(self.tmp_dir, "table")
+        pyarrow.parquet.write_to_dataset(table, root,
+                                         partition_cols=["dataset",
+                                                         "strategy"])
+        run_sets = arrow_util.load_run_sets(root, dataset="d1",
+                                            columns=("test", ))
+        self.assertEqual(len(run_sets), 1)
+        self.assertEqual(run_sets[0].name, "smac")
+        np.testing.assert_array_equal(run_sets[0].test, [[5, 4], [3, 2]])
+        run_sets = arrow_util.load_run_sets(root, by="dataset",
+                                            columns=("test", ))
+        self.assertListEqual([r.name for r in run_sets], ["d1", "d2"])
+
+    def test_load_run_sets_shared_seed(self):
+        # Runs of different strategies (and datasets) with the same seed are
+        # different runs
+        table = pyarrow.table({
+            "dataset": ["d1"] * 4 + ["d2"] * 2,
+            "strategy": ["smac", "smac", "rs", "rs", "smac", "smac"],
+            "seed": [1, 1, 1, 1, 1, 1],
+            "time": [0., 1., 0., 1., 0., 1.],
+            "test": [5., 4., 3., 2., 1., 0.]})
+        root = os.path.join(self.tmp_dir, "table")
+        pyarrow.parquet.write_to_dataset(table, root,
+                                         partition_cols=["dataset",
+                                                         "strategy"])
+        d1, d2 = arrow_util.load_run_sets(root, by="dataset",
+                                          columns=("test", ))
+        self.assertEqual(d1.num_runs, 2)
+        np.testing.assert_array_equal(d1.times, [0, 1])
+        np.testing.assert_array_equal(d1.test, [[3, 2], [5, 4]])
+        self.assertListEqual(d1.metadata["files"],
+                             ["dataset=d1/strategy=rs/seed=1",
+                              "dataset=d1/strategy=smac/seed=1"])
+        self.assertEqual(d2.num_runs, 1)
+
+        smac, = arrow_util.load_run_sets(root, strategy="smac",
+                                         columns=("test", ))
+        self.assertEqual(smac.num_runs, 2)
+        np.testing.assert_array_equal(smac.test, [[5, 4], [1, 0]])
+
+    def test_write_curves(self):
+        performance = np.array([[1., 2., 3.], [3., 4., 5.]])
+        for suffix in (".parquet", ".feather"):
+            fn = os.path.join(self.tmp_dir, "curves" + suffix)
+            arrow_util.write_curves(fn, export_util.compute_curves(
+                ["a", "b"], [[0, 1, 2], [0, 1, 2]],
+                [performance, performance * 2]))
+            table = arrow_util.read_table(fn, filters={"name": "b"})
+            np.testing.assert_array_equal(table.column("m").to_numpy(),
+                                          [4, 6, 8])
+            np.testing.assert_array_equal(table.column("lower").to_numpy(),
+                                          [2, 4, 6])
@@ -0,0 +1,99 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from plottingscripts.utils import experiment
+
+
+class experimentTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _write_run(self, fn, times, train, test):
+        fn = os.path.join(self.tmp_dir, fn)
+        with open(fn, "w") as fh:
+            fh.write('"Time","Training (Empirical) Performance",'
+                     '"Test Set Performance","AC Overhead Time"\n')
+            for t, trn, tst in zip(times, train, test):
+                fh.write("%g,%g,%g,0.5\n" % (t, trn, tst))
+        return fn
+
+    def test_from_files(self):
+        files = [self._write_run("run-1.csv", [0, 1, 2], [5, 4, 3], [6, 5, 4]),
+                 self._write_run("run-2.csv", [0, 1, 2], [7, 2, 1], [9, 3, 2])]
+        run_set = experiment.RunSet.from_files("exp", files, maxvalue=8)
+        self.assertEqual(run_set.num_runs, 2)
+        np.testing.assert_allclose(run_set.times, [0, 1, 2])
+        np.testing.assert_allclose(run_set.train, [[5, 4, 3], [7, 2, 1]])
+        np.testing.assert_allclose(run_set.test, [[6, 5, 4], [8, 3, 2]])
+        self.assertListEqual(run_set.metadata["files"], files)
+
+        # Columns are views on the values
+        run_set.test[0, 0] = 1
+        self.assertEqual(run_set.values[1, 0, 0], 1)
+
+        self.assertRaises(ValueError, run_set.column, "overhead")
+
+    def test_from_files_different_times(self):
+        files = [self._write_run("run-1.csv", [0, 1, 2], [5, 4, 3], [6, 5, 4]),
+                 self._write_run("run-2.csv", [0, 1.5, 2], [7, 2, 1],
+                                 [9, 3, 2])]
+        self.assertRaises(NotImplementedError, experiment.RunSet.from_files,
+                          "exp", files)
+
+    def test_init_shape_mismatch(self):
+        self.assertRaises(ValueError, experiment.RunSet, "exp",
+                          times=[0, 1], values=np.zeros((1, 2, 3)),
+                          columns=("test", ))
+        self.assertRaises(ValueError, experiment.RunSet, "exp",
+                          times=[0, 1, 2], values=np.zeros((1, 2, 3)),
+                          columns=("train", "test"))
+
+    def test_from_files_align(self):
+        files = [self._write_run("run-1.csv", [0, 1, 2], [5, 4, 3], [6, 5, 4]),
+                 self._write_run("run-2.csv", [0, 1.5, 2], [7, 2, 1],
+                                 [9, 3, 2])]
+        run_set = experiment.RunSet.from_files("exp", files, align=True)
+        np.testing.assert_allclose(run_set.times, [0, 1, 1.5, 2])
+        np.testing.assert_allclose(run_set.test, [[6, 5, 5, 4], [9, 9, 3, 2]])
+
+        # An empty file is a run which never started
+        empty = self._write_run("run-3.csv", [], [], [])
+        run_set = experiment.RunSet.from_files("exp", files + [empty],
+                                               align=True, maxvalue=8)
+        np.testing.assert_allclose(run_set.test[2], [8, 8, 8, 8])
+
+        run_set = experiment.RunSet.from_files("exp", files, num_points=3,
+                                               log=False)
+        np.testing.assert_allclose(run_set.times, [0, 1, 2])
+        np.testing.assert_allclose(run_set.test, [[6, 5, 4], [9, 9, 2]])
+
+    def test_from_files_float32(self):
+        files = [self._write_run("run-1.csv", [0, 1, 2], [5, 4, 3], [6, 5, 4]),
+                 self._write_run("run-2.csv", [0, 1.5, 2], [7, 2, 1],
+                                 [9, 3, 2])]
+        run_set = experiment.RunSet.from_files("exp", files, align=True,
+                                               maxvalue=8, dtype=np.float32)
+        self.assertEqual(run_set.values.dtype, np.float32)
+        self.assertEqual(run_set.times.dtype, np.float64)
+        np.testing.assert_allclose(run_set.test, [[6, 5, 5, 4], [8, 8, 3, 2]])
+        run_set = run_set.reindex([0, 2])
+        self.assertEqual(run_set.values.dtype, np.float32)
+
+    def test_align_run_sets(self):
+        a = experiment.RunSet("a", times=[0, 2], values=[[[1, 2]]],
+                              columns=("test", ))
+        b = experiment.RunSet("b", times=[1, 3], values=[[[3, 4]]],
+                              columns=("test", ))
+        a, b = experiment.align_run_sets([a, b], fill_value=10)
+        np.testing.assert_allclose(a.times, [0, 1, 2, 3])
+        np.testing.assert_allclose(b.times, [0, 1, 2, 3])
+        np.testing.assert_allclose(a.test, [[1, 1, 2, 2]])
+        np.testing.assert_allclose(b.test, [[10, 3, 3, 4]])
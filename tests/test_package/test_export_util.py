@@ -0,0 +1,85 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from plottingscripts.utils import export_util, rank_util, summary
+
+
+class exportUtilTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        performance = np.array([[1., 2., 3.], [3., 4., 5.]])
+        self.curves = export_util.compute_curves(
+            ["a", "b"], [[0, 1, 2], [0, 1, 2]],
+            [performance, summary.Summary.from_performance(
+                [0, 1, 2], performance * 2)])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_compute_curves(self):
+        self.assertListEqual(list(self.curves), ["a", "b"])
+        times, m, lower, upper = self.curves["b"]
+        np.testing.assert_array_equal(times, [0, 1, 2])
+        np.testing.assert_array_equal(m, [4, 6, 8])
+        np.testing.assert_array_equal(lower, [2, 4, 6])
+        np.testing.assert_array_equal(upper, [6, 8, 10])
+
+    def test_write_curves(self):
+        fn = os.path.join(self.tmp_dir, "curves.csv")
+        export_util.write_curves(fn, self.curves)
+        with open(fn) as fh:
+            rows = list(csv.reader(fh))
+        self.assertListEqual(rows[0], ["name", "time", "m", "lower", "upper"])
+        self.assertListEqual(rows[4], ["b", "0.0", "4.0", "2.0", "6.0"])
+
+        fn = os.path.join(self.tmp_dir, "curves.npz")
+        export_util.write_curves(fn, self.curves)
+        with np.load(fn) as data:
+            np.testing.assert_array_equal(data["a/m"], [2, 3, 4])
+
+        fn = os.path.join(self.tmp_dir, "curves.json")
+        export_util.write_curves(fn, self.curves)
+        with open(fn) as fh:
+            data = json.load(fh)
+        self.assertListEqual(data["b"]["upper"], [6, 8, 10])
+
+        self.assertRaises(ValueError, export_util.write_curves,
+                          os.path.join(self.tmp_dir, "curves.txt"),
+                          self.curves)
+
+    def test_write_ranking(self):
+        fn = os.path.join(self.tmp_dir, "ranks.json")
+        export_util.write_ranking(fn, ["e1", "e2"], ["d1"], [0, 1],
+                                  [[[1, 1.5]], [[2, 1.5]]])
+        with open(fn) as fh:
+            data = json.load(fh)
+        self.assertListEqual(data["time"], [0, 1])
+        self.assertListEqual(data["rank"]["e2"]["d1"], [2, 1.5])
+
+    def test_write_correlations(self):
+        report = rank_util.correlation_report(
+            ["a", "b"], [[1, 2, 3, 4, 5], [1, 2, 3]],
+            [[1, 3, 2, 4, 5], [3, 2, 1]])
+        fn = os.path.join(self.tmp_dir, "correlations.csv")
+        export_util.write_correlations(fn, report)
+        with open(fn) as fh:
+            rows = list(csv.reader(fh))
+        self.assertListEqual(rows[0], ["name", "n", "spearman", "kendall",
+                                       "topk_n", "topk_spearman",
+                                       "topk_kendall"])
+        self.assertListEqual(rows[1][:4], ["a", "5", "0.9", "0.8"])
+        self.assertEqual(rows[2][3], "-1.0")
+
+        fn = os.path.join(self.tmp_dir, "correlations.json")
+        export_util.write_correlations(fn, report)
+        with open(fn) as fh:
+            data = json.load(fh)
+        self.assertAlmostEqual(data["a"]["spearman"], 0.9)
+        self.assertTrue(np.isnan(data["b"]["topk_spearman"]))
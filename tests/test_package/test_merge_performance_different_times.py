@@ -2,6 +2,8 @@ import os
 import sys
 import unittest
 
+import numpy as np
+
 sys.path.append(os.path.join(__file__, "../plottingscripts"))
 import plottingscripts.utils.merge_test_performance_different_times as mdt
 
@@ -84,4 +86,84 @@ class plotUtilTest(unittest.TestCase):
         time = [[1, 2, 3, 4]]
         v, t = mdt.fill_trajectory(performance_list=value, time_list=time)
         self.assertEqual(v.shape, (1, 4))
-        self.assertEqual(t.shape, (4, ))
\ No newline at end of file
+        self.assertEqual(t.shape, (4, ))
+
+    def test_align_trajectories(self):
+        time_a = [0.5, 1, 2, 3, 4]
+        value_a = [10, 9, 8, 7, 6]
+        time_b = [0.5, 2.5, 3]
+        value_b = [5, 4, 2]
+        v, t = mdt.align_trajectories(performance_list=(value_a, value_b),
+                                      time_list=(time_a, time_b))
+        np.testing.assert_array_equal(t, [0.5, 1, 2, 2.5, 3, 4])
+        np.testing.assert_array_equal(v, [[10, 5], [9, 5], [8, 5], [8, 4],
+                                          [7, 2], [6, 2]])
+
+        # Not starting at the same time
+        time_b = [100, 110, 111]
+        self.assertRaises(ValueError, mdt.align_trajectories,
+                          performance_list=(value_a, value_b),
+                          time_list=(time_a, time_b))
+        v, t = mdt.align_trajectories(performance_list=(value_a, value_b),
+                                      time_list=(time_a, time_b),
+                                      replace_nan=1)
+        self.assertListEqual([1.0] * 5 + [5.0, 4.0, 2.0], list(v[:, 1]))
+
+        self.assertRaisesRegex(ValueError, "Array length mismatch",
+                               mdt.align_trajectories,
+                               performance_list=([1], value_b),
+                               time_list=(time_a, time_b))
+
+    def test_align_trajectories_on_grid(self):
+        time_a = [0, 1, 10, 100]
+        value_a = [4, 3, 2, 1]
+        grid = mdt.get_time_grid([time_a], num_points=4, log=True)
+        np.testing.assert_allclose(grid, [0, 1, 10, 100])
+        grid = mdt.get_time_grid([time_a], num_points=3, log=False)
+        np.testing.assert_allclose(grid, [0, 50, 100])
+
+        v, t = mdt.align_trajectories(performance_list=(value_a, ),
+                                      time_list=(time_a, ), grid=[0, 5, 200])
+        self.assertListEqual([4, 3, 1], list(v[:, 0]))
+
+        v, t = mdt.align_trajectories(performance_list=(value_a, ),
+                                      time_list=(time_a, ), grid=[0, 5, 200],
+                                      dtype=np.float32)
+        self.assertEqual(v.dtype, np.float32)
+        self.assertEqual(t.dtype, np.float64)
+        self.assertListEqual([4, 3, 1], list(v[:, 0]))
+
+    def test_resample_trajectory(self):
+        time_ = np.arange(1, 1001, dtype=np.float64)
+        performance = np.vstack((1000 - time_, 2000 - time_))
+        t, p = mdt.resample_trajectory(time_, performance, num_points=4,
+                                       log=True)
+        np.testing.assert_allclose(t, [1, 10, 100, 1000])
+        np.testing.assert_allclose(p, [[999, 990, 900, 0],
+                                       [1999, 1990, 1900, 1000]])
+
+        # Value at or before the grid point
+        t, p = mdt.resample_trajectory([0, 1, 3], [5, 4, 3], num_points=2,
+                                       log=False)
+        np.testing.assert_allclose(t, [0, 3])
+        np.testing.assert_allclose(p, [5, 3])
+
+        # Nothing to do
+        t, p = mdt.resample_trajectory(time_, performance, num_points=1000)
+        self.assertIs(p, performance)
+
+    def test_compress_flat_segments(self):
+        time_ = [0, 1, 2, 3, 4, 5, 6]
+        line_a = [5, 5, 5, 4, 4, 4, 4]
+        line_b = [3, 3, 3, 3, 3, 2, 2]
+        t, a = mdt.compress_flat_segments(time_, line_a)
+        self.assertListEqual([0, 2, 3, 6], list(t))
+        self.assertListEqual([5, 5, 4, 4], list(a))
+
+        t, a, b = mdt.compress_flat_segments(time_, line_a, line_b)
+        self.assertListEqual([0, 2, 3, 4, 5, 6], list(t))
+        self.assertListEqual([5, 5, 4, 4, 4, 4], list(a))
+        self.assertListEqual([3, 3, 3, 3, 2, 2], list(b))
+
+        t, a = mdt.compress_flat_segments([], [])
+        self.assertEqual(len(t), 0)
@@ -0,0 +1,105 @@
+from concurrent.futures import ThreadPoolExecutor
+import io
+import unittest
+
+import matplotlib
+from matplotlib.figure import Figure
+import numpy as np
+
+import plottingscripts.plotting.plot_methods as plot_methods
+from plottingscripts.utils import plot_util
+
+# Figures are rendered without a display
+matplotlib.use("Agg")
+
+
+def render(seed):
+    rng = np.random.RandomState(seed)
+    performance = np.cumsum(rng.rand(3, 20), axis=1)
+    fig = plot_methods.plot_optimization_trace_mult_exp(
+        time_list=[np.arange(20)], performance_list=[performance],
+        name_list=["run_%d" % seed], title="seed %d" % seed)
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png")
+    return buf.getvalue()
+
+
+class plotMethodsTest(unittest.TestCase):
+
+    def test_new_figure_per_call(self):
+        performance = np.array([[3., 2., 1.], [4., 3., 2.]])
+        fig1 = plot_methods.plot_optimization_trace_mult_exp(
+            time_list=[[0, 1, 2]], performance_list=[performance],
+            name_list=["a"])
+        fig2 = plot_methods.plot_optimization_trace_mult_exp(
+            time_list=[[0, 1, 2]], performance_list=[performance],
+            name_list=["a"])
+        self.assertIsNot(fig1, fig2)
+        self.assertEqual(len(fig1.axes), 1)
+        self.assertEqual(len(fig1.axes[0].lines), 1)
+
+    def test_style_linewidth(self):
+        # The slides profile uses lines of width 2.5
+        performance = np.array([[3., 2., 1.], [4., 3., 2.]])
+        fig = plot_methods.plot_optimization_trace_mult_exp(
+            time_list=[[0, 1, 2]], performance_list=[performance],
+            name_list=["a"],
+            properties=plot_util.get_defaults(style="slides"))
+        self.assertEqual(fig.axes[0].lines[0].get_linewidth(), 2.5)
+
+    def test_draw_into_ax(self):
+        fig = Figure()
+        axes = fig.subplots(1, 2)
+        performance = np.array([[3., 2., 1.], [4., 3., 2.]])
+        for ax in axes:
+            ret = plot_methods.plot_optimization_trace_mult_exp(
+                time_list=[[0, 1, 2]], performance_list=[performance],
+                name_list=["a"], title="panel", ax=ax)
+            self.assertIs(ret, fig)
+        self.assertEqual([len(ax.lines) for ax in axes], [1, 1])
+        self.assertEqual(axes[1].get_title(), "panel")
+
+    def test_small_multiples(self):
+        performance = np.array([[3., 2., 1.], [4., 3., 2.]])
+        fig = plot_methods.plot_small_multiples(
+            time_lists=[[[0, 1, 2]] * 2, [[0, 1, 2]], [[0, 1, 2]] * 2],
+            performance_lists=[[performance, performance + 1],
+                               [performance], [performance + 1, performance]],
+            name_lists=[["a", "b"], ["b"], ["b", "a"]],
+            panel_titles=["d1", "d2", "d3"], title="all")
+        # 2 x 2 grid, the unused panel is removed
+        self.assertEqual(len(fig.axes), 3)
+        self.assertEqual([ax.get_title() for ax in fig.axes],
+                         ["d1", "d2", "d3"])
+        colors = dict()
+        for ax in fig.axes:
+            self.assertIsNone(ax.get_legend())
+            for line in ax.lines:
+                colors.setdefault(line.get_label(), set()).add(
+                    line.get_color())
+        self.assertEqual(len(colors["a"]), 1)
+        self.assertEqual(len(colors["b"]), 1)
+        self.assertNotEqual(colors["a"], colors["b"])
+        self.assertEqual(len(fig.legends), 1)
+        self.assertEqual([t.get_text() for t in fig.legends[0].get_texts()],
+                         ["a", "b"])
+
+    def test_small_multiples_shared_limits(self):
+        fig = plot_methods.plot_small_multiples(
+            time_lists=[[[0, 10, 1000]], [[0, 1, 2]]],
+            performance_lists=[[np.array([[4., 2., 1.], [3., 2., 1.]])],
+                               [np.array([[104., 102., 101.]])]],
+            name_lists=[["a"], ["a"]], panel_titles=["d1", "d2"],
+            sharey=True)
+        for ax in fig.axes:
+            # All data of all panels is visible
+            self.assertLessEqual(ax.get_xlim()[0], 0)
+            self.assertGreaterEqual(ax.get_xlim()[1], 1000)
+            self.assertLessEqual(ax.get_ylim()[0], 1)
+            self.assertGreaterEqual(ax.get_ylim()[1], 104)
+
+    def test_render_in_threads(self):
+        serial = [render(seed) for seed in range(4)]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            parallel = list(pool.map(render, range(4)))
+        self.assertListEqual(serial, parallel)
@@ -1,6 +1,9 @@
 import itertools
 import unittest
 
+import matplotlib
+import numpy as np
+
 from plottingscripts.utils import plot_util
 
 
@@ -29,13 +32,13 @@ class plotUtilTest(unittest.TestCase):
 
     def test_get_defaults(self):
         defaults = plot_util.get_defaults()
-        print(defaults)
-        self.assertEqual(len(defaults), 12)
-        for key in ("linestyles", "colors", "markers", "markersize",
-                    "labelfontsize", "linewidth", "titlefontsize",
-                    "gridcolor", "gridalpha", "dpi", "legendsize",
-                    "ticklabelsize"):
-            self.assertTrue(key in defaults)
+        self.assertSetEqual(set(defaults),
+                            {"linestyles", "colors", "markers", "markersize",
+                             "labelfontsize", "linewidth", "titlefontsize",
+                             "gridcolor", "gridalpha", "dpi", "legendsize",
+                             "legendlocation", "ticklabelsize", "drawstyle",
+                             "incheswidth", "inchesheight", "loweryloglimit",
+                             "resample"})
 
     def test_fill_with_defaults(self):
         filled = plot_util.fill_with_defaults({})
@@ -51,6 +54,58 @@ class plotUtilTest(unittest.TestCase):
         filled = plot_util.fill_with_defaults({'thiskeydoesnotexist': 23})
         self.assertEqual(filled['thiskeydoesnotexist'], 23)
 
+    def test_style_defaults(self):
+        self.assertListEqual(plot_util.get_style_names(),
+                             ["paper", "slides", "web"])
+        paper = plot_util.get_defaults(style="paper")
+        slides = plot_util.get_defaults(style="slides")
+        self.assertLess(paper["labelfontsize"], slides["labelfontsize"])
+        self.assertEqual((paper["incheswidth"], paper["inchesheight"]),
+                         (5.0, 3.5))
+        self.assertEqual(paper["resample"], None)
+        filled = plot_util.fill_with_defaults({'linewidth': 7},
+                                              style="slides")
+        self.assertEqual(filled['linewidth'], 7)
+        self.assertEqual(filled['legendsize'], slides['legendsize'])
+        self.assertRaises(ValueError, plot_util.load_style, "nostyle")
+
+    def test_use_style(self):
+        try:
+            with matplotlib.rc_context():
+                plot_util.use_style("slides")
+                self.assertEqual(matplotlib.rcParams["axes.labelsize"], 18)
+                self.assertFalse(matplotlib.rcParams["text.usetex"])
+                # Applying the active style again does not touch rcParams
+                matplotlib.rcParams["axes.labelsize"] = 1
+                plot_util.use_style("slides")
+                self.assertEqual(matplotlib.rcParams["axes.labelsize"], 1)
+                plot_util.use_style("paper")
+                self.assertEqual(matplotlib.rcParams["axes.labelsize"], 9)
+        finally:
+            plot_util._active_style = None
+
+    def test_index_after(self):
+        times = np.array([0., 1., 2., 2., 5.])
+        self.assertEqual(plot_util.index_after(times, 0.5), 1)
+        self.assertEqual(plot_util.index_after(times, 2), 4)
+        self.assertEqual(plot_util.index_after(times, -1), 0)
+        # Nothing after x, show everything
+        self.assertEqual(plot_util.index_after(times, 5), 0)
+
+    def test_first_change(self):
+        self.assertEqual(plot_util.first_change([3, 3, 2, 1]), 2)
+        self.assertEqual(plot_util.first_change([3, 3, 3], [1, 1, 0]), 2)
+        self.assertEqual(plot_util.first_change([3, 3, 3], [1, 1, 1]), 3)
+
+    def test_value_range(self):
+        lower = np.array([np.NaN, 1., 0.5, 2.])
+        upper = np.array([np.NaN, 3., 1., 2.5])
+        self.assertEqual(plot_util.value_range(lower, upper), (0.5, 3.))
+        self.assertEqual(plot_util.value_range(lower, upper, start=3),
+                         (2., 2.5))
+        self.assertEqual(plot_util.value_range(lower, upper, start=4),
+                         (np.inf, -np.inf))
+
     @unittest.skip("'test_save_plot' not yet implemented")
     def test_save_plot(fig, save, dpi):
         pass
\ No newline at end of file
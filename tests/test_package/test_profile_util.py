@@ -0,0 +1,80 @@
+import unittest
+
+import numpy as np
+
+from plottingscripts.utils import profile_util
+from plottingscripts.plotting.profiles import plot_cumulative_distributions
+
+
+class profileUtilTest(unittest.TestCase):
+
+    def setUp(self):
+        # 4 instances x 3 solvers, solver 2 fails on instance 3
+        self.performance = np.array([[1., 2., 4.],
+                                     [3., 3., 1.],
+                                     [0., 0., 5.],
+                                     [2., 1., np.nan]])
+
+    def test_performance_ratios(self):
+        ratios = profile_util.performance_ratios(self.performance)
+        np.testing.assert_array_equal(ratios, [[1, 2, 4],
+                                               [3, 3, 1],
+                                               [1, 1, np.inf],
+                                               [2, 1, np.inf]])
+        ratios = profile_util.performance_ratios(self.performance,
+                                                 minvalue=1)
+        np.testing.assert_array_equal(ratios[2], [1, 1, 5])
+        # No solver solved the instance
+        np.testing.assert_array_equal(
+            profile_util.performance_ratios([[np.inf, np.nan]]),
+            [[np.inf, np.inf]])
+        self.assertRaises(ValueError, profile_util.performance_ratios,
+                          [[-1, 1]])
+
+    def test_ecdf(self):
+        values = np.array([[3, 1], [1, np.inf], [2, 2], [2, np.nan]])
+        fractions = profile_util.ecdf(values, [0, 1, 2, 2.5, 3, 10])
+        np.testing.assert_array_equal(fractions,
+                                      [[0, .25, .75, .75, 1, 1],
+                                       [0, .25, .5, .5, .5, .5]])
+        # Same as counting the values below each threshold
+        values = np.random.RandomState(1).rand(100, 3)
+        thresholds = np.linspace(0, 1, 17)
+        np.testing.assert_array_equal(
+            profile_util.ecdf(values, thresholds),
+            np.mean(values[:, :, None] <= thresholds, axis=0))
+
+    def test_get_thresholds(self):
+        values = np.array([[1, 3], [np.inf, 3], [0, 2]])
+        np.testing.assert_array_equal(
+            profile_util.get_thresholds(values, log=False), [0, 1, 2, 3])
+        np.testing.assert_array_equal(profile_util.get_thresholds(values),
+                                      [1, 2, 3])
+        thresholds = profile_util.get_thresholds(np.arange(1, 101),
+                                                 num_points=3)
+        np.testing.assert_allclose(thresholds, [1, 10, 100])
+        # Many instances, but only a few distinct ratios: no grid
+        values = np.tile([1, 1.5, 2, np.inf], 1000)
+        np.testing.assert_array_equal(
+            profile_util.get_thresholds(values, num_points=10), [1, 1.5, 2])
+
+    def test_performance_profile(self):
+        taus, fractions = profile_util.performance_profile(self.performance)
+        np.testing.assert_array_equal(taus, [1, 2, 3, 4])
+        np.testing.assert_array_equal(fractions, [[.5, .75, 1, 1],
+                                                  [.5, .75, 1, 1],
+                                                  [.25, .25, .25, .5]])
+        thresholds, fractions = profile_util.runtime_ecdf(self.performance,
+                                                          log=False)
+        np.testing.assert_array_equal(thresholds, [0, 1, 2, 3, 4, 5])
+        np.testing.assert_array_equal(fractions[2], [0, .25, .25, .25, .5,
+                                                     .75])
+
+    def test_plot_cumulative_distributions(self):
+        taus, fractions = profile_util.performance_profile(self.performance)
+        fig = plot_cumulative_distributions(taus, fractions,
+                                            ["a", "b", "c"], title="t",
+                                            logx=True)
+        ax = fig.axes[0]
+        self.assertEqual(len(ax.get_lines()), 3)
+        self.assertEqual(ax.get_xlim(), (1, 4))
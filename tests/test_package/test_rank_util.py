@@ -0,0 +1,129 @@
+import unittest
+
+import numpy as np
+
+from plottingscripts.utils import rank_util
+
+
+class rankUtilTest(unittest.TestCase):
+
+    def test_rankdata(self):
+        np.testing.assert_array_equal(rank_util.rankdata([3, 1, 2]),
+                                      [3, 1, 2])
+        # Ties get the average rank
+        np.testing.assert_array_equal(rank_util.rankdata([2, 1, 2, 2, 0]),
+                                      [4, 2, 4, 4, 1])
+        np.testing.assert_array_equal(rank_util.rankdata([]), [])
+
+    def test_rankdata_decimals(self):
+        a = [0.1000001, 0.1, 0.3]
+        np.testing.assert_array_equal(rank_util.rankdata(a), [2, 1, 3])
+        np.testing.assert_array_equal(rank_util.rankdata(a, decimals=5),
+                                      [1.5, 1.5, 3])
+
+    def test_rankdata_axis(self):
+        a = np.array([[3, 1, 1],
+                      [0, 5, 2]])
+        np.testing.assert_array_equal(rank_util.rankdata(a, axis=1),
+                                      [[3, 1.5, 1.5], [1, 3, 2]])
+        np.testing.assert_array_equal(rank_util.rankdata(a, axis=0),
+                                      [[2, 1, 1], [1, 2, 2]])
+        for axis in (0, 1, 2):
+            b = np.random.RandomState(axis).randint(0, 3, size=(3, 4, 5))
+            expected = np.apply_along_axis(rank_util.rankdata, axis, b)
+            np.testing.assert_array_equal(rank_util.rankdata(b, axis=axis),
+                                          expected)
+
+    def test_spearman(self):
+        x = np.array([1, 2, 3, 4, 5])
+        self.assertAlmostEqual(rank_util.spearman(x, x ** 3), 1)
+        self.assertAlmostEqual(rank_util.spearman(x, -x), -1)
+        # Same as scipy.stats.spearmanr([1, 2, 3, 4, 5], [5, 6, 7, 8, 7])
+        self.assertAlmostEqual(rank_util.spearman(x, [5, 6, 7, 8, 7]),
+                               0.8207826816681233)
+        self.assertTrue(np.isnan(rank_util.spearman(x, np.ones(5))))
+
+        batch = np.array([x, -x, x ** 2])
+        np.testing.assert_allclose(rank_util.spearman(batch, [x, x, x]),
+                                   [1, -1, 1])
+        np.testing.assert_allclose(
+            rank_util.spearman(batch.T, np.array([x, x, x]).T, axis=0),
+            [1, -1, 1])
+
+    def test_kendall(self):
+        x = np.array([1, 2, 3, 4, 5])
+        self.assertAlmostEqual(rank_util.kendall(x, x ** 3), 1)
+        self.assertAlmostEqual(rank_util.kendall(x, -x), -1)
+        # Same as scipy.stats.kendalltau([1, 2, 3, 4, 5], [5, 6, 7, 8, 7])
+        self.assertAlmostEqual(rank_util.kendall(x, [5, 6, 7, 8, 7]),
+                               0.7378647873726218)
+        self.assertTrue(np.isnan(rank_util.kendall(x, np.ones(5))))
+        np.testing.assert_allclose(
+            rank_util.kendall(np.array([x, -x]).T, np.array([x, x]).T,
+                              axis=0), [1, -1])
+        self.assertTrue(np.isnan(rank_util.kendall([1, np.nan, 3],
+                                                   [1, 2, 3])))
+
+    def test_kendall_ties(self):
+        # Same as counting concordant and discordant pairs directly
+        rs = np.random.RandomState(3)
+        for n in (2, 3, 8, 13):
+            x = rs.randint(0, 4, size=(5, n))
+            y = rs.randint(0, 4, size=(5, n))
+            for xi, yi, tau in zip(x, y, rank_util.kendall(x, y)):
+                sign_x = np.sign(xi[:, None] - xi[None, :])
+                sign_y = np.sign(yi[:, None] - yi[None, :])
+                untied = np.sum(sign_x != 0) * np.sum(sign_y != 0)
+                if untied == 0:
+                    self.assertTrue(np.isnan(tau))
+                else:
+                    expected = np.sum(sign_x * sign_y) / np.sqrt(untied)
+                    self.assertAlmostEqual(tau, expected)
+
+    def test_count_inversions(self):
+        self.assertEqual(rank_util._count_inversions([3, 1, 2]), 2)
+        self.assertEqual(rank_util._count_inversions([1, 1, 1]), 0)
+        self.assertEqual(rank_util._count_inversions([]), 0)
+        np.testing.assert_array_equal(
+            rank_util._count_inversions([[5, 4, 3, 2, 1], [1, 2, 2, 1, 0]]),
+            [10, 6])
+
+    def test_correlation_report(self):
+        rs = np.random.RandomState(1)
+        train = [rs.rand(n) for n in (10, 20, 10)]
+        test = [t + rs.rand(len(t)) for t in train]
+        report = rank_util.correlation_report(["a", "b", "c"], train, test,
+                                              topk=0.5)
+        self.assertListEqual(list(report), ["a", "b", "c"])
+        for (name, row), tr, te in zip(report.items(), train, test):
+            self.assertEqual(row["n"], len(tr))
+            self.assertAlmostEqual(row["spearman"],
+                                   rank_util.spearman(tr, te))
+            self.assertAlmostEqual(row["kendall"], rank_util.kendall(tr, te))
+            best = np.argsort(tr)[:len(tr) // 2]
+            self.assertEqual(row["topk_n"], len(best))
+            self.assertAlmostEqual(row["topk_kendall"],
+                                   rank_util.kendall(tr[best], te[best]))
+
+        report = rank_util.correlation_report(["a", "b", "c"], train, test,
+                                              bootstrap_samples=50)
+        for row in report.values():
+            self.assertLessEqual(row["spearman_lower"], row["spearman_upper"])
+            self.assertLessEqual(row["kendall_lower"], row["kendall"])
+            self.assertGreaterEqual(row["kendall_upper"], row["kendall"])
+        # Too few values for the top 20%
+        self.assertEqual(report["a"]["topk_n"], 2)
+        self.assertTrue(np.isnan(
+            rank_util.correlation_report(["x"], [[1., 2.]], [[2., 1.]])
+            ["x"]["topk_spearman"]))
+
+        # Chunking the resamples does not change the intervals
+        chunked = rank_util.correlation_report(
+            ["a", "b", "c"], train, test, bootstrap_samples=50,
+            max_elements=1)
+        for row, chunked_row in zip(report.values(), chunked.values()):
+            for key in row:
+                np.testing.assert_allclose(chunked_row[key], row[key])
+
+        with self.assertRaises(ValueError):
+            rank_util.correlation_report(["x"], [[1, 2]], [[1, 2, 3]])
@@ -0,0 +1,227 @@
+import bz2
+import gzip
+import lzma
+import os
+import shutil
+import tarfile
+import tempfile
+import time
+import unittest
+import unittest.mock
+import zipfile
+
+import numpy as np
+
+from plottingscripts.utils import read_util
+
+
+TRAJECTORY = '"Time","Training (Empirical) Performance",' \
+             '"Test Set Performance","Configuration..."\n' \
+             '0.0,10.0,11.0,"x=\'1\', y=\'2\'"\n' \
+             '5.5,8.0,9.0,"x=\'3\', y=\'4\'"\n'
+
+OBJECTIVE_MATRIX = '"Instance","Seed","Objective of validation config #1",' \
+                   '"Objective of validation config #2"\n' \
+                   '"inst_a",1,1.5,2.5\n' \
+                   '"inst_b",1,3.0,4.0\n'
+
+
+class readUtilTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.traj_fn = os.path.join(self.tmp_dir, "traj.csv")
+        self.obj_fn = os.path.join(self.tmp_dir, "obj.csv")
+        with open(self.traj_fn, "w") as fh:
+            fh.write(TRAJECTORY)
+        with open(self.obj_fn, "w") as fh:
+            fh.write(OBJECTIVE_MATRIX)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_detect_file_format(self):
+        self.assertEqual(read_util.detect_file_format(self.traj_fn),
+                         "trajectory")
+        self.assertEqual(read_util.detect_file_format(self.obj_fn),
+                         "objective_matrix")
+
+    def test_read_file(self):
+        file_format, (header, data) = read_util.read_file(self.traj_fn)
+        self.assertEqual(file_format, "trajectory")
+        self.assertListEqual(header, ["Time",
+                                      "Training (Empirical) Performance",
+                                      "Test Set Performance"])
+        np.testing.assert_allclose(data, [[0, 10, 11], [5.5, 8, 9]])
+
+        file_format, (instances, data) = read_util.read_file(self.obj_fn)
+        self.assertEqual(file_format, "objective_matrix")
+        self.assertListEqual(instances, ["inst_a", "inst_b"])
+        np.testing.assert_allclose(data, [[1.5, 2.5], [3, 4]])
+
+    def test_read_trajectory_file(self):
+        data = read_util.read_trajectory_file(self.traj_fn)
+        self.assertEqual(len(data), 2)
+        self.assertEqual(data[1]["Test Set Performance"], 9.0)
+
+    def test_read_validationObjectiveMatrix_file(self):
+        data = read_util.read_validationObjectiveMatrix_file(self.obj_fn)
+        self.assertListEqual(list(data.keys()), ["inst_a", "inst_b"])
+        self.assertListEqual(data["inst_b"], [3.0, 4.0])
+
+    def test_find_file_and_name_list(self):
+        for dataset in ("d1", "d2"):
+            for strategy in ("random", "smac"):
+                os.makedirs(os.path.join(self.tmp_dir, dataset, strategy))
+                for seed in (1, 2):
+                    fn = os.path.join(self.tmp_dir, dataset, strategy,
+                                      "run_seed-%d.csv" % seed)
+                    shutil.copy(self.traj_fn, fn)
+
+        file_list, name_list = read_util.find_file_and_name_list(
+            roots=[self.tmp_dir], pattern="{dataset}/{strategy}/*.csv")
+        self.assertListEqual(name_list, [["d1", "random"], ["d1", "smac"],
+                                         ["d2", "random"], ["d2", "smac"]])
+        self.assertEqual([len(f) for f in file_list], [2, 2, 2, 2])
+        self.assertTrue(file_list[1][0].endswith(
+            os.path.join("d1", "smac", "run_seed-1.csv")))
+
+        file_list, name_list = read_util.find_file_and_name_list(
+            roots=[self.tmp_dir], pattern="**/{strategy}/run_seed-{seed}.csv")
+        self.assertListEqual(name_list, ["random", "smac"])
+        self.assertEqual([len(f) for f in file_list], [4, 4])
+
+        file_list, name_list = read_util.find_file_and_name_list(
+            roots=[self.tmp_dir], regex=True,
+            pattern=r"(?P<dataset>d1)/(?P<strategy>\w+)/run_seed-1\.csv$")
+        self.assertListEqual(name_list, [["d1", "random"], ["d1", "smac"]])
+        self.assertEqual([len(f) for f in file_list], [1, 1])
+
+    def test_tail_reader(self):
+        fn = os.path.join(self.tmp_dir, "growing.csv")
+        reader = read_util.TailReader(usecols=(0, 2))
+        with open(fn, "w") as fh:
+            fh.write("Time,Train,Test\n0,1,2\n1,1,")
+        np.testing.assert_array_equal(reader.read(fn), [[0, 2]])
+        # The incomplete line is only parsed once it is finished
+        with open(fn, "a") as fh:
+            fh.write("1.5\n2,1,1\n")
+        np.testing.assert_array_equal(reader.read(fn), [[1, 1.5], [2, 1]])
+        self.assertEqual(reader.read(fn).shape, (0, 2))
+        with open(fn, "w") as fh:
+            fh.write("Time,Train,Test\n")
+        self.assertRaises(ValueError, reader.read, fn)
+
+        # Without usecols every file is read with the columns of its header
+        reader = read_util.TailReader()
+        other = os.path.join(self.tmp_dir, "other.csv")
+        with open(other, "w") as fh:
+            fh.write("Time,Test\n0,3\n")
+        with open(fn, "a") as fh:
+            fh.write("0,1,2\n")
+        self.assertEqual(reader.read(fn).shape, (1, 3))
+        np.testing.assert_array_equal(reader.read(other), [[0, 3]])
+
+        # Compressed files can not be read from an offset
+        with gzip.open(fn + ".gz", "wt") as fh:
+            fh.write("Time,Train,Test\n0,1,2\n")
+        self.assertRaisesRegex(ValueError, "only plain csv", reader.read,
+                               fn + ".gz")
+
+    def test_prefetch(self):
+        def reader(fn, delay):
+            # Later files finish first
+            time.sleep(delay / float(fn))
+            return fn
+
+        files = [1, 2, 3, 4, 5, 6]
+        self.assertListEqual(
+            list(read_util.prefetch(files, reader, num_workers=3,
+                                    delay=0.01)), files)
+        self.assertListEqual(
+            list(read_util.prefetch(files, reader, num_workers=1,
+                                    delay=0)), files)
+        self.assertListEqual(
+            list(read_util.prefetch_file_list([[1, 2], [3], [4, 5, 6]],
+                                              reader, delay=0)),
+            [[1, 2], [3], [4, 5, 6]])
+
+    def test_compressed_files(self):
+        with open(self.traj_fn, "rb") as fh:
+            raw = fh.read()
+        expected = read_util.read_file(self.traj_fn)[1][1]
+        for suffix, module in ((".gz", gzip), (".bz2", bz2), (".xz", lzma)):
+            fn = self.traj_fn + suffix
+            with module.open(fn, "wb") as fh:
+                fh.write(raw)
+            file_format, (header, data) = read_util.read_file(fn)
+            self.assertEqual(file_format, "trajectory")
+            np.testing.assert_array_equal(data, expected)
+            _, data = read_util.read_csv_array(fn, usecols=(0, 1))
+            np.testing.assert_array_equal(data, expected[:, :2])
+
+        file_list, name_list = read_util.find_file_and_name_list(
+            roots=[self.tmp_dir], pattern="{name}.csv")
+        self.assertListEqual(name_list, ["obj", "traj"])
+        self.assertEqual(len(file_list[1]), 4)
+
+    def test_archive_members(self):
+        tar_fn = os.path.join(self.tmp_dir, "bundle.tar.gz")
+        zip_fn = os.path.join(self.tmp_dir, "bundle.zip")
+        with tarfile.open(tar_fn, "w:gz") as tf:
+            tf.add(self.traj_fn, arcname="smac/run-2.csv")
+            tf.add(self.traj_fn, arcname="smac/run-1.csv")
+            tf.add(self.obj_fn, arcname="obj.csv")
+        with zipfile.ZipFile(zip_fn, "w") as zf:
+            zf.write(self.traj_fn, arcname="smac/run-1.csv")
+        expected = read_util.read_file(self.traj_fn)[1][1]
+
+        file_list, name_list = read_util.get_file_and_name_list(
+            ["smac", tar_fn + "::smac/*.csv", "zip", zip_fn + "::*.csv"],
+            match_file=".csv")
+        self.assertListEqual(name_list, ["smac", "zip"])
+        self.assertListEqual(file_list[0],
+                             [tar_fn + "::smac/run-1.csv",
+                              tar_fn + "::smac/run-2.csv"])
+        for fn in file_list[0] + file_list[1]:
+            file_format, (_header, data) = read_util.read_file(fn)
+            self.assertEqual(file_format, "trajectory")
+            np.testing.assert_array_equal(data, expected)
+        self.assertEqual(read_util.read_file(tar_fn + "::obj.csv")[0],
+                         "objective_matrix")
+        self.assertRaises(ValueError, read_util.get_file_and_name_list,
+                          ["smac", tar_fn + "::nothing*.csv"], ".csv")
+
+    def test_prefetch_archive_members(self):
+        tar_fn = os.path.join(self.tmp_dir, "bundle.tar.gz")
+        with tarfile.open(tar_fn, "w:gz") as tf:
+            for run in range(5):
+                tf.add(self.traj_fn, arcname="smac/run-%d.csv" % run)
+        files = [tar_fn + "::smac/run-%d.csv" % run for run in range(5)]
+        expected = read_util.read_csv_array(self.traj_fn, usecols=(0, 1))[1]
+
+        # The compressed tar stream is only read once for all members
+        with unittest.mock.patch.object(read_util.tarfile, "open",
+                                        wraps=tarfile.open) as tar_open:
+            for _header, data in read_util.prefetch(files, num_workers=3,
+                                                    usecols=(0, 1)):
+                np.testing.assert_array_equal(data, expected)
+        self.assertEqual(tar_open.call_count, 1)
+        self.assertDictEqual(read_util._MEMBER_CACHE, dict())
+
+        # Members are dropped once they are parsed, so no more than the
+        # members in flight are held in memory
+        cached = list()
+
+        def reader(fn):
+            cached.append(len(read_util._MEMBER_CACHE))
+            return read_util.read_csv_array(fn, usecols=(0, 1))
+        for num_workers in (1, 2):
+            del cached[:]
+            self.assertEqual(len(list(read_util.prefetch(
+                files, reader=reader, num_workers=num_workers))), 5)
+            self.assertLessEqual(max(cached), num_workers)
+        self.assertDictEqual(read_util._MEMBER_CACHE, dict())
+
+        self.assertRaises(ValueError, read_util.read_archive_members, tar_fn,
+                          ["smac/run-9.csv"])
@@ -0,0 +1,121 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+import unittest.mock
+
+import numpy as np
+
+from plottingscripts.utils import read_util, result_store
+
+
+class resultStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        for dataset in ("d1", "d2"):
+            for strategy in ("random", "smac"):
+                os.makedirs(os.path.join(self.tmp_dir, dataset, strategy))
+                for seed in (1, 2):
+                    fn = os.path.join(self.tmp_dir, dataset, strategy,
+                                      "run-%d.csv" % seed)
+                    with open(fn, "w") as fh:
+                        fh.write("Time,Train,Test,Overhead\n")
+                        for t in range(3):
+                            fh.write("%d,%g,%g,0\n" % (t, seed + t, -t))
+        self.conn = result_store.connect(os.path.join(self.tmp_dir, "r.db"))
+
+    def tearDown(self):
+        self.conn.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_ingest_and_query(self):
+        pattern = "{dataset}/{strategy}/run-{seed}.csv"
+        self.assertEqual(result_store.ingest(self.conn, [self.tmp_dir],
+                                             pattern), 8)
+        # Nothing changed, so nothing is read
+        with unittest.mock.patch.object(result_store, "read_file",
+                                        wraps=result_store.read_file) as read:
+            self.assertEqual(result_store.ingest(self.conn, [self.tmp_dir],
+                                                 pattern), 0)
+        self.assertEqual(read.call_count, 0)
+
+        runs = result_store.query_runs(self.conn, dataset="d1",
+                                       strategy="smac")
+        self.assertListEqual([r[4] for r in runs], ["1", "2"])
+        _header, expected = read_util.read_csv_array(runs[1][1])
+        np.testing.assert_array_equal(
+            result_store.get_trajectory(self.conn, runs[1][0]), expected)
+        np.testing.assert_array_equal(
+            result_store.get_trajectory(self.conn, runs[1][0],
+                                        usecols=(0, 2), time_range=(1, None)),
+            expected[1:, [0, 2]])
+        # Runs are selected by their first and last time stamp
+        self.assertEqual(result_store.get_trajectory(
+            self.conn, runs[1][0], usecols=(0, 2),
+            time_range=(5, None)).shape, (0, 2))
+        self.assertEqual(len(result_store.query_runs(
+            self.conn, time_range=(None, 2))), 8)
+        self.assertEqual(len(result_store.query_runs(
+            self.conn, time_range=(3, None))), 0)
+
+        run_sets = result_store.load_run_sets(self.conn, dataset="d2",
+                                              columns=("train", ))
+        self.assertListEqual([r.name for r in run_sets], ["random", "smac"])
+        np.testing.assert_array_equal(run_sets[0].train,
+                                      [[1, 2, 3], [2, 3, 4]])
+        self.assertEqual(len(result_store.load_run_sets(
+            self.conn, strategy=["smac"], by="dataset")), 2)
+        # Runs of one strategy on different datasets are not merged
+        with self.assertRaisesRegex(ValueError, "more than one dataset"):
+            result_store.load_run_sets(self.conn, strategy="smac")
+
+        # Changed files are stored again
+        time.sleep(0.01)
+        with open(runs[1][1], "a") as fh:
+            fh.write("3,0,0,0\n")
+        self.assertEqual(result_store.ingest(self.conn, [self.tmp_dir],
+                                             pattern), 1)
+        self.assertEqual(result_store.get_trajectory(
+            self.conn, result_store.query_runs(
+                self.conn, dataset="d1", strategy="smac", seed="2")[0][0]
+        ).shape, (4, 4))
+
+    def test_old_schema(self):
+        fn = os.path.join(self.tmp_dir, "old.db")
+        conn = sqlite3.connect(fn)
+        conn.execute("CREATE TABLE runs (id INTEGER PRIMARY KEY)")
+        conn.close()
+        with self.assertRaisesRegex(ValueError, "older version"):
+            result_store.connect(fn)
+
+    def test_run_result_matrix(self):
+        fn = os.path.join(self.tmp_dir, "d1", "smac",
+                          "validationRunResultLineMatrix-traj-run-1.csv")
+        with open(fn, "w") as fh:
+            fh.write('"Instance","Seed","Result of validation config #1",'
+                     '"Result of validation config #2"\n'
+                     '"inst_a","1","SAT, 1.5, 0, 0, 1",'
+                     '"TIMEOUT, 10, 0, 0, 1"\n'
+                     '"inst_b","1","UNSAT, 2, 0, 0.5, 1",'
+                     '"SAT, 3, 0, 0, 1, extra"\n')
+        self.assertEqual(read_util.detect_file_format(fn),
+                         "run_result_matrix")
+        instances, statuses, data = read_util.read_run_result_matrix_array(fn)
+        self.assertListEqual(instances, ["inst_a", "inst_b"])
+        np.testing.assert_array_equal(statuses, [["SAT", "TIMEOUT"],
+                                                 ["UNSAT", "SAT"]])
+        np.testing.assert_array_equal(data[:, :, 0], [[1.5, 10], [2, 3]])
+        self.assertEqual(data[1, 0, 2], 0.5)
+
+        self.assertEqual(result_store.ingest(
+            self.conn, [self.tmp_dir],
+            "{dataset}/{strategy}/validationRunResultLineMatrix-*.csv"), 1)
+        run_id = result_store.query_runs(
+            self.conn, file_format="run_result_matrix")[0][0]
+        stored = result_store.get_run_result_matrix(self.conn, run_id)
+        self.assertListEqual(stored[0], instances)
+        np.testing.assert_array_equal(stored[1], statuses)
+        np.testing.assert_array_equal(stored[2], data)
@@ -0,0 +1,71 @@
+import os
+import pickle
+import unittest
+
+import numpy as np
+
+from plottingscripts.utils import shared_array, summary
+
+
+def add_and_sum(array, offset, scale=1):
+    return float(np.sum(array + offset) * scale)
+
+
+def write_first(array):
+    array[0, 0] = -1
+
+
+class sharedArrayTest(unittest.TestCase):
+
+    def test_memmap_roundtrip(self):
+        values = np.arange(12, dtype=np.float32).reshape(3, 4)
+        with shared_array.SharedArray.from_array(
+                values, backend="memmap") as shared:
+            self.assertTrue(os.path.exists(shared.name))
+            other = pickle.loads(pickle.dumps(shared))
+            # Only the description is pickled, both see the same memory
+            self.assertLess(len(pickle.dumps(shared)), 200)
+            np.testing.assert_array_equal(other.array, values)
+            self.assertEqual(other.array.dtype, np.float32)
+            other.array[1, 1] = 100
+            self.assertEqual(shared.array[1, 1], 100)
+            other.close()
+        self.assertFalse(os.path.exists(shared.name))
+
+    @unittest.skipIf(shared_array.shared_memory is None,
+                     "multiprocessing.shared_memory needs Python >= 3.8")
+    def test_shm_roundtrip(self):
+        values = np.arange(6.).reshape(2, 3)
+        with shared_array.SharedArray.from_array(values,
+                                                 backend="shm") as shared:
+            other = pickle.loads(pickle.dumps(shared))
+            np.testing.assert_array_equal(other.array, values)
+            other.close()
+
+    def test_map_shared(self):
+        arrays = [np.ones((2, 3)), np.arange(4.)]
+        for num_workers in (1, 2):
+            results = shared_array.map_shared(
+                add_and_sum, arrays, args=[(1, ), (2, )],
+                num_workers=num_workers, scale=2)
+            self.assertListEqual(results, [24., 28.])
+
+    def test_map_shared_writes_through(self):
+        shared = shared_array.SharedArray.from_array(np.zeros((2, 2)))
+        try:
+            shared_array.map_shared(write_first, [shared], num_workers=2)
+            self.assertEqual(shared.array[0, 0], -1)
+        finally:
+            shared.unlink()
+
+    def test_summarize_parallel(self):
+        rng = np.random.RandomState(1)
+        performance_list = [rng.rand(3, 4), rng.rand(2, 5)]
+        time_list = [np.arange(4), np.arange(5)]
+        expected = summary.summarize_batch(time_list, performance_list)
+        for s, e in zip(summary.summarize_parallel(time_list,
+                                                   performance_list,
+                                                   num_workers=2), expected):
+            self.assertEqual(s.num_runs, e.num_runs)
+            for key in ("times", "mean", "std", "median", "q25", "q75"):
+                np.testing.assert_allclose(getattr(s, key), getattr(e, key))
@@ -0,0 +1,172 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+from plottingscripts.utils import summary
+
+
+class summaryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.files = list()
+        for run, (times, values) in enumerate((([0, 1, 2], [5, 4, 3]),
+                                               ([0, 1.5], [6, 2]))):
+            fn = os.path.join(self.tmp_dir, "run-%d.csv" % run)
+            with open(fn, "w") as fh:
+                fh.write("Time,Train,Test\n")
+                for t, v in zip(times, values):
+                    fh.write("%g,0,%g\n" % (t, v))
+            self.files.append(fn)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_aggregate(self):
+        performance = np.array([[1, 2, 3], [3, 4, 5], [5, 9, 7]])
+        m, lower, upper = summary.aggregate(performance, "mean", scale_std=2)
+        np.testing.assert_allclose(m, [3, 5, 5])
+        np.testing.assert_allclose(upper - m, 2 * np.std(performance, axis=0))
+        m, lower, upper = summary.aggregate(performance, "median")
+        np.testing.assert_allclose(m, [3, 4, 5])
+        np.testing.assert_allclose(lower, [2, 3, 4])
+        self.assertRaises(ValueError, summary.aggregate, performance, "max")
+
+        s = summary.Summary.from_performance([0, 1, 2], performance)
+        for agglomeration in ("mean", "meanstderr", "median"):
+            np.testing.assert_allclose(
+                s.aggregate(agglomeration),
+                summary.aggregate(performance, agglomeration))
+
+    def test_aggregate_float32(self):
+        # float32 runs are summed up in float64
+        performance = np.full((1000, 2), 0.1, dtype=np.float32)
+        performance[:, 1] = 1e4
+        performance[::2, 1] += 1
+        m, lower, upper = summary.aggregate(performance, "mean")
+        self.assertEqual(m.dtype, np.float64)
+        np.testing.assert_allclose(m, [np.float32(0.1), 1e4 + 0.5],
+                                   rtol=1e-12)
+        np.testing.assert_allclose(upper - m, [0, 0.5], atol=1e-6)
+        s = summary.Summary.from_performance([0, 1], performance)
+        self.assertEqual(s.mean.dtype, np.float64)
+
+    def test_bootstrap_ci(self):
+        rng = np.random.RandomState(2)
+        performance = rng.rand(10, 30)
+        lower, upper = summary.bootstrap_ci(performance, num_samples=200)
+        # Same as resampling the runs in a loop with the same RandomState
+        idx = np.random.RandomState(1).randint(10, size=(200, 10))
+        means = np.array([performance[i].mean(axis=0) for i in idx])
+        np.testing.assert_allclose(lower, np.percentile(means, 2.5, axis=0))
+        np.testing.assert_allclose(upper, np.percentile(means, 97.5, axis=0))
+
+        # Chunking over the time steps does not change the interval
+        for statistic in ("mean", "median"):
+            np.testing.assert_allclose(
+                summary.bootstrap_ci(performance, statistic, max_elements=1),
+                summary.bootstrap_ci(performance, statistic))
+        self.assertRaises(ValueError, summary.bootstrap_ci, performance,
+                          "max")
+
+        m, lower, upper = summary.aggregate(performance, "bootstrapcimedian")
+        np.testing.assert_allclose(m, np.median(performance, axis=0))
+        self.assertTrue(np.all(lower <= m) and np.all(m <= upper))
+        m, lower, upper = summary.aggregate(performance, "bootstrapci")
+        self.assertTrue(np.all(lower <= m) and np.all(m <= upper))
+        # A Summary does not have the runs to resample
+        s = summary.Summary.from_performance(np.arange(30), performance)
+        self.assertRaises(ValueError, s.aggregate, "bootstrapci")
+
+    def test_summarize_batch(self):
+        rng = np.random.RandomState(1)
+        performance_list = [rng.rand(3, 4), rng.rand(2, 4), rng.rand(3, 4),
+                            rng.rand(3, 5)]
+        time_list = [np.arange(p.shape[1]) for p in performance_list]
+        summaries = summary.summarize_batch(time_list, performance_list)
+        self.assertEqual([s.num_runs for s in summaries], [3, 2, 3, 3])
+        for times, performance, s in zip(time_list, performance_list,
+                                         summaries):
+            expected = summary.Summary.from_performance(times, performance)
+            for key in ("times", "mean", "std", "median", "q25", "q75"):
+                np.testing.assert_allclose(getattr(s, key),
+                                           getattr(expected, key))
+
+    def test_resample_and_scale(self):
+        rng = np.random.RandomState(1)
+        performance = rng.rand(5, 50)
+        times = np.arange(1, 51)
+        s = summary.Summary.from_performance(times, performance)
+        # Same as summarizing the resampled runs
+        grid, resampled = summary.mdt.resample_trajectory(
+            times, performance, num_points=7, log=True)
+        expected = summary.Summary.from_performance(grid, resampled)
+        for key in ("times", "mean", "std", "median", "q25", "q75"):
+            np.testing.assert_allclose(getattr(s.resample(7), key),
+                                       getattr(expected, key))
+        # Same as summarizing the scaled runs
+        expected = summary.Summary.from_performance(times, -2 * performance)
+        for key in ("times", "mean", "std", "median", "q25", "q75"):
+            np.testing.assert_allclose(getattr(s.scale(-2), key),
+                                       getattr(expected, key))
+
+    def test_build_summary(self):
+        s = summary.build_summary(self.files)
+        np.testing.assert_allclose(s.times, [0, 1, 1.5, 2])
+        np.testing.assert_allclose(s.mean, [5.5, 5, 3, 2.5])
+        self.assertEqual(s.num_runs, 2)
+
+    def test_load_or_build_summary(self):
+        fn = summary.get_summary_filename(os.path.join(self.tmp_dir, "out"),
+                                          "exp")
+        self.assertFalse(summary.is_up_to_date(fn, self.files))
+        s = summary.load_or_build_summary(fn, self.files)
+        self.assertTrue(summary.is_up_to_date(fn, self.files))
+        self.assertFalse(summary.is_up_to_date(fn, self.files[:1]))
+        np.testing.assert_allclose(summary.read_summary(fn).median, s.median)
+
+        # Appending to a file invalidates the sidecar
+        time.sleep(0.01)
+        with open(self.files[1], "a") as fh:
+            fh.write("3,0,1\n")
+        self.assertFalse(summary.is_up_to_date(fn, self.files))
+        s = summary.load_or_build_summary(fn, self.files)
+        np.testing.assert_allclose(s.times, [0, 1, 1.5, 2, 3])
+
+        # So does building it with other arguments
+        self.assertFalse(summary.is_up_to_date(fn, self.files, column=1))
+        self.assertFalse(summary.is_up_to_date(fn, self.files,
+                                               num_points=3))
+        self.assertFalse(summary.is_up_to_date(fn, self.files,
+                                               dtype=np.float32))
+        s = summary.load_or_build_summary(fn, self.files, num_points=3,
+                                          log=False)
+        self.assertEqual(len(s.times), 3)
+        self.assertTrue(summary.is_up_to_date(fn, self.files, num_points=3,
+                                              log=False))
+        self.assertFalse(summary.is_up_to_date(fn, self.files, num_points=3))
+
+    def test_incremental_summary(self):
+        inc = summary.IncrementalSummary(self.files, column=2)
+        self.assertTrue(inc.poll())
+        self.assertFalse(inc.poll())
+        s = inc.summary()
+        expected = summary.build_summary(self.files)
+        np.testing.assert_allclose(s.times, expected.times)
+        np.testing.assert_allclose(s.mean, expected.mean)
+
+        with open(self.files[1], "a") as fh:
+            fh.write("3,0,1\n")
+        with open(self.files[0], "a") as fh:
+            fh.write("2.5,0,2\n")
+        self.assertTrue(inc.poll())
+        s = inc.summary()
+        expected = summary.build_summary(self.files)
+        for key in ("times", "mean", "std", "median", "q25", "q75"):
+            np.testing.assert_allclose(getattr(s, key),
+                                       getattr(expected, key))
+        self.assertEqual(len(s.subset(s.times > 2).times), 2)
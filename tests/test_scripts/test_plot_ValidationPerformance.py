@@ -0,0 +1,83 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+import unittest.mock
+
+from plottingscripts.utils import plot_util
+import scripts.plot_ValidationPerformance
+
+
+class Test_ValidationPerformance(unittest.TestCase):
+
+    def test_data_only(self):
+        this_dir = os.path.abspath(os.path.dirname(__file__))
+        script = os.path.join(os.path.dirname(os.path.dirname(this_dir)),
+                              "scripts", "plot_ValidationPerformance.py")
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            fn = os.path.join(tmp_dir, "curves.json")
+            argv = [script, "--data-only", "--export", fn, "strategy-1",
+                    os.path.join(this_dir, "test_data",
+                                 "strategy-1_seed-1.csv"),
+                    os.path.join(this_dir, "test_data",
+                                 "strategy-1_seed-2.csv")]
+            # Run in a fresh interpreter to see what it imports
+            output = subprocess.check_output(
+                [sys.executable, "-c",
+                 "import runpy, sys; sys.argv = %r; "
+                 "runpy.run_path(sys.argv[0], run_name='__main__'); "
+                 "print('pyplot imported: %%s' %% "
+                 "('matplotlib.pyplot' in sys.modules))" % argv],
+                cwd=os.path.dirname(os.path.dirname(this_dir)))
+            self.assertIn(b"pyplot imported: False", output)
+            with open(fn) as fh:
+                curves = json.load(fh)
+            self.assertListEqual(list(curves), ["strategy-1"])
+            self.assertEqual(curves["strategy-1"]["time"][0], 0)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_watch_keeps_styles(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            file_list = list()
+            for strategy in ("a", "b"):
+                fn = os.path.join(tmp_dir, "%s.csv" % strategy)
+                with open(fn, "w") as fh:
+                    fh.write("Time,Train,Test,Overhead\n0,2,2,0\n1,1,1,0\n")
+                file_list.append([fn])
+            args = argparse.Namespace(
+                save=os.path.join(tmp_dir, "plot.png"), agglomeration="mean",
+                maxvalue=100, timesteps=None, xmin=None, xmax=None,
+                ymin=None, ymax=None, scale_y=1, title="", logx=False,
+                logy=False, ylabel="", xlabel="", watch=0)
+
+            figures = list()
+
+            def sleep(_seconds):
+                if len(figures) == 2:
+                    raise KeyboardInterrupt
+                # New rows trigger the next render
+                for files in file_list:
+                    with open(files[0], "a") as fh:
+                        fh.write("%d,1,1,0\n" % (len(figures) + 1))
+
+            module = scripts.plot_ValidationPerformance
+            with unittest.mock.patch.object(module.time, "sleep", sleep), \
+                    unittest.mock.patch.object(
+                        module.plot_util, "save_plot",
+                        lambda fig, *_args: figures.append(fig)):
+                self.assertRaises(KeyboardInterrupt, module.watch, args,
+                                  file_list, ["a", "b"], "test",
+                                  plot_util.get_defaults())
+            colors = [[line.get_color() for line in fig.axes[0].lines]
+                      for fig in figures]
+            self.assertEqual(len(colors[0]), 2)
+            self.assertListEqual(colors[0], colors[1])
+        finally:
+            shutil.rmtree(tmp_dir)
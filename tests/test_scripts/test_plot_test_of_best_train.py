@@ -0,0 +1,37 @@
+import unittest
+
+import numpy as np
+
+import scripts.plot_test_of_best_train
+
+
+class Test_test_of_best_train(unittest.TestCase):
+
+    def test_get_test_of_best_train(self):
+        train = np.array([[5, 4, 4, 1],
+                          [3, 3, 2, 2]])
+        test = np.array([[6, 5, 7, 3],
+                         [4, 8, 1, 0]])
+        test_of_best_train = \
+            scripts.plot_test_of_best_train.get_test_of_best_train(train,
+                                                                   test)
+        np.testing.assert_array_equal([4, 8, 1, 3], test_of_best_train)
+
+    def test_get_test_of_best_train_cumulative(self):
+        # The best train performance at time step 1 is not better than at
+        # time step 0, so the incumbent does not change
+        train = np.array([[5, 4, 4, 1],
+                          [3, 3, 2, 2]])
+        test = np.array([[6, 5, 7, 3],
+                         [4, 8, 1, 0]])
+        test_of_best_train = \
+            scripts.plot_test_of_best_train.get_test_of_best_train(
+                train, test, cumulative=True)
+        np.testing.assert_array_equal([4, 4, 1, 3], test_of_best_train)
+
+        train = np.array([[1, 2, 3, 0.5]])
+        test = np.array([[1, 2, 3, 4]])
+        test_of_best_train = \
+            scripts.plot_test_of_best_train.get_test_of_best_train(
+                train, test, cumulative=True)
+        np.testing.assert_array_equal([1, 1, 1, 4], test_of_best_train)